@@ -0,0 +1,41 @@
+from __future__ import annotations
+
+import logging
+import os
+
+from arq.constants import default_queue_name
+from fastapi import APIRouter, Request, Response
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    generate_latest,
+    multiprocess,
+)
+
+from app.core.metrics import ARQ_QUEUE_DEPTH
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+
+
+def _registry() -> CollectorRegistry:
+    if "PROMETHEUS_MULTIPROC_DIR" not in os.environ:
+        return REGISTRY
+    # aggregate the mmap files of every worker process (a fresh registry per scrape)
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)  # type: ignore[no-untyped-call]
+    return registry
+
+
+@router.get("/metrics", include_in_schema=False)  # type: ignore
+async def metrics(request: Request) -> Response:
+    redis = getattr(request.app.state, "redis", None)
+    if redis is not None:
+        try:
+            ARQ_QUEUE_DEPTH.set(await redis.zcard(default_queue_name))
+        except Exception as e:
+            logger.warning("arq queue depth read failed: %s", e)
+
+    return Response(generate_latest(_registry()), media_type=CONTENT_TYPE_LATEST)
@@ -2,7 +2,7 @@ from __future__ import annotations
 
 import logging
 import uuid
-from typing import Annotated
+from typing import Annotated, Any
 
 from fastapi import APIRouter, BackgroundTasks, Depends, File, HTTPException, Request, UploadFile
 from sqlalchemy.ext.asyncio import AsyncSession
@@ -35,10 +35,9 @@ async def upload_document(
     doc = await repo.create(filename=filename, content_type=content_type)
     await session.commit()
 
-    data = await file.read()
-    storage.save_bytes(document_id=doc.id, filename=filename, data=data)
-
-    path = storage.save_bytes(document_id=doc.id, filename=filename, data=data)
+    # UploadFile is spooled to a temp file by Starlette; copy it without loading it whole
+    await file.seek(0)
+    path = storage.save_fileobj(document_id=doc.id, filename=filename, src=file.file)
 
     if content_type.startswith("text/"):
         await request.app.state.redis.enqueue_job(
@@ -60,9 +59,14 @@ async def upload_document(
 async def get_document_status(
     document_id: uuid.UUID,
     session: AsyncSession = Depends(get_session),  # noqa: B008
-) -> dict[str, str | None]:
+) -> dict[str, Any]:
     repo = DocumentRepository(session)
     doc = await repo.get(document_id=document_id)
     if doc is None:
         raise HTTPException(status_code=404, detail="Document not found")
-    return {"document_id": str(doc.id), "status": doc.status, "error": doc.error}
+    return {
+        "document_id": str(doc.id),
+        "status": doc.status,
+        "error": doc.error,
+        "ingest_stats": doc.ingest_stats,
+    }
@@ -1,6 +1,6 @@
 from __future__ import annotations
 
-from typing import no_type_check
+from typing import Any, no_type_check
 
 from fastapi import APIRouter, Depends
 from redis.asyncio import Redis
@@ -9,6 +9,10 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.db.engine import get_session
 from app.infra.redis import get_redis
+from app.rag.answering.answer_cache import peek_answer_cache
+from app.rag.ingestion.embedding_cache import get_embedding_cache
+from app.rag.ingestion.embeddings import peek_query_coalescer
+from app.rag.retrieval.cache import peek_retrieval_cache
 
 router = APIRouter()
 
@@ -30,3 +34,18 @@ async def ready(session: AsyncSession = Depends(get_session)) -> dict[str, str]:
     await r.ping()
 
     return {"status": "ready"}
+
+
+@router.get("/stats")  # type: ignore
+async def stats() -> dict[str, Any]:
+    coalescer = peek_query_coalescer()
+    answer_cache = peek_answer_cache()
+    retrieval_cache = peek_retrieval_cache()
+    return {
+        "embeddings_cache": get_embedding_cache().stats.as_dict(),
+        "embeddings_coalescer": coalescer.stats() if coalescer is not None else None,
+        "answer_cache": answer_cache.stats.as_dict() if answer_cache is not None else None,
+        "retrieval_cache": (
+            retrieval_cache.stats.as_dict() if retrieval_cache is not None else None
+        ),
+    }
@@ -1,73 +1,338 @@
+import json
 import logging
+import time
 import uuid
+from collections.abc import AsyncIterator
 
-from fastapi import APIRouter, Depends, Request
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.api.v1.schemas.query import QueryMeta, QueryRequest, QueryResponse, QueryTimings
-from app.core.settings import get_settings
+from app.api.v1.schemas.error import ErrorResponse
+from app.api.v1.schemas.query import (
+    QueryBatchRequest,
+    QueryBatchResponse,
+    QueryBatchTimings,
+    QueryMeta,
+    QueryRequest,
+    QueryResponse,
+    QueryStreamSources,
+    QueryTimings,
+)
+from app.core.metrics import observe_query_stages
+from app.core.request_context import add_server_timing
+from app.core.settings import Settings, get_settings
 from app.db.engine import get_session
-from app.rag.answering.service import answer_question
+from app.rag.answering.service import (
+    answer_question,
+    answer_question_stream,
+    answer_questions_batch,
+    resolve_search_params,
+)
+from app.rag.answering.types import (
+    AnswerTimings,
+    BatchQuestion,
+    DoneEvent,
+    SearchParams,
+    SourcesEvent,
+    TokenEvent,
+)
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
 
-@router.post("/query", response_model=QueryResponse)  # type: ignore
-async def query_endpoint(
-    payload: QueryRequest,
-    request: Request,
-    session: AsyncSession = Depends(get_session),  # noqa: B008
-) -> QueryResponse:
-    request_id = str(getattr(request.state, "request_id", "")) or str(uuid.uuid4())
-    s = get_settings()
-
+def _clamp_top_k(s: Settings, top_k: int | None) -> int:
     # top_k: default + clamp
-    top_k_in = payload.top_k if payload.top_k is not None else int(s.top_k_default)
-    top_k = max(1, min(int(top_k_in), int(s.top_k_max)))
+    top_k_in = top_k if top_k is not None else int(s.top_k_default)
+    return max(1, min(int(top_k_in), int(s.top_k_max)))
+
 
+def _query_meta(
+    s: Settings,
+    top_k: int,
+    search_params: SearchParams,
+    *,
+    answer_cache_hit: bool = False,
+    answer_cache_similarity: float | None = None,
+    retrieval_cache_hit: bool = False,
+) -> QueryMeta:
     # candidates_limit: top_k * multiplier
     candidates_limit = top_k
     if getattr(s, "rerank_backend", "stub") != "disabled":
         candidates_limit = max(top_k, top_k * int(getattr(s, "rerank_candidates_multiplier", 3)))
 
-    answer, sources, t = await answer_question(
-        session=session,
-        document_id=payload.document_id,
-        question=payload.question,
+    return QueryMeta(
         top_k=top_k,
+        candidates_limit=candidates_limit,
+        rerank_backend=str(getattr(s, "rerank_backend", "stub")),
+        reranker=str(getattr(s, "reranker", "none")),
+        rerank_weight=float(getattr(s, "rerank_weight", 0.0)),
+        rerank_alpha=float(getattr(s, "rerank_alpha", 0.7)),
+        retrieval_mode=s.retrieval_mode,
+        index_mode=search_params.index_mode,
+        ef_search=search_params.ef_search,
+        probes=search_params.probes,
+        vector_storage=search_params.vector_storage,
+        answer_cache_hit=answer_cache_hit,
+        answer_cache_similarity=answer_cache_similarity,
+        retrieval_cache_hit=retrieval_cache_hit,
     )
 
-    timings = QueryTimings(
+
+def _query_timings(t: AnswerTimings) -> QueryTimings:
+    return QueryTimings(
         embed_query_ms=t.embed_query_ms,
         vector_search_ms=t.vector_search_ms,
+        lexical_search_ms=t.lexical_search_ms,
         rerank_ms=t.rerank_ms,
         llm_ms=t.llm_ms,
+        llm_first_token_ms=t.llm_first_token_ms,
         total_ms=t.total_ms,
     )
 
-    meta = QueryMeta(
+
+def _server_timing_stages(t: AnswerTimings) -> dict[str, float]:
+    # lexical search overlaps embed + vector search, so it gets its own entry
+    return {
+        "embed": t.embed_query_ms,
+        "db": t.vector_search_ms,
+        "fts": t.lexical_search_ms,
+        "rerank": t.rerank_ms,
+        "llm": t.llm_ms,
+    }
+
+
+def _observe_stage_timings(t: AnswerTimings) -> None:
+    # fleet-wide latency histograms (/metrics)
+    observe_query_stages(
+        {
+            "embed": t.embed_query_ms,
+            "vector_search": t.vector_search_ms,
+            "lexical_search": t.lexical_search_ms,
+            "rerank": t.rerank_ms,
+            "llm": t.llm_ms,
+            "llm_first_token": t.llm_first_token_ms,
+            "total": t.total_ms,
+        }
+    )
+
+
+def _record_stage_timings(t: AnswerTimings) -> None:
+    # per-request Server-Timing header, plus the histograms
+    for name, dur_ms in _server_timing_stages(t).items():
+        add_server_timing(name, dur_ms)
+    _observe_stage_timings(t)
+
+
+def _record_batch_stage_timings(items: list[AnswerTimings]) -> None:
+    # Batch items run concurrently: summing a stage across them could exceed the
+    # request's wall time, so the header gets the slowest item's duration per stage.
+    # The histograms still see every item.
+    per_item = [_server_timing_stages(t) for t in items]
+    for name in _server_timing_stages(AnswerTimings()):
+        add_server_timing(name, max((stages[name] for stages in per_item), default=0.0))
+    for t in items:
+        _observe_stage_timings(t)
+
+
+def _sse(event: str, data: BaseModel | dict[str, object]) -> str:
+    body = data.model_dump_json() if isinstance(data, BaseModel) else json.dumps(data)
+    return f"event: {event}\ndata: {body}\n\n"
+
+
+@router.post("/query", response_model=QueryResponse)  # type: ignore
+async def query_endpoint(
+    payload: QueryRequest,
+    request: Request,
+    session: AsyncSession = Depends(get_session),  # noqa: B008
+) -> QueryResponse:
+    request_id = str(getattr(request.state, "request_id", "")) or str(uuid.uuid4())
+    s = get_settings()
+
+    top_k = _clamp_top_k(s, payload.top_k)
+    search_params = resolve_search_params(ef_search=payload.ef_search, probes=payload.probes)
+
+    result = await answer_question(
+        session=session,
+        document_id=payload.document_id,
+        question=payload.question,
         top_k=top_k,
-        candidates_limit=candidates_limit,
-        rerank_backend=str(getattr(s, "rerank_backend", "stub")),
-        reranker=str(getattr(s, "reranker", "none")),
-        rerank_weight=float(getattr(s, "rerank_weight", 0.0)),
-        rerank_alpha=float(getattr(s, "rerank_alpha", 0.7)),
+        search_params=search_params,
+    )
+
+    _record_stage_timings(result.timings)
+    timings = _query_timings(result.timings)
+    meta = _query_meta(
+        s,
+        top_k,
+        search_params,
+        answer_cache_hit=result.answer_cache_hit,
+        answer_cache_similarity=result.answer_cache_similarity,
+        retrieval_cache_hit=result.retrieval_cache_hit,
     )
 
     logger.info(
-        "query request_id=%s doc=%s top_k=%s total_ms=%.2f",
+        "query request_id=%s doc=%s top_k=%s answer_cache_hit=%s total_ms=%.2f",
         request_id,
         payload.document_id,
         top_k,
+        result.answer_cache_hit,
         timings.total_ms,
     )
 
     return QueryResponse(
         request_id=request_id,
-        answer=answer,
-        sources=sources,
+        answer=result.answer,
+        sources=result.sources,
         meta=meta,
         timings=timings,
     )
+
+
+@router.post("/query/stream")  # type: ignore
+async def query_stream_endpoint(payload: QueryRequest, request: Request) -> StreamingResponse:
+    """
+    Server-Sent Events variant of /query:
+    `sources` (sources + meta, right after retrieval/rerank), then `token` per answer
+    delta, then `timings`. An `error` event replaces the rest if the pipeline fails.
+    The stage breakdown is only in the `timings` event: the headers are sent before
+    the stages run, so Server-Timing carries `app` alone.
+    """
+    request_id = str(getattr(request.state, "request_id", "")) or str(uuid.uuid4())
+    s = get_settings()
+
+    top_k = _clamp_top_k(s, payload.top_k)
+    search_params = resolve_search_params(ef_search=payload.ef_search, probes=payload.probes)
+
+    async def events() -> AsyncIterator[str]:
+        try:
+            # no session here: retrieval opens its own and returns the connection to
+            # the pool before the answer is generated and read by the client
+            async for event in answer_question_stream(
+                session=None,
+                document_id=payload.document_id,
+                question=payload.question,
+                top_k=top_k,
+                search_params=search_params,
+            ):
+                if isinstance(event, SourcesEvent):
+                    meta = _query_meta(
+                        s,
+                        top_k,
+                        search_params,
+                        answer_cache_hit=event.answer_cache_hit,
+                        answer_cache_similarity=event.answer_cache_similarity,
+                        retrieval_cache_hit=event.retrieval_cache_hit,
+                    )
+                    yield _sse(
+                        "sources",
+                        QueryStreamSources(request_id=request_id, sources=event.sources, meta=meta),
+                    )
+                elif isinstance(event, TokenEvent):
+                    yield _sse("token", {"text": event.text})
+                elif isinstance(event, DoneEvent):
+                    _observe_stage_timings(event.timings)
+                    timings = _query_timings(event.timings)
+                    logger.info(
+                        "query_stream request_id=%s doc=%s top_k=%s ttft_ms=%.2f total_ms=%.2f",
+                        request_id,
+                        payload.document_id,
+                        top_k,
+                        timings.llm_first_token_ms,
+                        timings.total_ms,
+                    )
+                    yield _sse("timings", timings)
+        except Exception:
+            logger.exception("query_stream failed request_id=%s", request_id)
+            yield _sse(
+                "error",
+                ErrorResponse(
+                    request_id=request_id,
+                    code="internal_error",
+                    message="Internal server error",
+                ),
+            )
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.post("/query/batch", response_model=QueryBatchResponse)  # type: ignore
+async def query_batch_endpoint(
+    payload: QueryBatchRequest,
+    request: Request,
+) -> QueryBatchResponse:
+    """
+    Many questions (over one or more documents) in one request: one embedding call
+    for all questions, retrieval runs concurrently over a bounded set of sessions.
+    """
+    request_id = str(getattr(request.state, "request_id", "")) or str(uuid.uuid4())
+    s = get_settings()
+
+    if len(payload.queries) > s.query_batch_max_size:
+        raise HTTPException(
+            status_code=422,
+            detail=f"Too many queries in batch (max {s.query_batch_max_size})",
+        )
+
+    t_total0 = time.perf_counter()
+
+    items: list[BatchQuestion] = []
+    for q in payload.queries:
+        items.append(
+            BatchQuestion(
+                document_id=q.document_id,
+                question=q.question,
+                top_k=_clamp_top_k(s, q.top_k),
+                search_params=resolve_search_params(ef_search=q.ef_search, probes=q.probes),
+            )
+        )
+
+    results, embed_ms = await answer_questions_batch(
+        items=items, concurrency=s.query_batch_concurrency
+    )
+
+    # items were embedded together: their own embed_query_ms is 0
+    add_server_timing("embed", embed_ms)
+    _record_batch_stage_timings([r.timings for r in results])
+
+    responses = [
+        QueryResponse(
+            request_id=request_id,
+            answer=r.answer,
+            sources=r.sources,
+            meta=_query_meta(
+                s,
+                it.top_k,
+                it.search_params or resolve_search_params(),
+                answer_cache_hit=r.answer_cache_hit,
+                answer_cache_similarity=r.answer_cache_similarity,
+                retrieval_cache_hit=r.retrieval_cache_hit,
+            ),
+            timings=_query_timings(r.timings),
+        )
+        for it, r in zip(items, results, strict=True)
+    ]
+
+    total_ms = (time.perf_counter() - t_total0) * 1000.0
+    timings = QueryBatchTimings(
+        embed_query_ms=round(embed_ms, 3),
+        retrieval_ms=round(max(0.0, total_ms - embed_ms), 3),
+        total_ms=round(total_ms, 3),
+    )
+
+    logger.info(
+        "query_batch request_id=%s n=%s embed_ms=%.2f total_ms=%.2f",
+        request_id,
+        len(items),
+        timings.embed_query_ms,
+        timings.total_ms,
+    )
+
+    return QueryBatchResponse(request_id=request_id, results=responses, timings=timings)
@@ -1,3 +1,15 @@
-from .query import QueryRequest, QueryResponse, SourceChunk
+from .query import (
+    QueryBatchRequest,
+    QueryBatchResponse,
+    QueryRequest,
+    QueryResponse,
+    SourceChunk,
+)
 
-__all__ = ["QueryRequest", "QueryResponse", "SourceChunk"]
+__all__ = [
+    "QueryBatchRequest",
+    "QueryBatchResponse",
+    "QueryRequest",
+    "QueryResponse",
+    "SourceChunk",
+]
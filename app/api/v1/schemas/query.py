@@ -12,13 +12,23 @@ class QueryMeta(BaseModel):
     reranker: str
     rerank_weight: float
     rerank_alpha: float
+    retrieval_mode: str = "vector"
+    index_mode: str = "exact"
+    ef_search: int | None = None
+    probes: int | None = None
+    vector_storage: str = "full"
+    answer_cache_hit: bool = False
+    answer_cache_similarity: float | None = None
+    retrieval_cache_hit: bool = False
 
 
 class QueryTimings(BaseModel):
     embed_query_ms: float = Field(ge=0)
     vector_search_ms: float = Field(ge=0)
+    lexical_search_ms: float = Field(default=0.0, ge=0)
     rerank_ms: float = Field(ge=0)
     llm_ms: float = Field(ge=0)
+    llm_first_token_ms: float = Field(default=0.0, ge=0)
     total_ms: float = Field(ge=0)
 
 
@@ -26,6 +36,8 @@ class QueryRequest(BaseModel):
     document_id: uuid.UUID
     question: str
     top_k: int = 5
+    ef_search: int | None = Field(default=None, ge=1, le=1000)
+    probes: int | None = Field(default=None, ge=1, le=10000)
 
 
 class SourceChunk(BaseModel):
@@ -40,3 +52,27 @@ class QueryResponse(BaseModel):
     sources: list[SourceChunk] = Field(default_factory=list)
     meta: QueryMeta
     timings: QueryTimings
+
+
+class QueryStreamSources(BaseModel):
+    """First SSE event of /query/stream, sent as soon as retrieval/rerank completes."""
+
+    request_id: str
+    sources: list[SourceChunk] = Field(default_factory=list)
+    meta: QueryMeta
+
+
+class QueryBatchRequest(BaseModel):
+    queries: list[QueryRequest] = Field(min_length=1)
+
+
+class QueryBatchTimings(BaseModel):
+    embed_query_ms: float = Field(ge=0)
+    retrieval_ms: float = Field(ge=0)
+    total_ms: float = Field(ge=0)
+
+
+class QueryBatchResponse(BaseModel):
+    request_id: str
+    results: list[QueryResponse] = Field(default_factory=list)
+    timings: QueryBatchTimings
@@ -0,0 +1,91 @@
+from __future__ import annotations
+
+from bisect import bisect_left
+from collections.abc import Sequence
+from typing import Any
+
+import prometheus_client as prom
+
+
+class Histogram:
+    """
+    Minimal fixed-bucket histogram (cumulative "le" buckets, Prometheus-style).
+    Cheap enough to observe on hot paths; not thread-safe.
+    """
+
+    def __init__(self, buckets: Sequence[float]) -> None:
+        self._bounds = sorted(float(b) for b in buckets)
+        self._counts = [0] * (len(self._bounds) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self._counts[bisect_left(self._bounds, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def snapshot(self) -> dict[str, Any]:
+        buckets: dict[str, int] = {}
+        acc = 0
+        for bound, n in zip(self._bounds, self._counts, strict=False):
+            acc += n
+            buckets[f"le_{bound:g}"] = acc
+        buckets["le_inf"] = self.count
+        return {"count": self.count, "sum": round(self.sum, 3), "buckets": buckets}
+
+
+# --- Prometheus (scraped at GET /metrics) ---
+# Safe under several uvicorn workers: with PROMETHEUS_MULTIPROC_DIR set (before the
+# app is imported) every process writes its samples to mmap files in that directory
+# and /metrics aggregates them (see app.api.metrics).
+
+_STAGE_BUCKETS_S = (
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0,
+)  # fmt: skip
+
+QUERY_STAGE_SECONDS = prom.Histogram(
+    "rag_query_stage_seconds",
+    "Latency of one query pipeline stage",
+    labelnames=["stage"],
+    buckets=_STAGE_BUCKETS_S,
+)
+CACHE_LOOKUPS = prom.Counter(
+    "rag_cache_lookups_total",
+    "Cache lookups by cache and result",
+    labelnames=["cache", "result"],
+)
+DB_POOL_CHECKOUTS = prom.Counter(
+    "rag_db_pool_checkouts_total",
+    "Connections handed out by the SQLAlchemy pool",
+)
+DB_POOL_WAIT_SECONDS = prom.Histogram(
+    "rag_db_pool_wait_seconds",
+    "Time to obtain a pooled DB connection (queueing + connect when the pool grows)",
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 30.0),
+)
+DB_POOL_IN_USE = prom.Gauge(
+    "rag_db_pool_in_use",
+    "Connections currently checked out of the pool",
+    multiprocess_mode="livesum",
+)
+ARQ_QUEUE_DEPTH = prom.Gauge(
+    "rag_arq_queue_depth",
+    "Jobs waiting in the arq queue (sampled on scrape)",
+    multiprocess_mode="livemax",
+)
+INGEST_CHUNKS = prom.Counter(
+    "rag_ingest_chunks_total",
+    "Chunks embedded and written by ingestion (rate() = fleet chunks/sec)",
+)
+INGEST_CHUNKS_PER_SECOND = prom.Histogram(
+    "rag_ingest_chunks_per_second",
+    "Per-document ingestion throughput",
+    buckets=(10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000),
+)
+
+
+def observe_query_stages(stages: dict[str, float]) -> None:
+    """Record stage durations given in ms; zero stages (skipped) are not observed."""
+    for stage, ms in stages.items():
+        if ms > 0.0:
+            QUERY_STAGE_SECONDS.labels(stage=stage).observe(ms / 1000.0)
@@ -3,43 +3,65 @@ from __future__ import annotations
 import logging
 import time
 import uuid
-from collections.abc import Awaitable, Callable
 
-from fastapi import Request, Response
-from starlette.middleware.base import BaseHTTPMiddleware
-from starlette.types import ASGIApp
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 
-from app.core.request_context import set_request_id
+from app.core.request_context import format_server_timing, set_request_id, start_server_timing
 
 logger = logging.getLogger("app.access")
 
 
-class RequestIdLoggingMiddleware(BaseHTTPMiddleware):  # type: ignore
+class RequestIdLoggingMiddleware:
+    """
+    Pure ASGI: no per-request task or body buffering (unlike BaseHTTPMiddleware).
+    Sets the request id (header, request.state, logging contextvar), adds
+    X-Request-Id and Server-Timing (stages recorded so far + total `app`) to the
+    response headers, and writes one access log line once the body is sent.
+    """
+
     def __init__(self, app: ASGIApp) -> None:
-        super().__init__(app)
-
-    async def dispatch(
-        self,
-        request: Request,
-        call_next: Callable[[Request], Awaitable[Response]],
-    ) -> Response:
-        rid = request.headers.get("X-Request-Id") or str(uuid.uuid4())
-        request.state.request_id = rid
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        rid = ""
+        for name, value in scope["headers"]:
+            if name == b"x-request-id":
+                rid = value.decode("latin-1")
+                break
+        rid = rid or str(uuid.uuid4())
+
+        scope.setdefault("state", {})["request_id"] = rid
         set_request_id(rid)
+        stage_timings = start_server_timing()
 
         t0 = time.perf_counter()
-        response = await call_next(request)
-        dt_ms = (time.perf_counter() - t0) * 1000.0
-
-        response.headers["X-Request-Id"] = rid
-
-        logger.info(
-            "request",
-            extra={
-                "method": request.method,
-                "path": request.url.path,
-                "status": response.status_code,
-                "latency_ms": round(dt_ms, 3),
-            },
-        )
-        return response
+        status = 500
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                headers = MutableHeaders(scope=message)
+                headers["X-Request-Id"] = rid
+                stage_timings["app"] = (time.perf_counter() - t0) * 1000.0
+                headers["Server-Timing"] = format_server_timing(stage_timings)
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            dt_ms = (time.perf_counter() - t0) * 1000.0
+            logger.info(
+                "request",
+                extra={
+                    "method": scope["method"],
+                    "path": scope["path"],
+                    "status": status,
+                    "latency_ms": round(dt_ms, 3),
+                },
+            )
@@ -3,6 +3,9 @@ from __future__ import annotations
 from contextvars import ContextVar
 
 request_id_ctx: ContextVar[str | None] = ContextVar("request_id", default=None)
+# per-request stage durations (ms) for the Server-Timing header; the middleware installs
+# a fresh dict, handlers add to it (tasks spawned by the request share the same dict)
+server_timing_ctx: ContextVar[dict[str, float] | None] = ContextVar("server_timing", default=None)
 
 
 def set_request_id(value: str) -> None:
@@ -11,3 +14,20 @@ def set_request_id(value: str) -> None:
 
 def get_request_id() -> str | None:
     return request_id_ctx.get()
+
+
+def start_server_timing() -> dict[str, float]:
+    timings: dict[str, float] = {}
+    server_timing_ctx.set(timings)
+    return timings
+
+
+def add_server_timing(name: str, dur_ms: float) -> None:
+    """Accumulate a stage duration for the current request (no-op outside a request)."""
+    timings = server_timing_ctx.get()
+    if timings is not None and dur_ms > 0.0:
+        timings[name] = timings.get(name, 0.0) + dur_ms
+
+
+def format_server_timing(timings: dict[str, float]) -> str:
+    return ", ".join(f"{name};dur={dur_ms:.1f}" for name, dur_ms in timings.items())
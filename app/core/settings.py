@@ -21,15 +21,131 @@ class Settings(BaseSettings):
         default="text-embedding-3-small", validation_alias="OPENAI_EMBEDDINGS_MODEL"
     )
 
+    openai_max_retries: int = Field(
+        default=2,
+        validation_alias="APP_OPENAI_MAX_RETRIES",
+        description="SDK-level retries for OpenAI-compatible calls",
+    )
+
+    http_max_connections: int = Field(
+        default=100,
+        validation_alias="APP_HTTP_MAX_CONNECTIONS",
+        description="outbound HTTP pool size shared by embeddings/LLM clients",
+    )
+    http_max_keepalive_connections: int = Field(
+        default=20,
+        validation_alias="APP_HTTP_MAX_KEEPALIVE_CONNECTIONS",
+        description="idle keep-alive connections kept in the outbound pool",
+    )
+    http_keepalive_expiry_s: float = Field(
+        default=30.0,
+        validation_alias="APP_HTTP_KEEPALIVE_EXPIRY_S",
+        description="idle time before a pooled connection is dropped",
+    )
+    http_timeout_s: float = Field(
+        default=30.0,
+        validation_alias="APP_HTTP_TIMEOUT_S",
+        description="read/write/pool timeout for outbound calls",
+    )
+    http_connect_timeout_s: float = Field(
+        default=5.0,
+        validation_alias="APP_HTTP_CONNECT_TIMEOUT_S",
+        description="TCP/TLS connect timeout for outbound calls",
+    )
+
     embeddings_backend: str = Field(
         default="auto",
         validation_alias="APP_EMBEDDINGS_BACKEND",
-        description="auto|openai|mock",
+        description="auto|openai|mock|hashing",
     )
     embeddings_dim: int = Field(
         default=1536,
+        ge=1,
+        le=16000,
         validation_alias="APP_EMBEDDINGS_DIM",
-        description="Vector size for mock embeddings and DB column dimension if used",
+        description=(
+            "vector size produced by every embeddings backend and stored in chunks.embedding "
+            "(column and ANN index are created with it by the migrations)"
+        ),
+    )
+    embeddings_truncate: str = Field(
+        default="none",
+        validation_alias="APP_EMBEDDINGS_TRUNCATE",
+        description=(
+            "none|api|client: shorten provider vectors to embeddings_dim (Matryoshka models). "
+            "api sends `dimensions` (text-embedding-3-*), client keeps the first "
+            "embeddings_dim components and re-normalizes"
+        ),
+    )
+    hashing_embeddings_features: int = Field(
+        default=4096,
+        validation_alias="APP_HASHING_EMBEDDINGS_FEATURES",
+        description="feature-hashing slots of the offline 'hashing' backend",
+    )
+    hashing_embeddings_seed: int = Field(
+        default=0,
+        validation_alias="APP_HASHING_EMBEDDINGS_SEED",
+        description="seed of the fixed random projection of the 'hashing' backend",
+    )
+    embeddings_cache_enabled: bool = Field(
+        default=True,
+        validation_alias="APP_EMBEDDINGS_CACHE_ENABLED",
+        description="cache query embeddings (process LRU + Redis)",
+    )
+    embeddings_cache_size: int = Field(
+        default=4096,
+        validation_alias="APP_EMBEDDINGS_CACHE_SIZE",
+        description="max entries in the in-process query embedding LRU",
+    )
+    embeddings_cache_ttl_s: int = Field(
+        default=3600,
+        validation_alias="APP_EMBEDDINGS_CACHE_TTL_S",
+        description="TTL for cached query embeddings (both tiers)",
+    )
+    embeddings_cache_redis: bool = Field(
+        default=True,
+        validation_alias="APP_EMBEDDINGS_CACHE_REDIS",
+        description="enable the shared Redis tier of the query embedding cache",
+    )
+    embeddings_coalesce_enabled: bool = Field(
+        default=True,
+        validation_alias="APP_EMBEDDINGS_COALESCE_ENABLED",
+        description="micro-batch concurrent single-question embed calls into one provider call",
+    )
+    embeddings_coalesce_window_ms: float = Field(
+        default=2.0,
+        validation_alias="APP_EMBEDDINGS_COALESCE_WINDOW_MS",
+        description="max time a question waits for others before its batch is sent",
+    )
+    embeddings_coalesce_max_batch: int = Field(
+        default=64,
+        validation_alias="APP_EMBEDDINGS_COALESCE_MAX_BATCH",
+        description="flush a batch as soon as this many questions are pending",
+    )
+    ingest_read_size: int = Field(
+        default=64 * 1024,
+        validation_alias="APP_INGEST_READ_SIZE",
+        description="bytes per incremental file read during ingestion",
+    )
+    ingest_batch_size: int = Field(
+        default=256,
+        validation_alias="APP_INGEST_BATCH_SIZE",
+        description="chunks per embedding request / DB write batch during ingestion",
+    )
+    ingest_embed_concurrency: int = Field(
+        default=4,
+        validation_alias="APP_INGEST_EMBED_CONCURRENCY",
+        description="embedding requests in flight per ingestion job",
+    )
+    ingest_queue_size: int = Field(
+        default=4,
+        validation_alias="APP_INGEST_QUEUE_SIZE",
+        description="batches buffered between ingestion stages (bounds memory)",
+    )
+    ingest_insert_page_size: int = Field(
+        default=1000,
+        validation_alias="APP_INGEST_INSERT_PAGE_SIZE",
+        description="rows per multi-row INSERT ... VALUES statement when writing chunks",
     )
     top_k_default: int = Field(
         default=5,
@@ -42,6 +158,17 @@ class Settings(BaseSettings):
         description="Upper bound for top_k to protect service",
     )
 
+    query_batch_max_size: int = Field(
+        default=64,
+        validation_alias="APP_QUERY_BATCH_MAX_SIZE",
+        description="max questions accepted by POST /query/batch",
+    )
+    query_batch_concurrency: int = Field(
+        default=4,
+        validation_alias="APP_QUERY_BATCH_CONCURRENCY",
+        description="questions of one batch searched concurrently (DB sessions in use)",
+    )
+
     llm_backend: str = Field(
         default="disabled",
         validation_alias="APP_LLM_BACKEND",
@@ -51,6 +178,52 @@ class Settings(BaseSettings):
         default="gpt-4o-mini",
         validation_alias="OPENAI_CHAT_MODEL",
     )
+    answer_cache_enabled: bool = Field(
+        default=False,
+        validation_alias="APP_ANSWER_CACHE_ENABLED",
+        description="reuse LLM answers for near-duplicate questions on the same document",
+    )
+    answer_cache_threshold: float = Field(
+        default=0.95,
+        validation_alias="APP_ANSWER_CACHE_THRESHOLD",
+        description="min cosine similarity between question embeddings for a hit",
+    )
+    answer_cache_max_documents: int = Field(
+        default=1024,
+        validation_alias="APP_ANSWER_CACHE_MAX_DOCUMENTS",
+    )
+    answer_cache_max_entries: int = Field(
+        default=256,
+        validation_alias="APP_ANSWER_CACHE_MAX_ENTRIES",
+        description="cached answers kept per document (oldest dropped first)",
+    )
+    answer_cache_ttl_s: int = Field(
+        default=3600,
+        validation_alias="APP_ANSWER_CACHE_TTL_S",
+    )
+    llm_max_concurrency: int = Field(
+        default=8,
+        validation_alias="APP_LLM_MAX_CONCURRENCY",
+        description="process-wide cap on in-flight LLM calls",
+    )
+    llm_timeout_s: float = Field(
+        default=30.0,
+        validation_alias="APP_LLM_TIMEOUT_S",
+        description="deadline for one LLM call (queueing for a slot excluded)",
+    )
+    llm_max_tokens: int = Field(
+        default=512,
+        validation_alias="APP_LLM_MAX_TOKENS",
+    )
+    llm_temperature: float = Field(
+        default=0.0,
+        validation_alias="APP_LLM_TEMPERATURE",
+    )
+    llm_max_context_chars: int = Field(
+        default=12000,
+        validation_alias="APP_LLM_MAX_CONTEXT_CHARS",
+        description="retrieved context is cut to this size before it goes into the prompt",
+    )
 
     @property
     def database_url_required(self) -> str:
@@ -92,6 +265,103 @@ class Settings(BaseSettings):
         description="none|overlap (rerank retrieved chunks by token overlap)",
     )
 
+    retrieval_mode: str = Field(
+        default="vector",
+        validation_alias="APP_RETRIEVAL_MODE",
+        description="vector|hybrid (hybrid = vector + full-text, fused with RRF)",
+    )
+    rrf_k: int = Field(
+        default=60,
+        validation_alias="APP_RRF_K",
+        description="reciprocal rank fusion constant: 1 / (k + rank)",
+    )
+    lexical_ts_config: str = Field(
+        default="simple",
+        validation_alias="APP_LEXICAL_TS_CONFIG",
+        description="text search config of chunks.text_tsv (fixed at migration time)",
+    )
+
+    retrieval_cache_enabled: bool = Field(
+        default=True,
+        validation_alias="APP_RETRIEVAL_CACHE_ENABLED",
+        description="reuse final sources of identical queries (keyed by document version)",
+    )
+    retrieval_cache_size: int = Field(
+        default=4096,
+        validation_alias="APP_RETRIEVAL_CACHE_SIZE",
+    )
+    retrieval_cache_ttl_s: int = Field(
+        default=300,
+        validation_alias="APP_RETRIEVAL_CACHE_TTL_S",
+    )
+
+    vector_index: str = Field(
+        default="none",
+        validation_alias="APP_VECTOR_INDEX",
+        description=(
+            "none|hnsw|ivfflat (ANN index on chunks.embedding; none => exact scan). The "
+            "index is global: the per-document filter is applied after the index scan, "
+            "see APP_VECTOR_ITERATIVE_SCAN"
+        ),
+    )
+    vector_iterative_scan: str = Field(
+        default="off",
+        validation_alias="APP_VECTOR_ITERATIVE_SCAN",
+        description=(
+            "off|strict_order|relaxed_order (pgvector >= 0.8): keep scanning the ANN index "
+            "until enough rows pass the document filter; ivfflat supports relaxed_order only"
+        ),
+    )
+    hnsw_m: int = Field(
+        default=16,
+        validation_alias="APP_HNSW_M",
+        description="HNSW max connections per layer (index build parameter)",
+    )
+    hnsw_ef_construction: int = Field(
+        default=64,
+        validation_alias="APP_HNSW_EF_CONSTRUCTION",
+        description="HNSW candidate list size at build time",
+    )
+    hnsw_ef_search: int | None = Field(
+        default=None,
+        validation_alias="APP_HNSW_EF_SEARCH",
+        description="default hnsw.ef_search per query (None => server default)",
+    )
+    ivfflat_lists: int = Field(
+        default=100,
+        validation_alias="APP_IVFFLAT_LISTS",
+        description="IVFFlat number of lists (index build parameter)",
+    )
+    ivfflat_probes: int | None = Field(
+        default=None,
+        validation_alias="APP_IVFFLAT_PROBES",
+        description="default ivfflat.probes per query (None => server default)",
+    )
+    vector_storage: str = Field(
+        default="full",
+        validation_alias="APP_VECTOR_STORAGE",
+        description=(
+            "full|halfvec|binary: representation searched by the ANN index; halfvec/binary "
+            "index a quantized expression of chunks.embedding and re-score the candidates "
+            "against the full-precision vectors"
+        ),
+    )
+    vector_rerank_multiplier: int = Field(
+        default=4,
+        ge=1,
+        validation_alias="APP_VECTOR_RERANK_MULTIPLIER",
+        description="quantized storage: first-pass candidates = search limit * multiplier",
+    )
+    vector_metric: str = Field(
+        default="cosine",
+        validation_alias="APP_VECTOR_METRIC",
+        description=(
+            "cosine|ip: ip L2-normalizes embeddings once (ingestion and query) and searches "
+            "with the inner-product operator <#> and *_ip_ops indexes, so the database "
+            "computes no norms per comparison; scores stay on the cosine scale"
+        ),
+    )
+
 
 @lru_cache(maxsize=1)
 def get_settings() -> Settings:
@@ -1,16 +1,62 @@
 from __future__ import annotations
 
+import time
 from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from typing import Any
 
+from pgvector.asyncpg import register_vector
+from sqlalchemy import event
 from sqlalchemy.ext.asyncio import (
     AsyncEngine,
     AsyncSession,
     async_sessionmaker,
     create_async_engine,
 )
+from sqlalchemy.orm import Session, SessionTransaction
 
+from app.core.metrics import DB_POOL_CHECKOUTS, DB_POOL_IN_USE, DB_POOL_WAIT_SECONDS
 from app.core.settings import get_settings
 
+_ACQUIRE_T0 = "pool_wait_t0"
+
+
+class _Session(Session):
+    """Sync session behind our AsyncSessions: a target for the pool-wait listeners only."""
+
+
+def _on_transaction_create(session: Session, transaction: SessionTransaction) -> None:
+    # root transaction (autobegin or session.begin()): no connection is held yet
+    if transaction.parent is None:
+        session.info[_ACQUIRE_T0] = time.perf_counter()
+
+
+def _on_begin(session: Session, _transaction: SessionTransaction, _connection: Any) -> None:
+    # the transaction just got its connection: pool queueing + connect + pre-ping
+    t0 = session.info.pop(_ACQUIRE_T0, None)
+    if t0 is not None:
+        DB_POOL_WAIT_SECONDS.observe(time.perf_counter() - t0)
+
+
+def _on_connect(dbapi_connection: Any, _record: Any) -> None:
+    # binary pgvector codec on every new connection: vectors travel as packed
+    # float32 instead of text (pairs with app.db.types.NumpyVector)
+    dbapi_connection.run_async(register_vector)
+
+
+def _on_checkout(*_: Any) -> None:
+    DB_POOL_CHECKOUTS.inc()
+    DB_POOL_IN_USE.inc()
+
+
+def _on_checkin(*_: Any) -> None:
+    DB_POOL_IN_USE.dec()
+
+
+event.listen(_Session, "after_transaction_create", _on_transaction_create)
+event.listen(_Session, "after_begin", _on_begin)
+
+
 _engine: AsyncEngine | None = None
 _sessionmaker: async_sessionmaker[AsyncSession] | None = None
 
@@ -23,7 +69,10 @@ def init_engine() -> None:
         settings.database_url_required,
         pool_pre_ping=True,
     )
-    _sessionmaker = async_sessionmaker(_engine, expire_on_commit=False)
+    event.listen(_engine.sync_engine, "connect", _on_connect)
+    event.listen(_engine.sync_engine.pool, "checkout", _on_checkout)
+    event.listen(_engine.sync_engine.pool, "checkin", _on_checkin)
+    _sessionmaker = async_sessionmaker(_engine, expire_on_commit=False, sync_session_class=_Session)
 
 
 async def close_engine() -> None:
@@ -39,3 +88,12 @@ async def get_session() -> AsyncIterator[AsyncSession]:
         raise RuntimeError("DB engine is not initialized. Call init_engine() on startup.")
     async with _sessionmaker() as session:
         yield session
+
+
+@asynccontextmanager
+async def session_scope() -> AsyncIterator[AsyncSession]:
+    """Standalone session, for work that runs next to the request's own session."""
+    if _sessionmaker is None:
+        raise RuntimeError("DB engine is not initialized. Call init_engine() on startup.")
+    async with _sessionmaker() as session:
+        yield session
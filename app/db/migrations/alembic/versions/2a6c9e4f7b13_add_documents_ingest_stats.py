@@ -0,0 +1,32 @@
+"""add documents.ingest_stats
+
+Revision ID: 2a6c9e4f7b13
+Revises: 8f3b2d1e9a47
+Create Date: 2026-10-18 14:03:27.552190
+
+"""
+
+from __future__ import annotations
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = "2a6c9e4f7b13"
+down_revision: str | Sequence[str] | None = "8f3b2d1e9a47"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "documents",
+        sa.Column("ingest_stats", postgresql.JSONB(astext_type=sa.Text()), nullable=True),
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("documents", "ingest_stats")
@@ -0,0 +1,28 @@
+"""add documents.last_chunk_index (ingestion checkpoint)
+
+Revision ID: 5d0e8b3a6c21
+Revises: 2a6c9e4f7b13
+Create Date: 2026-10-18 15:40:09.871342
+
+"""
+
+from __future__ import annotations
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "5d0e8b3a6c21"
+down_revision: str | Sequence[str] | None = "2a6c9e4f7b13"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    op.add_column("documents", sa.Column("last_chunk_index", sa.Integer(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column("documents", "last_chunk_index")
@@ -0,0 +1,36 @@
+"""add chunks.text_tsv (generated tsvector + GIN) for hybrid search
+
+Revision ID: 7c4e1f0a9d58
+Revises: 5d0e8b3a6c21
+Create Date: 2026-10-18 17:22:51.064117
+
+"""
+
+from __future__ import annotations
+
+from collections.abc import Sequence
+
+from alembic import op
+
+from app.core.settings import get_settings
+
+# revision identifiers, used by Alembic.
+revision: str = "7c4e1f0a9d58"
+down_revision: str | Sequence[str] | None = "5d0e8b3a6c21"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    # STORED generated column: existing rows are backfilled by the ALTER itself.
+    ts_config = get_settings().lexical_ts_config
+    op.execute(
+        "ALTER TABLE chunks ADD COLUMN text_tsv tsvector "
+        f"GENERATED ALWAYS AS (to_tsvector('{ts_config}'::regconfig, text)) STORED;"
+    )
+    op.create_index("ix_chunks_text_tsv", "chunks", ["text_tsv"], postgresql_using="gin")
+
+
+def downgrade() -> None:
+    op.drop_index("ix_chunks_text_tsv", table_name="chunks")
+    op.drop_column("chunks", "text_tsv")
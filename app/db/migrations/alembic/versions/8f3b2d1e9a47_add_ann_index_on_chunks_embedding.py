@@ -0,0 +1,51 @@
+"""add ANN index on chunks.embedding
+
+Revision ID: 8f3b2d1e9a47
+Revises: c5e1c3a7c50c
+Create Date: 2026-10-18 10:12:41.318204
+
+"""
+
+from __future__ import annotations
+
+from collections.abc import Sequence
+
+from alembic import op
+
+from app.core.settings import get_settings
+
+# revision identifiers, used by Alembic.
+revision: str = "8f3b2d1e9a47"
+down_revision: str | Sequence[str] | None = "c5e1c3a7c50c"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    # Index kind and build parameters come from settings (APP_VECTOR_INDEX, APP_HNSW_*, APP_IVFFLAT_*).
+    # NOTE: IVFFlat picks its centroids from existing rows, build it after data is loaded.
+    s = get_settings()
+
+    if s.vector_index == "hnsw":
+        op.create_index(
+            "ix_chunks_embedding_hnsw",
+            "chunks",
+            ["embedding"],
+            postgresql_using="hnsw",
+            postgresql_with={"m": s.hnsw_m, "ef_construction": s.hnsw_ef_construction},
+            postgresql_ops={"embedding": "vector_cosine_ops"},
+        )
+    elif s.vector_index == "ivfflat":
+        op.create_index(
+            "ix_chunks_embedding_ivfflat",
+            "chunks",
+            ["embedding"],
+            postgresql_using="ivfflat",
+            postgresql_with={"lists": s.ivfflat_lists},
+            postgresql_ops={"embedding": "vector_cosine_ops"},
+        )
+
+
+def downgrade() -> None:
+    op.execute("DROP INDEX IF EXISTS ix_chunks_embedding_ivfflat;")
+    op.execute("DROP INDEX IF EXISTS ix_chunks_embedding_hnsw;")
@@ -0,0 +1,91 @@
+"""resize chunks.embedding to APP_EMBEDDINGS_DIM
+
+Revision ID: a3d9f6b2c718
+Revises: e4a7c2d9b815
+Create Date: 2026-10-18 23:02:51.774310
+
+"""
+
+from __future__ import annotations
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+from alembic import op
+
+from app.core.settings import Settings, get_settings
+
+# revision identifiers, used by Alembic.
+revision: str = "a3d9f6b2c718"
+down_revision: str | Sequence[str] | None = "e4a7c2d9b815"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+_ANN_INDEXES = (
+    "ix_chunks_embedding_hnsw",
+    "ix_chunks_embedding_ivfflat",
+    "ix_chunks_embedding_halfvec_hnsw",
+    "ix_chunks_embedding_halfvec_ivfflat",
+    "ix_chunks_embedding_bit_hnsw",
+    "ix_chunks_embedding_bit_ivfflat",
+)
+
+
+def _ann_index_sql(s: Settings) -> str | None:
+    """The ANN index 8f3b2d1e9a47 / e4a7c2d9b815 would build for the current settings."""
+    if s.vector_index not in ("hnsw", "ivfflat"):
+        return None
+    dim = s.embeddings_dim
+    if s.vector_storage == "halfvec":
+        name, element = "halfvec_", f"CAST(embedding AS halfvec({dim})) halfvec_cosine_ops"
+    elif s.vector_storage == "binary":
+        name, element = "bit_", f"CAST(binary_quantize(embedding) AS bit({dim})) bit_hamming_ops"
+    else:
+        name, element = "", "embedding vector_cosine_ops"
+    build = (
+        f"m = {int(s.hnsw_m)}, ef_construction = {int(s.hnsw_ef_construction)}"
+        if s.vector_index == "hnsw"
+        else f"lists = {int(s.ivfflat_lists)}"
+    )
+    return (
+        f"CREATE INDEX ix_chunks_embedding_{name}{s.vector_index} "
+        f"ON chunks USING {s.vector_index} ({element}) WITH ({build});"
+    )
+
+
+def upgrade() -> None:
+    # The initial migration creates vector(1536); this revision brings the column to
+    # APP_EMBEDDINGS_DIM. Vectors cannot be converted between sizes: a resize is only
+    # done on a table without embeddings (new deployment, or after deleting the
+    # documents), and the documents are re-ingested with the new model/dimension
+    # afterwards.
+    s = get_settings()
+    bind = op.get_bind()
+    current = bind.execute(
+        sa.text(
+            "SELECT atttypmod FROM pg_attribute "
+            "WHERE attrelid = 'chunks'::regclass AND attname = 'embedding'"
+        )
+    ).scalar_one()
+    if current == s.embeddings_dim:
+        return
+
+    if bind.execute(
+        sa.text("SELECT EXISTS (SELECT 1 FROM chunks WHERE embedding IS NOT NULL)")
+    ).scalar():
+        raise RuntimeError(
+            f"chunks.embedding holds vector({current}) values but APP_EMBEDDINGS_DIM="
+            f"{s.embeddings_dim}: delete the documents (or keep APP_EMBEDDINGS_DIM={current}), "
+            "migrate, then re-ingest"
+        )
+
+    for name in _ANN_INDEXES:
+        op.execute(f"DROP INDEX IF EXISTS {name};")
+    op.execute(f"ALTER TABLE chunks ALTER COLUMN embedding TYPE vector({s.embeddings_dim});")
+    if (index_sql := _ann_index_sql(s)) is not None:
+        op.execute(index_sql)
+
+
+def downgrade() -> None:
+    # the size follows settings: set APP_EMBEDDINGS_DIM back and upgrade again
+    pass
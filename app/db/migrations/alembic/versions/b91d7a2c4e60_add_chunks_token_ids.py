@@ -0,0 +1,32 @@
+"""add chunks.token_ids (pre-tokenized overlap rerank)
+
+Revision ID: b91d7a2c4e60
+Revises: 7c4e1f0a9d58
+Create Date: 2026-10-18 19:05:33.480921
+
+"""
+
+from __future__ import annotations
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = "b91d7a2c4e60"
+down_revision: str | Sequence[str] | None = "7c4e1f0a9d58"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    # NOTE: no backfill; rows without token_ids are tokenized from text at rerank time.
+    op.add_column(
+        "chunks", sa.Column("token_ids", postgresql.ARRAY(sa.BigInteger()), nullable=True)
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("chunks", "token_ids")
@@ -0,0 +1,83 @@
+"""add quantized (halfvec / binary) ANN index on chunks.embedding
+
+Revision ID: e4a7c2d9b815
+Revises: b91d7a2c4e60
+Create Date: 2026-10-18 21:47:09.562113
+
+"""
+
+from __future__ import annotations
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+from alembic import op
+
+from app.core.settings import Settings, get_settings
+
+# revision identifiers, used by Alembic.
+revision: str = "e4a7c2d9b815"
+down_revision: str | Sequence[str] | None = "b91d7a2c4e60"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+# APP_VECTOR_STORAGE -> (index name kind, indexed expression, operator class);
+# the expressions must match app.db.types.quantized exactly or the planner ignores the index
+_QUANTIZED = {
+    "halfvec": ("halfvec", "CAST(embedding AS halfvec({dim}))", "halfvec_cosine_ops"),
+    "binary": ("bit", "CAST(binary_quantize(embedding) AS bit({dim}))", "bit_hamming_ops"),
+}
+
+
+def _with(s: Settings) -> str:
+    if s.vector_index == "hnsw":
+        return f"m = {int(s.hnsw_m)}, ef_construction = {int(s.hnsw_ef_construction)}"
+    return f"lists = {int(s.ivfflat_lists)}"
+
+
+def upgrade() -> None:
+    # Storage mode comes from settings (APP_VECTOR_STORAGE), index kind and build
+    # parameters from APP_VECTOR_INDEX / APP_HNSW_* / APP_IVFFLAT_*, as in 8f3b2d1e9a47.
+    # Existing rows need no backfill: the index is built over an expression of the
+    # full-precision column, which stays the source of truth for re-scoring.
+    # To switch modes later, downgrade to b91d7a2c4e60 and upgrade with the new setting.
+    s = get_settings()
+    if s.vector_storage not in _QUANTIZED or s.vector_index not in ("hnsw", "ivfflat"):
+        return
+
+    kind, expr, ops = _QUANTIZED[s.vector_storage]
+    # the column's size at this revision (a3d9f6b2c718 resizes it to APP_EMBEDDINGS_DIM
+    # later and rebuilds this index)
+    dim = (
+        op.get_bind()
+        .execute(
+            sa.text(
+                "SELECT atttypmod FROM pg_attribute "
+                "WHERE attrelid = 'chunks'::regclass AND attname = 'embedding'"
+            )
+        )
+        .scalar_one()
+    )
+    op.execute(
+        f"CREATE INDEX IF NOT EXISTS ix_chunks_embedding_{kind}_{s.vector_index} "
+        f"ON chunks USING {s.vector_index} ({expr.format(dim=int(dim))} {ops}) "
+        f"WITH ({_with(s)});"
+    )
+    # the full-precision graph is what stopped fitting in RAM: first-pass search
+    # no longer uses it
+    op.execute("DROP INDEX IF EXISTS ix_chunks_embedding_hnsw;")
+    op.execute("DROP INDEX IF EXISTS ix_chunks_embedding_ivfflat;")
+
+
+def downgrade() -> None:
+    for kind, _, _ in _QUANTIZED.values():
+        for index in ("hnsw", "ivfflat"):
+            op.execute(f"DROP INDEX IF EXISTS ix_chunks_embedding_{kind}_{index};")
+
+    # restore the full-precision index of 8f3b2d1e9a47
+    s = get_settings()
+    if s.vector_index in ("hnsw", "ivfflat"):
+        op.execute(
+            f"CREATE INDEX IF NOT EXISTS ix_chunks_embedding_{s.vector_index} "
+            f"ON chunks USING {s.vector_index} (embedding vector_cosine_ops) WITH ({_with(s)});"
+        )
@@ -0,0 +1,93 @@
+"""inner-product ANN index on L2-normalized chunks.embedding
+
+Revision ID: f1c8e5a2b934
+Revises: a3d9f6b2c718
+Create Date: 2026-10-18 23:41:17.208465
+
+"""
+
+from __future__ import annotations
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+from alembic import op
+
+from app.core.settings import Settings, get_settings
+
+# revision identifiers, used by Alembic.
+revision: str = "f1c8e5a2b934"
+down_revision: str | Sequence[str] | None = "a3d9f6b2c718"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+_ANN_INDEXES = (
+    "ix_chunks_embedding_hnsw",
+    "ix_chunks_embedding_ivfflat",
+    "ix_chunks_embedding_halfvec_hnsw",
+    "ix_chunks_embedding_halfvec_ivfflat",
+    "ix_chunks_embedding_bit_hnsw",
+    "ix_chunks_embedding_bit_ivfflat",
+)
+
+
+def _ann_index_sql(s: Settings, metric: str) -> str | None:
+    """The ANN index for the current storage / index settings, with `metric` operator classes."""
+    if s.vector_index not in ("hnsw", "ivfflat"):
+        return None
+    dim = s.embeddings_dim
+    if s.vector_storage == "halfvec":
+        name, element = "halfvec_", f"CAST(embedding AS halfvec({dim})) halfvec_{metric}_ops"
+    elif s.vector_storage == "binary":
+        # sign bits: hamming distance whatever the metric, re-scoring uses the metric
+        name, element = "bit_", f"CAST(binary_quantize(embedding) AS bit({dim})) bit_hamming_ops"
+    else:
+        name, element = "", f"embedding vector_{metric}_ops"
+    build = (
+        f"m = {int(s.hnsw_m)}, ef_construction = {int(s.hnsw_ef_construction)}"
+        if s.vector_index == "hnsw"
+        else f"lists = {int(s.ivfflat_lists)}"
+    )
+    return (
+        f"CREATE INDEX ix_chunks_embedding_{name}{s.vector_index} "
+        f"ON chunks USING {s.vector_index} ({element}) WITH ({build});"
+    )
+
+
+def _rebuild_ann_index(s: Settings, metric: str) -> None:
+    for name in _ANN_INDEXES:
+        op.execute(f"DROP INDEX IF EXISTS {name};")
+    if (index_sql := _ann_index_sql(s, metric)) is not None:
+        op.execute(index_sql)
+
+
+def upgrade() -> None:
+    # APP_VECTOR_METRIC=ip: the application L2-normalizes vectors before writing and
+    # querying them; rows ingested earlier are normalized here (cosine ranking is
+    # scale-invariant, so nothing changes for them) and the index is rebuilt with
+    # *_ip_ops. To switch metrics later, downgrade to a3d9f6b2c718 before changing
+    # the setting, then upgrade with the new one.
+    s = get_settings()
+    if s.vector_metric != "ip":
+        return
+    op.execute("UPDATE chunks SET embedding = l2_normalize(embedding) WHERE embedding IS NOT NULL;")
+    _rebuild_ann_index(s, "ip")
+
+
+def downgrade() -> None:
+    # vectors stay unit-length: cosine distance does not depend on their norm. The
+    # index is checked rather than the setting, which may already have been changed.
+    ip_indexes = (
+        op.get_bind()
+        .execute(
+            sa.text(
+                "SELECT count(*) FROM pg_index i "
+                "JOIN pg_class c ON c.oid = i.indexrelid "
+                "JOIN pg_opclass o ON o.oid = ANY(i.indclass) "
+                "WHERE c.relname LIKE 'ix_chunks_embedding%' AND o.opcname LIKE '%\\_ip\\_ops'"
+            )
+        )
+        .scalar_one()
+    )
+    if ip_indexes:
+        _rebuild_ann_index(get_settings(), "cosine")
@@ -2,13 +2,18 @@ from __future__ import annotations
 
 import uuid
 from datetime import datetime
+from typing import Any
 
-from pgvector.sqlalchemy import Vector
-from sqlalchemy import DateTime, ForeignKey, Index, String, Text, func
-from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy import BigInteger, Computed, DateTime, ForeignKey, Index, String, Text, func
+from sqlalchemy.dialects.postgresql import ARRAY, JSONB, TSVECTOR, UUID
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
+from app.core.settings import get_settings
 from app.db.base import Base
+from app.db.types import ANN_OPS, QUANTIZED_STORAGE, EmbeddingArray, NumpyVector, quantized
+
+# chunks.embedding size; the migrations create the column and ANN index with the same setting
+EMBEDDING_DIM = get_settings().embeddings_dim
 
 
 class Document(Base):
@@ -20,6 +25,10 @@ class Document(Base):
 
     status: Mapped[str] = mapped_column(String(32), nullable=False, default="uploaded")
     error: Mapped[str | None] = mapped_column(Text, nullable=True)
+    # ingestion checkpoint: chunks [0..last_chunk_index] are committed
+    last_chunk_index: Mapped[int | None] = mapped_column(nullable=True)
+    # per-stage throughput / queue-depth stats of the last ingestion run
+    ingest_stats: Mapped[dict[str, Any] | None] = mapped_column(JSONB, nullable=True)
 
     created_at: Mapped[datetime] = mapped_column(
         DateTime(timezone=True), server_default=func.now(), nullable=False
@@ -43,7 +52,21 @@ class Chunk(Base):
 
     text: Mapped[str] = mapped_column(Text, nullable=False)
 
-    embedding: Mapped[list[float] | None] = mapped_column(Vector(1536), nullable=True)
+    embedding: Mapped[EmbeddingArray | None] = mapped_column(
+        NumpyVector(EMBEDDING_DIM), nullable=True
+    )
+
+    # sorted unique hashed token ids for the overlap reranker (app.rag.reranking.token_ids)
+    token_ids: Mapped[list[int] | None] = mapped_column(ARRAY(BigInteger), nullable=True)
+
+    # lexical leg of hybrid retrieval; generated by Postgres, never written by the app
+    text_tsv: Mapped[str | None] = mapped_column(
+        TSVECTOR,
+        Computed(
+            f"to_tsvector('{get_settings().lexical_ts_config}'::regconfig, text)", persisted=True
+        ),
+        nullable=True,
+    )
 
     created_at: Mapped[datetime] = mapped_column(
         DateTime(timezone=True), server_default=func.now(), nullable=False
@@ -54,3 +77,57 @@ class Chunk(Base):
 
 Index("ix_chunks_document_id_chunk_index", Chunk.document_id, Chunk.chunk_index, unique=True)
 Index("ix_chunks_document_id", Chunk.document_id)
+Index("ix_chunks_text_tsv", Chunk.text_tsv, postgresql_using="gin")
+
+
+def _embedding_ann_index() -> Index | None:
+    """ANN index on chunks.embedding, shaped by settings (see APP_VECTOR_INDEX)."""
+    s = get_settings()
+    if s.vector_storage in QUANTIZED_STORAGE:
+        return _quantized_ann_index()
+    ops, _ = ANN_OPS[("full", s.vector_metric)]
+    if s.vector_index == "hnsw":
+        return Index(
+            "ix_chunks_embedding_hnsw",
+            Chunk.embedding,
+            postgresql_using="hnsw",
+            postgresql_with={"m": s.hnsw_m, "ef_construction": s.hnsw_ef_construction},
+            postgresql_ops={"embedding": ops},
+        )
+    if s.vector_index == "ivfflat":
+        return Index(
+            "ix_chunks_embedding_ivfflat",
+            Chunk.embedding,
+            postgresql_using="ivfflat",
+            postgresql_with={"lists": s.ivfflat_lists},
+            postgresql_ops={"embedding": ops},
+        )
+    return None
+
+
+def _quantized_ann_index() -> Index | None:
+    """
+    ANN index over a quantized expression of chunks.embedding (see APP_VECTOR_STORAGE).
+    Replaces the full-precision index; full vectors stay in the heap for re-scoring.
+    """
+    s = get_settings()
+    if s.vector_index not in ("hnsw", "ivfflat"):
+        return None
+    ops, _ = ANN_OPS[(s.vector_storage, s.vector_metric)]
+    kind = "halfvec" if s.vector_storage == "halfvec" else "bit"
+    expr = quantized(Chunk.embedding, storage=s.vector_storage, dim=EMBEDDING_DIM)
+    build = (
+        {"m": s.hnsw_m, "ef_construction": s.hnsw_ef_construction}
+        if s.vector_index == "hnsw"
+        else {"lists": s.ivfflat_lists}
+    )
+    return Index(
+        f"ix_chunks_embedding_{kind}_{s.vector_index}",
+        expr.label("embedding_q"),
+        postgresql_using=s.vector_index,
+        postgresql_with=build,
+        postgresql_ops={"embedding_q": ops},
+    )
+
+
+_embedding_ann_index()
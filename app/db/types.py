@@ -0,0 +1,115 @@
+from __future__ import annotations
+
+from typing import Any, cast
+
+import numpy as np
+import numpy.typing as npt
+from pgvector import Vector
+from pgvector.sqlalchemy import BIT, HALFVEC, VECTOR
+from sqlalchemy import ColumnExpressionArgument, Float, func
+from sqlalchemy import cast as sa_cast
+from sqlalchemy.engine import Dialect
+from sqlalchemy.sql.elements import ColumnElement
+from sqlalchemy.sql.operators import ColumnOperators
+
+# One embedding: 1-D, C-contiguous float32 (pgvector's own element type)
+EmbeddingArray = npt.NDArray[np.float32]
+
+# APP_VECTOR_METRIC values
+VECTOR_METRICS = ("cosine", "ip")
+
+# APP_VECTOR_STORAGE modes that search a quantized expression index
+QUANTIZED_STORAGE = ("halfvec", "binary")
+
+# (APP_VECTOR_STORAGE, APP_VECTOR_METRIC) -> operator class of the ANN index and the
+# distance operator that searches it. "ip" is pgvector's negative inner product, which
+# ranks unit vectors like cosine distance without computing their norms; binary codes
+# are compared by hamming distance under either metric.
+ANN_OPS: dict[tuple[str, str], tuple[str, str]] = {
+    ("full", "cosine"): ("vector_cosine_ops", "<=>"),
+    ("full", "ip"): ("vector_ip_ops", "<#>"),
+    ("halfvec", "cosine"): ("halfvec_cosine_ops", "<=>"),
+    ("halfvec", "ip"): ("halfvec_ip_ops", "<#>"),
+    ("binary", "cosine"): ("bit_hamming_ops", "<~>"),
+    ("binary", "ip"): ("bit_hamming_ops", "<~>"),
+}
+
+
+def as_embedding(value: Any) -> EmbeddingArray:
+    """View (or convert) any vector-like as a float32 1-D array, no copy when already one."""
+    arr: EmbeddingArray = np.ascontiguousarray(value, dtype=np.float32)
+    return arr
+
+
+class NumpyVector(VECTOR):
+    """
+    pgvector column that reads and writes float32 numpy arrays.
+
+    On asyncpg the value goes to the binary codec registered on each connection
+    (see app.db.engine) as is: 4 bytes per dimension on the wire, no '[0.1,...]'
+    text formatting or float parsing in Python. Other drivers (alembic runs on
+    psycopg) keep pgvector's text path.
+    """
+
+    cache_ok = True
+
+    def bind_processor(self, dialect: Dialect) -> Any:
+        if dialect.driver == "asyncpg":
+            return None
+        return super().bind_processor(dialect)
+
+    def result_processor(self, dialect: Dialect, coltype: Any) -> Any:
+        if dialect.driver == "asyncpg":
+
+            def process(value: Vector | None) -> EmbeddingArray | None:
+                return None if value is None else value.to_numpy()
+
+            return process
+
+        text_process = super().result_processor(dialect, coltype)
+
+        def process_text(value: Any) -> EmbeddingArray | None:
+            value = text_process(value)
+            return None if value is None else as_embedding(value)
+
+        return process_text
+
+    def compare_values(self, x: Any, y: Any) -> bool:
+        # ORM change detection: `==` on arrays is elementwise
+        if x is None or y is None:
+            return x is y
+        return bool(np.array_equal(x, y))
+
+
+def quantized(expr: ColumnExpressionArgument[Any], *, storage: str, dim: int) -> ColumnElement[Any]:
+    """
+    Quantized form of a vector expression: halfvec (2 bytes per dim) or binary
+    (1 bit per dim, sign only). Used for both the index and the query side, since
+    Postgres only uses an expression index when the query repeats the expression.
+    """
+    if storage == "halfvec":
+        return sa_cast(expr, HALFVEC(dim))
+    if storage == "binary":
+        return sa_cast(func.binary_quantize(expr), BIT(dim))
+    raise ValueError(f"Unsupported quantized vector storage: {storage!r}")
+
+
+def vector_distance(column: ColumnOperators, query: Any, *, metric: str) -> ColumnElement[float]:
+    """Full-precision distance under APP_VECTOR_METRIC: smaller is closer for both."""
+    _, operator = ANN_OPS[("full", metric)]
+    return cast(ColumnElement[float], column.op(operator, return_type=Float)(query))
+
+
+def quantized_distance(
+    column: ColumnExpressionArgument[Any],
+    query: ColumnExpressionArgument[Any],
+    *,
+    storage: str,
+    dim: int,
+    metric: str = "cosine",
+) -> ColumnElement[float]:
+    """First-pass distance between a stored and a query vector in `storage` form."""
+    _, operator = ANN_OPS[(storage, metric)]
+    left = quantized(column, storage=storage, dim=dim)
+    right = quantized(query, storage=storage, dim=dim)
+    return left.op(operator, return_type=Float)(right)
@@ -0,0 +1,69 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+
+import httpx
+from openai import AsyncOpenAI
+
+from app.core.settings import get_settings
+
+
+@dataclass(frozen=True)
+class ClientRegistry:
+    """
+    Application-scoped outbound clients.
+    One keep-alive HTTP pool shared by the embeddings and LLM backends.
+    """
+
+    http: httpx.AsyncClient
+    openai: AsyncOpenAI | None
+
+
+_registry: ClientRegistry | None = None
+
+
+def init_clients() -> ClientRegistry:
+    global _registry
+
+    s = get_settings()
+    http = httpx.AsyncClient(
+        limits=httpx.Limits(
+            max_connections=s.http_max_connections,
+            max_keepalive_connections=s.http_max_keepalive_connections,
+            keepalive_expiry=s.http_keepalive_expiry_s,
+        ),
+        timeout=httpx.Timeout(s.http_timeout_s, connect=s.http_connect_timeout_s),
+    )
+
+    openai: AsyncOpenAI | None = None
+    if s.openai_api_key:
+        openai = AsyncOpenAI(
+            api_key=s.openai_api_key,
+            base_url=s.openai_base_url,
+            max_retries=s.openai_max_retries,
+            http_client=http,
+        )
+
+    _registry = ClientRegistry(http=http, openai=openai)
+    return _registry
+
+
+async def close_clients() -> None:
+    global _registry
+    if _registry is not None:
+        # AsyncOpenAI does not own a client passed via http_client, close the pool directly
+        await _registry.http.aclose()
+    _registry = None
+
+
+def get_clients() -> ClientRegistry:
+    if _registry is None:
+        raise RuntimeError("Clients are not initialized. Call init_clients() on startup.")
+    return _registry
+
+
+def get_openai_client() -> AsyncOpenAI:
+    client = get_clients().openai
+    if client is None:
+        raise RuntimeError("OPENAI_API_KEY is not set")
+    return client
@@ -8,6 +8,7 @@ from redis.asyncio import Redis
 from app.core.settings import get_settings
 
 _redis: Redis | None = None  # type: ignore
+_redis_bytes: Redis | None = None  # type: ignore
 
 
 def get_redis() -> Redis:  # type: ignore
@@ -29,10 +30,27 @@ def get_redis() -> Redis:  # type: ignore
     return _redis
 
 
+def get_redis_bytes() -> Redis:  # type: ignore
+    """
+    Same as get_redis(), but without response decoding.
+    Use it for binary payloads (e.g. packed vectors).
+    """
+    global _redis_bytes
+    if _redis_bytes is None:
+        s = get_settings()
+        _redis_bytes = cast(  # type: ignore
+            Redis,  # type: ignore
+            redis.from_url(s.redis_url, decode_responses=False),
+        )
+    return _redis_bytes
+
+
 async def close_redis() -> None:
-    """Gracefully close Redis client on shutdown."""
-    global _redis
-    if _redis is None:
-        return
-    await _redis.close()
-    _redis = None
+    """Gracefully close Redis clients on shutdown."""
+    global _redis, _redis_bytes
+    if _redis is not None:
+        await _redis.close()
+        _redis = None
+    if _redis_bytes is not None:
+        await _redis_bytes.close()
+        _redis_bytes = None
@@ -1,8 +1,10 @@
 from __future__ import annotations
 
 import os
+import shutil
 import uuid
 from pathlib import Path
+from typing import BinaryIO
 
 
 class LocalStorage:
@@ -15,3 +17,18 @@ class LocalStorage:
         path = self.base_dir / f"{document_id}_{safe_name}"
         path.write_bytes(data)
         return path
+
+    def save_fileobj(
+        self,
+        *,
+        document_id: uuid.UUID,
+        filename: str,
+        src: BinaryIO,
+        buffer_size: int = 1024 * 1024,
+    ) -> Path:
+        """Copy a file-like object to storage in fixed-size blocks (bounded memory)."""
+        safe_name = os.path.basename(filename)
+        path = self.base_dir / f"{document_id}_{safe_name}"
+        with path.open("wb") as dst:
+            shutil.copyfileobj(src, dst, length=buffer_size)
+        return path
@@ -1,5 +1,7 @@
 from __future__ import annotations
 
+import logging
+import os
 from collections.abc import AsyncIterator
 from contextlib import asynccontextmanager
 
@@ -7,7 +9,10 @@ from arq import create_pool
 from arq.connections import RedisSettings
 from fastapi import FastAPI
 from fastapi.exceptions import RequestValidationError
+from prometheus_client import multiprocess
+from sqlalchemy.exc import SQLAlchemyError
 
+from app.api.metrics import router as metrics_router
 from app.api.v1.router import router as v1_router
 from app.core.exceptions import (
     unhandled_exception_handler,
@@ -15,20 +20,45 @@ from app.core.exceptions import (
 )
 from app.core.middleware import RequestIdLoggingMiddleware
 from app.core.settings import get_settings
-from app.db.engine import close_engine, init_engine
+from app.db.engine import close_engine, init_engine, session_scope
+from app.infra.clients import close_clients, init_clients
+from app.infra.redis import close_redis
+from app.rag.answering.service import verify_vector_metric
+
+logger = logging.getLogger(__name__)
+
+
+async def _check_vector_metric() -> None:
+    """Fail startup on an APP_VECTOR_METRIC mismatch, not on an unreachable database."""
+    try:
+        async with session_scope() as session:
+            await verify_vector_metric(session)
+    except (OSError, SQLAlchemyError) as e:
+        logger.warning("Skipping the APP_VECTOR_METRIC check, database unavailable: %s", e)
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI) -> AsyncIterator[None]:
     settings = get_settings()
     init_engine()
+    try:
+        await _check_vector_metric()
+    except BaseException:
+        await close_engine()
+        raise
+    init_clients()
 
     app.state.redis = await create_pool(RedisSettings.from_dsn(settings.redis_url))
     try:
         yield
     finally:
         await app.state.redis.close()
+        await close_redis()
+        await close_clients()
         await close_engine()
+        if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+            # live* gauges of this worker must stop counting
+            multiprocess.mark_process_dead(os.getpid())  # type: ignore[no-untyped-call]
 
 
 def create_app() -> FastAPI:
@@ -41,7 +71,7 @@ def create_app() -> FastAPI:
     app.add_middleware(RequestIdLoggingMiddleware)
 
     app.include_router(v1_router, prefix=settings.api_v1_prefix)
-    app.add_middleware(RequestIdLoggingMiddleware)
+    app.include_router(metrics_router)
     app.add_exception_handler(RequestValidationError, validation_exception_handler)
     app.add_exception_handler(Exception, unhandled_exception_handler)
     return app
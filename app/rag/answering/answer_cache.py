@@ -0,0 +1,176 @@
+from __future__ import annotations
+
+import time
+import uuid
+from collections.abc import Callable
+from dataclasses import asdict, dataclass, field
+from typing import TYPE_CHECKING
+
+import numpy as np
+
+from app.core.cache import TTLCache
+from app.core.metrics import CACHE_LOOKUPS
+from app.core.settings import get_settings
+
+if TYPE_CHECKING:
+    from app.api.v1.schemas.query import SourceChunk
+    from app.db.types import EmbeddingArray
+
+
+@dataclass(frozen=True)
+class CachedAnswer:
+    question: str
+    answer: str
+    sources: list[SourceChunk]
+
+
+@dataclass(slots=True)
+class AnswerCacheStats:
+    hits: int = 0
+    misses: int = 0
+    stale_evictions: int = 0
+
+    def as_dict(self) -> dict[str, int]:
+        return asdict(self)
+
+
+@dataclass(slots=True)
+class _Bucket:
+    """Cached answers of one (document, top_k) at one document version."""
+
+    version: int
+    dim: int
+    # (n, dim) float32, rows L2-normalized: similarity of all entries is one matmul
+    matrix: np.ndarray
+    expires_at: np.ndarray
+    entries: list[CachedAnswer] = field(default_factory=list)
+
+
+def _normalized(vector: EmbeddingArray) -> np.ndarray | None:
+    v = np.asarray(vector, dtype=np.float32)
+    norm = float(np.linalg.norm(v))
+    return v / norm if norm > 0.0 else None
+
+
+class SemanticAnswerCache:
+    """
+    Per-document cache of final answers, matched by question embedding:
+    a lookup hits when the cosine similarity to a cached question is >= `threshold`,
+    so paraphrases ("what is this doc about" / "summarize this document") share an answer.
+    Buckets carry the document version they were filled at; a lookup or store with
+    another version drops the bucket (document re-ingested).
+    Not thread-safe: meant to be used from a single event loop.
+    """
+
+    def __init__(
+        self,
+        *,
+        threshold: float,
+        max_documents: int,
+        max_entries: int,
+        ttl_s: float,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self._threshold = float(threshold)
+        self._max_entries = max(1, int(max_entries))
+        self._ttl_s = float(ttl_s)
+        self._clock = clock
+        self._buckets: TTLCache[tuple[uuid.UUID, int], _Bucket] = TTLCache(
+            maxsize=max_documents, ttl_s=ttl_s, clock=clock
+        )
+        self.stats = AnswerCacheStats()
+
+    def _bucket(self, key: tuple[uuid.UUID, int], version: int) -> _Bucket | None:
+        bucket = self._buckets.get(key)
+        if bucket is not None and bucket.version != version:
+            self._buckets.pop(key)
+            self.stats.stale_evictions += 1
+            return None
+        return bucket
+
+    def lookup(
+        self,
+        *,
+        document_id: uuid.UUID,
+        top_k: int,
+        version: int,
+        vector: EmbeddingArray,
+    ) -> tuple[CachedAnswer, float] | None:
+        """Best cached answer and its similarity, or None below the threshold."""
+        bucket = self._bucket((document_id, top_k), version)
+        q = _normalized(vector)
+        if bucket is None or q is None or q.shape[0] != bucket.dim:
+            self.stats.misses += 1
+            CACHE_LOOKUPS.labels(cache="answer", result="miss").inc()
+            return None
+
+        sims = bucket.matrix @ q
+        sims[bucket.expires_at <= self._clock()] = -1.0
+        best = int(np.argmax(sims))
+        similarity = float(sims[best])
+        if similarity < self._threshold:
+            self.stats.misses += 1
+            CACHE_LOOKUPS.labels(cache="answer", result="miss").inc()
+            return None
+
+        self.stats.hits += 1
+        CACHE_LOOKUPS.labels(cache="answer", result="hit").inc()
+        return bucket.entries[best], similarity
+
+    def store(
+        self,
+        *,
+        document_id: uuid.UUID,
+        top_k: int,
+        version: int,
+        vector: EmbeddingArray,
+        entry: CachedAnswer,
+    ) -> None:
+        q = _normalized(vector)
+        if q is None:
+            return
+
+        key = (document_id, top_k)
+        bucket = self._bucket(key, version)
+        if bucket is None or bucket.dim != q.shape[0]:
+            bucket = _Bucket(
+                version=version,
+                dim=q.shape[0],
+                matrix=np.empty((0, q.shape[0]), dtype=np.float32),
+                expires_at=np.empty(0, dtype=np.float64),
+            )
+
+        # oldest entries fall off the front once the bucket is full
+        keep = self._max_entries - 1
+        bucket.matrix = np.vstack([bucket.matrix[-keep:] if keep else bucket.matrix[:0], q])
+        bucket.expires_at = np.append(
+            bucket.expires_at[-keep:] if keep else bucket.expires_at[:0],
+            self._clock() + self._ttl_s,
+        )
+        bucket.entries = [*(bucket.entries[-keep:] if keep else []), entry]
+        self._buckets.set(key, bucket)
+
+    def clear(self) -> None:
+        self._buckets.clear()
+
+
+_cache: SemanticAnswerCache | None = None
+
+
+def get_answer_cache() -> SemanticAnswerCache:
+    """Process-wide semantic answer cache (lazy singleton)."""
+    global _cache
+    if _cache is None:
+        s = get_settings()
+        _cache = SemanticAnswerCache(
+            threshold=s.answer_cache_threshold,
+            max_documents=s.answer_cache_max_documents,
+            max_entries=s.answer_cache_max_entries,
+            ttl_s=s.answer_cache_ttl_s,
+        )
+    return _cache
+
+
+def peek_answer_cache() -> SemanticAnswerCache | None:
+    """Current cache, if one was created (for stats; never creates one)."""
+    return _cache
@@ -1,16 +1,98 @@
 from __future__ import annotations
 
+import asyncio
+import logging
+from collections.abc import AsyncGenerator
+from typing import TYPE_CHECKING, cast
+
 from app.core.settings import get_settings
+from app.infra.clients import get_openai_client
+from app.rag.answering.prompt import build_messages
 
+if TYPE_CHECKING:
+    from openai.types.chat import ChatCompletionMessageParam
 
-async def generate_answer_llm(*, question: str, context: str) -> str:
+logger = logging.getLogger(__name__)
+
+_semaphore: asyncio.Semaphore | None = None
+_semaphore_loop: asyncio.AbstractEventLoop | None = None
+
+
+def get_llm_semaphore() -> asyncio.Semaphore:
     """
-    LLM intentionally optional.
-    If no key — fail fast and be handled by caller.
+    Process-wide cap on in-flight LLM calls (APP_LLM_MAX_CONCURRENCY), so a burst of
+    queries queues here instead of tripping provider rate limits.
+    Bound to the running event loop (a new loop gets a fresh semaphore).
     """
-    settings = get_settings()
+    global _semaphore, _semaphore_loop
+    loop = asyncio.get_running_loop()
+    if _semaphore is None or _semaphore_loop is not loop:
+        _semaphore = asyncio.Semaphore(max(1, get_settings().llm_max_concurrency))
+        _semaphore_loop = loop
+    return _semaphore
+
 
-    if not settings.openai_api_key:
+async def stream_answer_llm(*, question: str, context: str) -> AsyncGenerator[str, None]:
+    """
+    Streams answer text deltas from the chat-completions backend.
+    LLM intentionally optional: disabled backend or no key — fail fast on the
+    first iteration and be handled by caller.
+    """
+    s = get_settings()
+
+    if s.llm_backend != "openai":
+        raise RuntimeError(f"LLM backend is disabled (APP_LLM_BACKEND={s.llm_backend})")
+    if not s.openai_api_key:
         raise RuntimeError("OPENAI_API_KEY is not set")
 
-    return "LLM disabled (stub)"
+    client = get_openai_client()
+    messages = cast(
+        "list[ChatCompletionMessageParam]", build_messages(question=question, context=context)
+    )
+
+    # The provider is read by a separate task that holds the LLM slot only while talking
+    # to the provider; the caller drains the queue at its own pace, so a slow or stalled
+    # SSE reader never keeps a slot. The queue holds at most one completion
+    # (<= llm_max_tokens deltas), so the producer never has to wait on the consumer.
+    queue: asyncio.Queue[str | BaseException | None] = asyncio.Queue()
+
+    async def pump() -> None:
+        try:
+            async with get_llm_semaphore():
+                # one deadline for the whole provider call, from the moment it gets a slot
+                async with asyncio.timeout(s.llm_timeout_s):
+                    stream = await client.chat.completions.create(
+                        model=s.openai_chat_model,
+                        messages=messages,
+                        max_tokens=s.llm_max_tokens,
+                        temperature=s.llm_temperature,
+                        stream=True,
+                        timeout=s.llm_timeout_s,
+                    )
+                    try:
+                        async for chunk in stream:
+                            if not chunk.choices:
+                                continue
+                            delta = chunk.choices[0].delta.content
+                            if delta:
+                                queue.put_nowait(delta)
+                    finally:
+                        await stream.close()
+        except Exception as e:
+            queue.put_nowait(e)
+        queue.put_nowait(None)
+
+    producer = asyncio.create_task(pump())
+    try:
+        while (item := await queue.get()) is not None:
+            if isinstance(item, BaseException):
+                raise item
+            yield item
+    finally:
+        # consumer gone (disconnect / aclose): stop reading from the provider
+        producer.cancel()
+
+
+async def generate_answer_llm(*, question: str, context: str) -> str:
+    """Non-streaming convenience wrapper over stream_answer_llm."""
+    return "".join([t async for t in stream_answer_llm(question=question, context=context)])
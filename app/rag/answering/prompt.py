@@ -0,0 +1,30 @@
+from __future__ import annotations
+
+from collections.abc import Sequence
+
+SYSTEM_PROMPT = (
+    "You answer questions about a document using only the numbered context passages. "
+    "If the context does not contain the answer, say that you don't know. "
+    "Cite passages as [n]. Be concise."
+)
+
+
+def build_context(passages: Sequence[str], *, max_chars: int) -> str:
+    """Number passages in rank order; stop before the one that would exceed `max_chars`."""
+    parts: list[str] = []
+    used = 0
+    for i, text in enumerate(passages, start=1):
+        block = f"[{i}] {text.strip()}"
+        if parts and used + len(block) > max_chars:
+            break
+        parts.append(block[:max_chars])
+        used += len(block) + 2
+    return "\n\n".join(parts)
+
+
+def build_messages(*, question: str, context: str) -> list[dict[str, str]]:
+    """Chat-completions messages for one RAG answer."""
+    return [
+        {"role": "system", "content": SYSTEM_PROMPT},
+        {"role": "user", "content": f"Context:\n{context}\n\nQuestion: {question.strip()}"},
+    ]
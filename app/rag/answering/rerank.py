@@ -1,6 +1,6 @@
 from __future__ import annotations
 
-from collections.abc import Callable
+from collections.abc import Callable, Sequence
 from typing import TypeVar
 
 from app.rag.reranking import RerankedItem, rerank_by_overlap
@@ -14,6 +14,7 @@ def rerank_candidates_overlap(
     items: list[tuple[T, float]],
     get_text: Callable[[T], str],
     weight: float,
+    get_token_ids: Callable[[T], Sequence[int] | None] | None = None,
 ) -> list[tuple[T, float]]:
     """
     items: list of (item, original_score) where higher score is better.
@@ -26,6 +27,7 @@ def rerank_candidates_overlap(
         items=reranked_items,
         get_text=get_text,
         weight=weight,
+        get_token_ids=get_token_ids,
     )
 
     return [(ri.item, ri.score) for ri in reranked]
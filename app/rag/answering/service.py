@@ -1,117 +1,506 @@
 from __future__ import annotations
 
+import asyncio
 import logging
 import time
 import uuid
+from collections.abc import AsyncIterator, Sequence
+from dataclasses import replace
+from functools import partial
 
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.api.v1.schemas.query import SourceChunk
 from app.core.settings import get_settings
-from app.rag.answering.llm import generate_answer_llm
+from app.db.engine import session_scope
+from app.db.types import VECTOR_METRICS, EmbeddingArray
+from app.rag.answering.answer_cache import CachedAnswer, get_answer_cache
+from app.rag.answering.llm import stream_answer_llm
+from app.rag.answering.prompt import build_context
 from app.rag.answering.rerank import rerank_candidates_overlap
-from app.rag.answering.types import AnswerTimings
+from app.rag.answering.types import (
+    AnswerEvent,
+    AnswerResult,
+    AnswerTimings,
+    BatchQuestion,
+    DoneEvent,
+    EmbeddedQuestion,
+    SearchParams,
+    SourcesEvent,
+    TokenEvent,
+)
+from app.rag.doc_versions import get_document_version
 from app.rag.ingestion.embeddings import EmbeddingsClient
-from app.repos.chunks import ChunkRepository
+from app.rag.retrieval.cache import get_retrieval_cache, retrieval_cache_key
+from app.rag.retrieval.search import build_lexical_query, reciprocal_rank_fusion
+from app.repos.chunks import ChunkHit, ChunkRepository
 
 logger = logging.getLogger(__name__)
 
+# pgvector's hnsw.ef_search default
+_HNSW_DEFAULT_EF_SEARCH = 40
 
-async def answer_question(
+# float32 round-off of an L2-normalized vector, with room for halfvec-sized error
+_UNIT_NORM_TOLERANCE = 1e-3
+
+
+def resolve_search_params(
     *,
-    session: AsyncSession,
-    document_id: uuid.UUID,
-    question: str,
-    top_k: int,
-) -> tuple[str | None, list[SourceChunk], AnswerTimings]:
+    ef_search: int | None = None,
+    probes: int | None = None,
+) -> SearchParams:
     """
-    Core RAG use-case:
-    1) Embed question
-    2) Vector search (pgvector)
-    3) (Optional) Rerank
-    4) Build context
-    5) (Optional) LLM answer
+    Effective ANN knobs for one query: per-request values win over settings defaults.
+    Only the knob matching the configured index is kept. Quantized storage needs an
+    index to search (exact mode always scans full-precision vectors).
     """
+    s = get_settings()
+    iterative_scan = None if s.vector_iterative_scan == "off" else s.vector_iterative_scan
+    if s.vector_index == "hnsw":
+        return SearchParams(
+            index_mode="hnsw",
+            ef_search=ef_search if ef_search is not None else s.hnsw_ef_search,
+            vector_storage=s.vector_storage,
+            vector_metric=s.vector_metric,
+            iterative_scan=iterative_scan,
+        )
+    if s.vector_index == "ivfflat":
+        return SearchParams(
+            index_mode="ivfflat",
+            probes=probes if probes is not None else s.ivfflat_probes,
+            vector_storage=s.vector_storage,
+            vector_metric=s.vector_metric,
+            # the only mode ivfflat has
+            iterative_scan=iterative_scan and "relaxed_order",
+        )
+    return SearchParams(index_mode="exact", vector_metric=s.vector_metric)
 
+
+async def verify_vector_metric(session: AsyncSession, *, sample: int = 100) -> None:
+    """
+    Startup check that the database matches APP_VECTOR_METRIC, which the query path
+    reads at runtime: the ANN index operator classes must be the metric's (see
+    f1c8e5a2b934), and under "ip" the stored vectors must be unit-length, or `<#>`
+    ranks by vector length instead of direction. Raises RuntimeError on a mismatch;
+    a database without the chunks table (not migrated yet) is skipped.
+    """
     s = get_settings()
-    chunk_repo = ChunkRepository(session)
+    metric = s.vector_metric
+    if metric not in VECTOR_METRICS:
+        raise RuntimeError(f"Unsupported APP_VECTOR_METRIC={metric!r}")
+    repo = ChunkRepository(session)
+    if not await repo.has_chunks_table():
+        logger.warning("Skipping the APP_VECTOR_METRIC check: chunks table does not exist")
+        return
 
-    t_total0 = time.perf_counter()
+    other = "cosine" if metric == "ip" else "ip"
+    stale = [ops for ops in await repo.ann_operator_classes() if ops.endswith(f"_{other}_ops")]
+    if stale:
+        raise RuntimeError(
+            f"APP_VECTOR_METRIC={metric} but the chunks.embedding ANN index uses "
+            f"{', '.join(stale)}: downgrade to a3d9f6b2c718 before changing the setting, "
+            "then upgrade head with the new one"
+        )
+
+    if metric == "ip":
+        norms = await repo.sample_embedding_norms(limit=sample)
+        if any(abs(n - 1.0) > _UNIT_NORM_TOLERANCE for n in norms):
+            raise RuntimeError(
+                "APP_VECTOR_METRIC=ip but stored embeddings are not unit-length: "
+                "run the f1c8e5a2b934 migration with APP_VECTOR_METRIC=ip"
+            )
 
-    # candidates_limit: top_k * multiplier
-    candidates_limit = top_k
-    if s.rerank_backend != "disabled":
-        candidates_limit = max(top_k, top_k * int(s.rerank_candidates_multiplier))
 
-    # 1) embed question
+async def embed_questions(questions: list[str]) -> tuple[list[EmbeddingArray] | None, float]:
+    """
+    Stage 1 for one or many questions: one provider call for all cache misses.
+    Returns (vectors, embed_ms); vectors is None when embedding failed.
+    """
     t0 = time.perf_counter()
     try:
-        emb = EmbeddingsClient()
-        query_vector = (await emb.embed([question]))[0]
+        emb = EmbeddingsClient(cached=True, coalesce=True)
+        vectors: list[EmbeddingArray] | None = await emb.embed(questions)
     except Exception as e:
         logger.warning("Embedding failed, returning retrieval only: %s", e)
-        query_vector = None
-    embed_ms = (time.perf_counter() - t0) * 1000.0
-
-    if query_vector is None:
-        total_ms = (time.perf_counter() - t_total0) * 1000.0
-        return (
-            None,
-            [],
-            AnswerTimings(embed_query_ms=round(embed_ms, 3), total_ms=round(total_ms, 3)),
-        )
+        vectors = None
+    return vectors, (time.perf_counter() - t0) * 1000.0
 
-    # 2) vector search (один раз)
+
+async def _lexical_search(
+    *,
+    document_id: uuid.UUID,
+    question: str,
+    limit: int,
+) -> tuple[list[ChunkHit], float]:
+    """Full-text leg; runs on its own session so it can overlap the vector leg."""
     t0 = time.perf_counter()
-    chunks = await chunk_repo.search_with_score(
+    ts_query = build_lexical_query(question)
+    hits: list[ChunkHit] = []
+    if ts_query is not None:
+        try:
+            async with session_scope() as lex_session:
+                hits = await ChunkRepository(lex_session).search_lexical(
+                    document_id=document_id,
+                    ts_query=ts_query,
+                    ts_config=get_settings().lexical_ts_config,
+                    limit=limit,
+                )
+        except Exception as e:
+            logger.warning("Lexical search failed, using vector results only: %s", e)
+    return hits, (time.perf_counter() - t0) * 1000.0
+
+
+async def answer_question(
+    *,
+    session: AsyncSession,
+    document_id: uuid.UUID,
+    question: str,
+    top_k: int,
+    search_params: SearchParams | None = None,
+    embedded: EmbeddedQuestion | None = None,
+) -> AnswerResult:
+    """Non-streaming answer: drains answer_question_stream into one AnswerResult."""
+    sources_event = SourcesEvent(sources=[])
+    answer: str | None = None
+    timings = AnswerTimings()
+
+    async for event in answer_question_stream(
+        session=session,
         document_id=document_id,
-        query_embedding=query_vector,
-        limit=candidates_limit,
+        question=question,
+        top_k=top_k,
+        search_params=search_params,
+        embedded=embedded,
+    ):
+        if isinstance(event, SourcesEvent):
+            sources_event = event
+        elif isinstance(event, DoneEvent):
+            answer, timings = event.answer, event.timings
+
+    return AnswerResult(
+        answer=answer,
+        sources=sources_event.sources,
+        timings=timings,
+        answer_cache_hit=sources_event.answer_cache_hit,
+        answer_cache_similarity=sources_event.answer_cache_similarity,
+        retrieval_cache_hit=sources_event.retrieval_cache_hit,
     )
+
+
+def vector_search_knobs(params: SearchParams, limit: int) -> tuple[int | None, int | None]:
+    """
+    (hnsw.ef_search, first-pass candidates) for a vector search returning `limit` rows.
+    Quantized storage fetches `limit * vector_rerank_multiplier` candidates for
+    full-precision re-scoring. An HNSW scan returns at most ef_search rows (before
+    the document filter), so ef_search is raised to cover the rows asked for.
+    """
+    first_pass = (
+        None if params.vector_storage == "full" else limit * get_settings().vector_rerank_multiplier
+    )
+    ef_search = params.ef_search
+    needed = first_pass or limit
+    if params.index_mode == "hnsw" and (ef_search or _HNSW_DEFAULT_EF_SEARCH) < needed:
+        ef_search = needed
+    return ef_search, first_pass
+
+
+def _candidates_limit(top_k: int) -> int:
+    # candidates_limit: top_k * multiplier
+    s = get_settings()
+    if s.rerank_backend != "disabled":
+        return max(top_k, top_k * int(s.rerank_candidates_multiplier))
+    return top_k
+
+
+async def _retrieve(
+    *,
+    session: AsyncSession,
+    document_id: uuid.UUID,
+    question: str,
+    top_k: int,
+    params: SearchParams,
+    query_vector: EmbeddingArray | None,
+    lexical_task: asyncio.Task[tuple[list[ChunkHit], float]] | None,
+) -> tuple[list[SourceChunk], float, float, float]:
+    """Stages 2-3: search (+ fusion) and optional rerank -> (sources, vector/lexical/rerank ms)."""
+    s = get_settings()
+    chunk_repo = ChunkRepository(session)
+    candidates_limit = _candidates_limit(top_k)
+
+    # 2) vector search (один раз)
+    t0 = time.perf_counter()
+    hits: list[ChunkHit] = []
+    if query_vector is not None:
+        ef_search, first_pass = vector_search_knobs(params, candidates_limit)
+        await chunk_repo.set_search_params(
+            ef_search=ef_search,
+            probes=params.probes,
+            iterative_scan=params.iterative_scan,
+            index_mode=params.index_mode,
+        )
+        hits = await chunk_repo.search_hits(
+            document_id=document_id,
+            query_embedding=query_vector,
+            limit=candidates_limit,
+            storage=params.vector_storage,
+            candidates=first_pass,
+            metric=params.vector_metric,
+        )
+        if params.iterative_scan == "relaxed_order":
+            # relaxed_order may return rows slightly out of distance order
+            hits.sort(key=lambda h: h.score, reverse=True)
     vector_ms = (time.perf_counter() - t0) * 1000.0
 
+    lexical_ms = 0.0
+    if lexical_task is not None:
+        lexical_hits, lexical_ms = await lexical_task
+        result_lists = [hits, lexical_hits] if query_vector is not None else [lexical_hits]
+        hits = reciprocal_rank_fusion(result_lists, k=s.rrf_k, limit=candidates_limit)
+
     # 3) rerank (optional)
     rerank_ms = 0.0
-    if s.rerank_backend == "overlap" and chunks:
+    if s.rerank_backend == "overlap" and hits:
         t0 = time.perf_counter()
 
         w = float(s.rerank_weight)
         w = 0.0 if w < 0.0 else (1.0 if w > 1.0 else w)
 
-        chunks = rerank_candidates_overlap(
+        reranked = rerank_candidates_overlap(
             question=question,
-            items=chunks,
-            get_text=lambda c: c.text,
+            items=[(h, h.score) for h in hits],
+            get_text=lambda h: h.text,
             weight=w,
+            get_token_ids=lambda h: h.token_ids,
         )[:top_k]
+        hits = [replace(h, score=score) for h, score in reranked]
 
         rerank_ms = (time.perf_counter() - t0) * 1000.0
     else:
-        chunks = chunks[:top_k]
+        hits = hits[:top_k]
+
+    sources = [SourceChunk(chunk_index=h.chunk_index, text=h.text, score=h.score) for h in hits]
+    return sources, vector_ms, lexical_ms, rerank_ms
+
+
+async def answer_question_stream(
+    *,
+    session: AsyncSession | None,
+    document_id: uuid.UUID,
+    question: str,
+    top_k: int,
+    search_params: SearchParams | None = None,
+    embedded: EmbeddedQuestion | None = None,
+) -> AsyncIterator[AnswerEvent]:
+    """
+    Core RAG use-case, as events:
+    0) Retrieval-result cache lookup (identical query, same document version)
+    1) Embed question (skipped when `embedded` is given, or on a retrieval cache hit
+       unless the answer cache needs the vector)
+    1b) Semantic answer cache lookup -> SourcesEvent, TokenEvent, DoneEvent
+    2) Vector search (pgvector), plus full-text search fused with RRF in hybrid mode
+    3) (Optional) Rerank
+    -> SourcesEvent
+    4) Build context
+    5) (Optional) LLM answer
+    -> TokenEvent per answer delta, then DoneEvent
+
+    With `session=None` retrieval runs on its own session, closed before SourcesEvent:
+    no pooled connection is held while the answer is generated and streamed to a
+    (possibly slow) client.
+    """
 
-    sources: list[SourceChunk] = [
-        SourceChunk(chunk_index=c.chunk_index, text=c.text, score=score) for c, score in chunks
-    ]
+    s = get_settings()
+    params = search_params or resolve_search_params()
+
+    t_total0 = time.perf_counter()
+
+    # both caches are keyed by the document content version (None: Redis down, bypass)
+    doc_version: int | None = None
+    if s.answer_cache_enabled or s.retrieval_cache_enabled:
+        doc_version = await get_document_version(document_id)
+
+    # 0) retrieval cache
+    retrieval_key: str | None = None
+    cached_sources: list[SourceChunk] | None = None
+    if s.retrieval_cache_enabled and doc_version is not None:
+        retrieval_key = retrieval_cache_key(
+            s=s,
+            document_id=document_id,
+            version=doc_version,
+            question=question,
+            top_k=top_k,
+            search_params=params,
+        )
+        cached_sources = get_retrieval_cache().get(retrieval_key)
+
+    answer_cache_version = doc_version if s.answer_cache_enabled else None
+
+    def start_lexical() -> asyncio.Task[tuple[list[ChunkHit], float]] | None:
+        if cached_sources is not None or s.retrieval_mode != "hybrid":
+            return None
+        return asyncio.create_task(
+            _lexical_search(
+                document_id=document_id, question=question, limit=_candidates_limit(top_k)
+            )
+        )
+
+    # The lexical leg needs no embedding, so it normally starts first and overlaps
+    # embed + vector search. With the answer cache on it starts after the lookup
+    # instead: a hit must not pay for a DB query it throws away.
+    lexical_task: asyncio.Task[tuple[list[ChunkHit], float]] | None = None
+    try:
+        if answer_cache_version is None:
+            lexical_task = start_lexical()
+
+        # 1) embed question
+        query_vector: EmbeddingArray | None = None
+        embed_ms = 0.0
+        if embedded is not None:
+            query_vector, embed_ms = embedded.vector, embedded.embed_ms
+        elif cached_sources is None or s.answer_cache_enabled:
+            vectors, embed_ms = await embed_questions([question])
+            query_vector = vectors[0] if vectors is not None else None
+
+        # 1b) semantic answer cache: a paraphrase of an answered question skips search + LLM
+        if answer_cache_version is not None:
+            cached = (
+                get_answer_cache().lookup(
+                    document_id=document_id,
+                    top_k=top_k,
+                    version=answer_cache_version,
+                    vector=query_vector,
+                )
+                if query_vector is not None
+                else None
+            )
+            if cached is not None:
+                entry, similarity = cached
+                yield SourcesEvent(
+                    sources=entry.sources,
+                    answer_cache_hit=True,
+                    answer_cache_similarity=round(similarity, 4),
+                )
+                yield TokenEvent(text=entry.answer)
+                total_ms = (time.perf_counter() - t_total0) * 1000.0
+                yield DoneEvent(
+                    answer=entry.answer,
+                    timings=AnswerTimings(
+                        embed_query_ms=round(embed_ms, 3), total_ms=round(total_ms, 3)
+                    ),
+                )
+                return
+            lexical_task = start_lexical()
+
+        # 2-3) search + rerank, unless the retrieval cache already has the final sources
+        vector_ms = lexical_ms = rerank_ms = 0.0
+        if cached_sources is not None:
+            sources = cached_sources
+        else:
+            if query_vector is None and lexical_task is None:
+                total_ms = (time.perf_counter() - t_total0) * 1000.0
+                yield SourcesEvent(sources=[])
+                yield DoneEvent(
+                    answer=None,
+                    timings=AnswerTimings(
+                        embed_query_ms=round(embed_ms, 3), total_ms=round(total_ms, 3)
+                    ),
+                )
+                return
+
+            retrieve = partial(
+                _retrieve,
+                document_id=document_id,
+                question=question,
+                top_k=top_k,
+                params=params,
+                query_vector=query_vector,
+                lexical_task=lexical_task,
+            )
+            if session is not None:
+                sources, vector_ms, lexical_ms, rerank_ms = await retrieve(session=session)
+            else:
+                async with session_scope() as own_session:
+                    sources, vector_ms, lexical_ms, rerank_ms = await retrieve(session=own_session)
+            # an embedding failure degrades the result (lexical only): don't pin it in the cache
+            if retrieval_key is not None and query_vector is not None:
+                get_retrieval_cache().set(retrieval_key, sources)
+    finally:
+        # failure, early return or a closed generator (client disconnect): the lexical
+        # leg must not keep running on its own pooled session
+        if lexical_task is not None:
+            lexical_task.cancel()
+
+    yield SourcesEvent(sources=sources, retrieval_cache_hit=cached_sources is not None)
 
     # 4) context
-    context = "\n\n".join(c.text for c, _ in chunks)
+    context = build_context([src.text for src in sources], max_chars=s.llm_max_context_chars)
 
-    # 5) LLM (optional)
+    # 5) LLM (optional), streamed
     t0 = time.perf_counter()
+    first_token_ms = 0.0
+    parts: list[str] = []
+    answer: str | None
     try:
-        answer = await generate_answer_llm(question=question, context=context)
+        async for token in stream_answer_llm(question=question, context=context):
+            if not parts:
+                first_token_ms = (time.perf_counter() - t0) * 1000.0
+            parts.append(token)
+            yield TokenEvent(text=token)
+        answer = "".join(parts)
     except Exception as e:
         logger.warning("LLM disabled or failed: %s", e)
-        answer = None
+        # a partially streamed answer is still the best we have
+        answer = "".join(parts) if parts else None
     llm_ms = (time.perf_counter() - t0) * 1000.0
 
     total_ms = (time.perf_counter() - t_total0) * 1000.0
     timings = AnswerTimings(
         embed_query_ms=round(embed_ms, 3),
         vector_search_ms=round(vector_ms, 3),
+        lexical_search_ms=round(lexical_ms, 3),
         rerank_ms=round(rerank_ms, 3),
         llm_ms=round(llm_ms, 3),
+        llm_first_token_ms=round(first_token_ms, 3),
         total_ms=round(total_ms, 3),
     )
 
-    return answer, sources, timings
+    if answer is not None and answer_cache_version is not None and query_vector is not None:
+        get_answer_cache().store(
+            document_id=document_id,
+            top_k=top_k,
+            version=answer_cache_version,
+            vector=query_vector,
+            entry=CachedAnswer(question=question, answer=answer, sources=sources),
+        )
+
+    yield DoneEvent(answer=answer, timings=timings)
+
+
+async def answer_questions_batch(
+    *,
+    items: Sequence[BatchQuestion],
+    concurrency: int,
+) -> tuple[list[AnswerResult], float]:
+    """
+    Many questions in one go: a single embedding call for all of them, then
+    answer_question per item (stages 2-5) concurrently, each on its own session,
+    at most `concurrency` at a time (bounds DB connections taken from the pool).
+    Returns per-item results in input order and the shared embed_ms.
+    """
+    vectors, embed_ms = await embed_questions([it.question for it in items])
+    sem = asyncio.Semaphore(max(1, concurrency))
+
+    async def run(i: int, it: BatchQuestion) -> AnswerResult:
+        vec = vectors[i] if vectors is not None else None
+        async with sem, session_scope() as session:
+            return await answer_question(
+                session=session,
+                document_id=it.document_id,
+                question=it.question,
+                top_k=it.top_k,
+                search_params=it.search_params,
+                embedded=EmbeddedQuestion(vector=vec),
+            )
+
+    results = await asyncio.gather(*(run(i, it) for i, it in enumerate(items)))
+    return list(results), embed_ms
@@ -1,12 +1,87 @@
 from __future__ import annotations
 
+import uuid
 from dataclasses import dataclass
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from app.api.v1.schemas.query import SourceChunk
+    from app.db.types import EmbeddingArray
 
 
 @dataclass(frozen=True)
 class AnswerTimings:
     embed_query_ms: float = 0.0
     vector_search_ms: float = 0.0
+    lexical_search_ms: float = 0.0
     rerank_ms: float = 0.0
     llm_ms: float = 0.0
+    llm_first_token_ms: float = 0.0
     total_ms: float = 0.0
+
+
+@dataclass(frozen=True)
+class AnswerResult:
+    answer: str | None
+    sources: list[SourceChunk]
+    timings: AnswerTimings
+    answer_cache_hit: bool = False
+    answer_cache_similarity: float | None = None
+    retrieval_cache_hit: bool = False
+
+
+@dataclass(frozen=True)
+class SearchParams:
+    index_mode: str = "exact"
+    ef_search: int | None = None
+    probes: int | None = None
+    # full|halfvec|binary: representation the first-pass ANN search runs on
+    vector_storage: str = "full"
+    # cosine|ip: distance operator (ip expects unit-length vectors, see APP_VECTOR_METRIC)
+    vector_metric: str = "cosine"
+    # pgvector iterative index scan (strict_order|relaxed_order), None => off
+    iterative_scan: str | None = None
+
+
+@dataclass(frozen=True)
+class EmbeddedQuestion:
+    """Result of the embed stage when it ran outside answer_question (e.g. batched)."""
+
+    vector: EmbeddingArray | None
+    embed_ms: float = 0.0
+
+
+@dataclass(frozen=True)
+class BatchQuestion:
+    document_id: uuid.UUID
+    question: str
+    top_k: int
+    search_params: SearchParams | None = None
+
+
+@dataclass(frozen=True)
+class SourcesEvent:
+    """Streaming: retrieval/rerank finished (or answer cache hit), sources are final."""
+
+    sources: list[SourceChunk]
+    answer_cache_hit: bool = False
+    answer_cache_similarity: float | None = None
+    retrieval_cache_hit: bool = False
+
+
+@dataclass(frozen=True)
+class TokenEvent:
+    """Streaming: one answer text delta from the LLM."""
+
+    text: str
+
+
+@dataclass(frozen=True)
+class DoneEvent:
+    """Streaming: last event; `answer` is None when the LLM stage was skipped or failed."""
+
+    answer: str | None
+    timings: AnswerTimings
+
+
+AnswerEvent = SourcesEvent | TokenEvent | DoneEvent
@@ -0,0 +1,34 @@
+from __future__ import annotations
+
+import logging
+import uuid
+
+from app.infra.redis import get_redis
+
+logger = logging.getLogger(__name__)
+
+
+def _key(document_id: uuid.UUID) -> str:
+    return f"doc:{document_id}:version"
+
+
+async def get_document_version(document_id: uuid.UUID) -> int | None:
+    """
+    Content version of a document, shared by API processes and workers.
+    0 for a document that was never bumped; None when Redis is unavailable
+    (callers must then bypass anything keyed by the version).
+    """
+    try:
+        raw = await get_redis().get(_key(document_id))
+    except Exception as e:
+        logger.warning("Document version read failed doc=%s: %s", document_id, e)
+        return None
+    return int(raw) if raw is not None else 0
+
+
+async def bump_document_version(document_id: uuid.UUID) -> None:
+    """Invalidate everything cached for the document (its content changed or is changing)."""
+    try:
+        await get_redis().incr(_key(document_id))
+    except Exception as e:
+        logger.warning("Document version bump failed doc=%s: %s", document_id, e)
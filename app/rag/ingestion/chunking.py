@@ -1,5 +1,7 @@
 from __future__ import annotations
 
+from collections.abc import Iterable, Iterator
+
 
 def chunk_text(text: str, *, chunk_size: int = 800, overlap: int = 120) -> list[str]:
     text = " ".join(text.split())
@@ -18,3 +20,54 @@ def chunk_text(text: str, *, chunk_size: int = 800, overlap: int = 120) -> list[
         i = max(0, j - overlap)
 
     return chunks
+
+
+def iter_normalized(pieces: Iterable[str]) -> Iterator[str]:
+    """
+    Streaming whitespace normalization: concatenating the output equals
+    " ".join("".join(pieces).split()), without ever holding the whole text.
+    """
+    started = False
+    pending_space = False
+
+    for piece in pieces:
+        if not piece:
+            continue
+        words = piece.split()
+        if not words:
+            pending_space = started
+            continue
+
+        sep = " " if started and (pending_space or piece[0].isspace()) else ""
+        yield sep + " ".join(words)
+        started = True
+        pending_space = piece[-1].isspace()
+
+
+def iter_chunks(
+    pieces: Iterable[str], *, chunk_size: int = 800, overlap: int = 120
+) -> Iterator[str]:
+    """
+    Generator version of chunk_text over a stream of text pieces (e.g. file reads).
+    Yields exactly the chunks chunk_text("".join(pieces)) would return; the overlap
+    is carried across read boundaries, memory stays bounded by the read size.
+    """
+    if overlap >= chunk_size:
+        raise ValueError("overlap must be smaller than chunk_size")
+
+    buf = ""
+    i = 0
+
+    for segment in iter_normalized(pieces):
+        buf += segment
+        # emit only windows that are known not to be the last one
+        while len(buf) - i > chunk_size:
+            j = i + chunk_size
+            yield buf[i:j]
+            i = j - overlap
+        if i > len(buf) // 2:
+            buf = buf[i:]
+            i = 0
+
+    if len(buf) > i:
+        yield buf[i:]
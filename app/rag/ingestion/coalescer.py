@@ -0,0 +1,121 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any
+
+from app.core.metrics import Histogram
+from app.db.types import EmbeddingArray
+
+if TYPE_CHECKING:
+    from app.rag.ingestion.embeddings import EmbeddingsBackend
+
+EmbedFn = Callable[[list[str]], Awaitable[list[EmbeddingArray]]]
+
+_BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256)
+_WAIT_MS_BUCKETS = (0.5, 1, 2, 5, 10, 20, 50, 100)
+
+
+class EmbeddingsCoalescer:
+    """
+    Collects concurrent single-text embed calls and sends them as one batched
+    provider call. A batch is flushed when `max_batch` texts are pending or
+    `window_ms` has passed since the first pending text, whichever comes first.
+    Each caller awaits its own future and gets its own vector back.
+    """
+
+    def __init__(self, *, embed: EmbedFn, max_batch: int, window_ms: float) -> None:
+        self._embed = embed
+        self._max_batch = max(1, int(max_batch))
+        self._window_s = max(0.0, float(window_ms)) / 1000.0
+
+        self._pending: list[tuple[str, asyncio.Future[EmbeddingArray], float]] = []
+        self._timer: asyncio.TimerHandle | None = None
+        self._tasks: set[asyncio.Task[None]] = set()
+
+        self.batch_size = Histogram(_BATCH_SIZE_BUCKETS)
+        self.wait_ms = Histogram(_WAIT_MS_BUCKETS)
+
+    async def embed_one(self, text: str) -> EmbeddingArray:
+        loop = asyncio.get_running_loop()
+        fut: asyncio.Future[EmbeddingArray] = loop.create_future()
+        self._pending.append((text, fut, time.perf_counter()))
+
+        if len(self._pending) >= self._max_batch:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self._window_s, self._flush)
+
+        return await fut
+
+    def _flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+        batch, self._pending = self._pending, []
+        if not batch:
+            return
+
+        task = asyncio.get_running_loop().create_task(self._run(batch))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, batch: list[tuple[str, asyncio.Future[EmbeddingArray], float]]) -> None:
+        now = time.perf_counter()
+        for _, _, enqueued_at in batch:
+            self.wait_ms.observe((now - enqueued_at) * 1000.0)
+
+        # identical questions in one window share a single provider slot
+        unique: dict[str, int] = {}
+        for text, _, _ in batch:
+            unique.setdefault(text, len(unique))
+        self.batch_size.observe(len(unique))
+
+        error: BaseException = RuntimeError("embedding batch ended without a result")
+        try:
+            vectors = await self._embed(list(unique))
+            if len(vectors) != len(unique):
+                raise ValueError(
+                    f"Embeddings backend returned {len(vectors)} vectors for {len(unique)} texts"
+                )
+            for text, fut, _ in batch:
+                if not fut.done():
+                    fut.set_result(vectors[unique[text]])
+        except Exception as e:
+            # reaches every caller through its future; nothing awaits this task
+            error = e
+        except BaseException as e:
+            # CancelledError at shutdown: callers must not wait forever either
+            error = e
+            raise
+        finally:
+            for _, fut, _ in batch:
+                if fut.done():
+                    continue
+                if isinstance(error, asyncio.CancelledError):
+                    fut.cancel()
+                else:
+                    fut.set_exception(error)
+
+    def stats(self) -> dict[str, Any]:
+        return {"batch_size": self.batch_size.snapshot(), "wait_ms": self.wait_ms.snapshot()}
+
+
+@dataclass(frozen=True)
+class CoalescingEmbeddingsBackend:
+    """EmbeddingsBackend wrapper: single-text calls go through the coalescer, batches go direct."""
+
+    inner: EmbeddingsBackend
+    coalescer: EmbeddingsCoalescer
+
+    @property
+    def dim(self) -> int:
+        return self.inner.dim
+
+    async def embed(self, texts: list[str]) -> list[EmbeddingArray]:
+        if len(texts) == 1:
+            return [await self.coalescer.embed_one(texts[0])]
+        return await self.inner.embed(texts)
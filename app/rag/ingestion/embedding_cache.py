@@ -0,0 +1,157 @@
+from __future__ import annotations
+
+import hashlib
+import logging
+from dataclasses import asdict, dataclass
+from typing import TYPE_CHECKING, Any
+
+import numpy as np
+
+from app.core.cache import TTLCache
+from app.core.metrics import CACHE_LOOKUPS
+from app.core.settings import get_settings
+from app.db.types import EmbeddingArray
+from app.infra.redis import get_redis_bytes
+
+if TYPE_CHECKING:
+    from app.rag.ingestion.embeddings import EmbeddingsBackend
+
+logger = logging.getLogger(__name__)
+
+
+def encode_vector(vec: EmbeddingArray) -> bytes:
+    """Pack a vector as little-endian float32 (4 bytes per dim)."""
+    return np.asarray(vec, dtype="<f4").tobytes()
+
+
+def decode_vector(data: bytes) -> EmbeddingArray:
+    # zero-copy view over the Redis payload (read-only, like every cached vector)
+    return np.frombuffer(data, dtype="<f4").astype(np.float32, copy=False)
+
+
+@dataclass(slots=True)
+class EmbeddingCacheStats:
+    local_hits: int = 0
+    redis_hits: int = 0
+    misses: int = 0
+    redis_errors: int = 0
+
+    def as_dict(self) -> dict[str, int]:
+        return asdict(self)
+
+
+class EmbeddingCache:
+    """
+    Two-tier cache for query embeddings:
+    1) process-local LRU with TTL (hot questions, no I/O)
+    2) shared Redis tier (packed float32 values, survives restarts, shared by workers)
+    Keys are content hashes namespaced by model and dimension.
+    """
+
+    def __init__(
+        self,
+        *,
+        maxsize: int,
+        ttl_s: int,
+        use_redis: bool,
+    ) -> None:
+        self._local: TTLCache[str, EmbeddingArray] = TTLCache(maxsize=maxsize, ttl_s=ttl_s)
+        self._ttl_s = int(ttl_s)
+        self._use_redis = use_redis
+        self.stats = EmbeddingCacheStats()
+
+    @staticmethod
+    def key(*, namespace: str, text: str) -> str:
+        digest = hashlib.sha256(text.encode("utf-8")).hexdigest()
+        return f"{namespace}:{digest}"
+
+    async def get_many(self, keys: list[str]) -> list[EmbeddingArray | None]:
+        out: list[EmbeddingArray | None] = [self._local.get(k) for k in keys]
+        local_hits = sum(1 for v in out if v is not None)
+        self.stats.local_hits += local_hits
+        CACHE_LOOKUPS.labels(cache="embedding", result="local_hit").inc(local_hits)
+
+        missing = [i for i, v in enumerate(out) if v is None]
+        if missing and self._use_redis:
+            try:
+                raw: list[Any] = await get_redis_bytes().mget([keys[i] for i in missing])
+            except Exception as e:
+                self.stats.redis_errors += 1
+                logger.warning("Embedding cache redis read failed: %s", e)
+                raw = [None] * len(missing)
+
+            for i, data in zip(missing, raw, strict=True):
+                if data is None:
+                    continue
+                vec = decode_vector(data)
+                out[i] = vec
+                self._local.set(keys[i], vec)
+                self.stats.redis_hits += 1
+                CACHE_LOOKUPS.labels(cache="embedding", result="redis_hit").inc()
+
+        misses = sum(1 for v in out if v is None)
+        self.stats.misses += misses
+        CACHE_LOOKUPS.labels(cache="embedding", result="miss").inc(misses)
+        return out
+
+    async def set_many(self, items: list[tuple[str, EmbeddingArray]]) -> None:
+        for k, vec in items:
+            self._local.set(k, vec)
+
+        if not items or not self._use_redis:
+            return
+        try:
+            pipe = get_redis_bytes().pipeline(transaction=False)
+            for k, vec in items:
+                pipe.set(k, encode_vector(vec), ex=self._ttl_s)
+            await pipe.execute()
+        except Exception as e:
+            self.stats.redis_errors += 1
+            logger.warning("Embedding cache redis write failed: %s", e)
+
+    def clear(self) -> None:
+        self._local.clear()
+
+
+_cache: EmbeddingCache | None = None
+
+
+def get_embedding_cache() -> EmbeddingCache:
+    """Process-wide embedding cache (lazy singleton)."""
+    global _cache
+    if _cache is None:
+        s = get_settings()
+        _cache = EmbeddingCache(
+            maxsize=s.embeddings_cache_size,
+            ttl_s=s.embeddings_cache_ttl_s,
+            use_redis=s.embeddings_cache_redis,
+        )
+    return _cache
+
+
+@dataclass(frozen=True)
+class CachedEmbeddingsBackend:
+    """EmbeddingsBackend wrapper: only cache misses reach the inner backend (in one call)."""
+
+    inner: EmbeddingsBackend
+    cache: EmbeddingCache
+    namespace: str
+
+    @property
+    def dim(self) -> int:
+        return self.inner.dim
+
+    async def embed(self, texts: list[str]) -> list[EmbeddingArray]:
+        keys = [self.cache.key(namespace=self.namespace, text=t) for t in texts]
+        cached = await self.cache.get_many(keys)
+
+        missing = [i for i, v in enumerate(cached) if v is None]
+        if missing:
+            fresh = await self.inner.embed([texts[i] for i in missing])
+            await self.cache.set_many(
+                [(keys[i], vec) for i, vec in zip(missing, fresh, strict=True)]
+            )
+            for i, vec in zip(missing, fresh, strict=True):
+                cached[i] = vec
+
+        return [v for v in cached if v is not None]
@@ -1,18 +1,27 @@
 from __future__ import annotations
 
+import asyncio
+import base64
 import hashlib
+import re
 from dataclasses import dataclass
-from typing import Literal, Protocol
+from functools import lru_cache
+from typing import Literal, Protocol, cast
 
+import numpy as np
 from openai import AsyncOpenAI
 
 from app.core.settings import get_settings
+from app.db.types import EmbeddingArray, as_embedding
+from app.infra.clients import get_openai_client
+from app.rag.ingestion.coalescer import CoalescingEmbeddingsBackend, EmbeddingsCoalescer
+from app.rag.ingestion.embedding_cache import CachedEmbeddingsBackend, get_embedding_cache
 
 
 class EmbeddingsBackend(Protocol):
     @property
     def dim(self) -> int: ...
-    async def embed(self, texts: list[str]) -> list[list[float]]: ...
+    async def embed(self, texts: list[str]) -> list[EmbeddingArray]: ...
 
 
 @dataclass(frozen=True)
@@ -20,14 +29,35 @@ class OpenAIEmbeddingsBackend:
     client: AsyncOpenAI
     model: str
     _dim: int
+    # text-embedding-3-*: the API shortens (and re-normalizes) vectors to this size
+    dimensions: int | None = None
 
     @property
     def dim(self) -> int:
         return self._dim
 
-    async def embed(self, texts: list[str]) -> list[list[float]]:
-        resp = await self.client.embeddings.create(model=self.model, input=texts)
-        return [d.embedding for d in resp.data]
+    async def embed(self, texts: list[str]) -> list[EmbeddingArray]:
+        # base64 float32 on the wire, decoded straight into arrays: the SDK would
+        # otherwise expand it into Python float lists
+        if self.dimensions is not None:
+            resp = await self.client.embeddings.create(
+                model=self.model,
+                input=texts,
+                encoding_format="base64",
+                dimensions=self.dimensions,
+            )
+        else:
+            resp = await self.client.embeddings.create(
+                model=self.model, input=texts, encoding_format="base64"
+            )
+        return [_decode_embedding(cast(str | list[float], d.embedding)) for d in resp.data]
+
+
+def _decode_embedding(value: str | list[float]) -> EmbeddingArray:
+    if isinstance(value, str):
+        return np.frombuffer(base64.b64decode(value), dtype="<f4").astype(np.float32, copy=False)
+    # providers that ignore encoding_format answer with plain floats
+    return as_embedding(value)
 
 
 @dataclass(frozen=True)
@@ -38,44 +68,234 @@ class MockEmbeddingsBackend:
     def dim(self) -> int:
         return self._dim
 
-    async def embed(self, texts: list[str]) -> list[list[float]]:
-        out: list[list[float]] = []
-        for t in texts:
-            h = hashlib.sha256(t.encode("utf-8")).digest()
-            raw = (h * ((self._dim // len(h)) + 1))[: self._dim]
-            vec = [(b - 128) / 128.0 for b in raw]  # [-1..1]
-            out.append(vec)
-        return out
+    async def embed(self, texts: list[str]) -> list[EmbeddingArray]:
+        if not texts:
+            return []
+        # sha256 digest repeated to `dim` bytes, mapped to [-1..1]; one array op per batch
+        digests = np.frombuffer(
+            b"".join(hashlib.sha256(t.encode("utf-8")).digest() for t in texts), dtype=np.uint8
+        ).reshape(len(texts), 32)
+        raw = np.tile(digests, (1, self._dim // 32 + 1))[:, : self._dim]
+        # (b - 128) / 128 is exact in float32
+        return list((raw.astype(np.float32) - 128.0) / 128.0)
 
 
-class EmbeddingsClient:
-    def __init__(self) -> None:
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+@lru_cache(maxsize=262_144)
+def _hashed_feature(token: str, n_features: int) -> tuple[int, float]:
+    """Feature-hashing slot and sign of a token (sign halves collision bias)."""
+    h = int.from_bytes(hashlib.blake2b(token.encode("utf-8"), digest_size=8).digest(), "little")
+    return h % n_features, 1.0 if (h >> 63) & 1 else -1.0
+
+
+@lru_cache(maxsize=4)
+def _projection(n_features: int, dim: int, seed: int) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    matrix: np.ndarray = rng.standard_normal((n_features, dim), dtype=np.float32)
+    return matrix / np.float32(np.sqrt(dim))
+
+
+@dataclass(frozen=True)
+class HashingEmbeddingsBackend:
+    """
+    Offline, deterministic embedder with lexical semantics: texts sharing words get
+    close vectors, so retrieval quality can be measured without a provider.
+    Token counts (sublinear tf) are feature-hashed into `n_features` slots, projected
+    to `dim` with a fixed seeded Gaussian matrix and L2-normalized.
+    """
+
+    _dim: int = 1536
+    n_features: int = 4096
+    seed: int = 0
+
+    @property
+    def dim(self) -> int:
+        return self._dim
+
+    def _embed_sync(self, texts: list[str]) -> list[EmbeddingArray]:
+        projection = _projection(self.n_features, self._dim, self.seed)
+        dense = np.zeros((len(texts), self._dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            counts: dict[int, float] = {}
+            for token in _TOKEN_RE.findall(text.lower()):
+                slot, sign = _hashed_feature(token, self.n_features)
+                counts[slot] = counts.get(slot, 0.0) + sign
+            if not counts:
+                continue
+            c = np.fromiter(counts.values(), dtype=np.float32, count=len(counts))
+            # sublinear tf keeps frequent words from dominating
+            weights = np.sign(c) * np.log1p(np.abs(c))
+            # sparse row x projection: only the rows of the slots present. Per text
+            # rather than one batch matmul, so a text gets bit-identical vectors
+            # whatever batch it arrives in (BLAS blocking depends on the batch shape)
+            dense[row] = weights @ projection[np.fromiter(counts, dtype=np.intp)]
+
+        norms = np.linalg.norm(dense, axis=1, keepdims=True)
+        np.divide(dense, norms, out=dense, where=norms > 0)
+        return list(dense)
+
+    async def embed(self, texts: list[str]) -> list[EmbeddingArray]:
+        if not texts:
+            return []
+        # numpy releases the GIL in the matmul: keep the event loop free for other stages
+        return await asyncio.to_thread(self._embed_sync, texts)
+
+
+def truncate_embedding(vector: EmbeddingArray, dim: int) -> EmbeddingArray:
+    """
+    Matryoshka truncation: keep the first `dim` components and L2-renormalize, so
+    cosine/inner-product scores stay comparable with full-size vectors.
+    """
+    if vector.shape[0] < dim:
+        raise ValueError(
+            f"Cannot truncate a {vector.shape[0]}-dim embedding to {dim} dims (APP_EMBEDDINGS_DIM)"
+        )
+    head = vector[:dim]
+    norm = float(np.linalg.norm(head))
+    return head / np.float32(norm) if norm > 0.0 else head.copy()
+
+
+def normalize_embeddings(vectors: list[EmbeddingArray]) -> list[EmbeddingArray]:
+    """
+    L2-normalize a batch in one pass (APP_VECTOR_METRIC=ip): the inner product of
+    unit vectors is their cosine similarity. All-zero vectors are returned unchanged.
+    """
+    if not vectors:
+        return []
+    batch = np.stack(vectors).astype(np.float32, copy=False)
+    norms = np.linalg.norm(batch, axis=1, keepdims=True)
+    unit = np.divide(batch, norms, out=np.zeros_like(batch), where=norms > 0)
+    return list(unit)
+
+
+@dataclass(frozen=True)
+class TruncatingEmbeddingsBackend:
+    """EmbeddingsBackend wrapper: client-side truncation for models without a `dimensions` knob."""
+
+    inner: EmbeddingsBackend
+    _dim: int
+
+    @property
+    def dim(self) -> int:
+        return self._dim
+
+    async def embed(self, texts: list[str]) -> list[EmbeddingArray]:
+        return [truncate_embedding(v, self._dim) for v in await self.inner.embed(texts)]
+
+
+def _build_backend() -> tuple[EmbeddingsBackend, str]:
+    """Raw provider backend from settings, plus the model name used for cache namespacing."""
+    s = get_settings()
+
+    backend: Literal["auto", "openai", "mock", "hashing"] = getattr(s, "embeddings_backend", "auto")
+    dim: int = getattr(s, "embeddings_dim", 1536)
+
+    if backend == "auto":
+        backend = "openai" if getattr(s, "openai_api_key", None) else "mock"
+
+    if backend == "openai":
+        # pooled, application-scoped client (see app.infra.clients)
+        client = get_openai_client()
+        model = getattr(s, "openai_embeddings_model", "text-embedding-3-small")
+        if s.embeddings_truncate == "api":
+            return OpenAIEmbeddingsBackend(
+                client=client, model=model, _dim=dim, dimensions=dim
+            ), model
+        openai_backend = OpenAIEmbeddingsBackend(client=client, model=model, _dim=dim)
+        if s.embeddings_truncate == "client":
+            return TruncatingEmbeddingsBackend(inner=openai_backend, _dim=dim), model
+        return openai_backend, model
+
+    if backend == "hashing":
+        features, seed = s.hashing_embeddings_features, s.hashing_embeddings_seed
+        return (
+            HashingEmbeddingsBackend(_dim=dim, n_features=features, seed=seed),
+            f"hashing-{features}-{seed}",
+        )
+
+    return MockEmbeddingsBackend(_dim=dim), "mock"
+
+
+async def _embed_raw(texts: list[str]) -> list[EmbeddingArray]:
+    # resolved per batch, so the coalescer never outlives the client registry it uses
+    backend, _ = _build_backend()
+    return await backend.embed(texts)
+
+
+_coalescer: EmbeddingsCoalescer | None = None
+_coalescer_loop: asyncio.AbstractEventLoop | None = None
+
+
+def get_query_coalescer() -> EmbeddingsCoalescer:
+    """
+    Process-wide coalescer for single-question embeddings.
+    Bound to the running event loop (a new loop gets a fresh coalescer).
+    """
+    global _coalescer, _coalescer_loop
+    loop = asyncio.get_running_loop()
+    if _coalescer is None or _coalescer_loop is not loop:
         s = get_settings()
+        _coalescer = EmbeddingsCoalescer(
+            embed=_embed_raw,
+            max_batch=s.embeddings_coalesce_max_batch,
+            window_ms=s.embeddings_coalesce_window_ms,
+        )
+        _coalescer_loop = loop
+    return _coalescer
 
-        backend: Literal["auto", "openai", "mock"] = getattr(s, "embeddings_backend", "auto")
+
+def peek_query_coalescer() -> EmbeddingsCoalescer | None:
+    """Current coalescer, if one was created (for stats; never creates one)."""
+    return _coalescer
+
+
+class EmbeddingsClient:
+    def __init__(self, *, cached: bool = False, coalesce: bool = False) -> None:
+        """
+        cached=True wraps the backend with the process-wide query-embedding cache
+        (used on the query path; ingestion embeds unique chunks and skips it).
+        coalesce=True routes single-text calls through the process-wide micro-batcher.
+        Must be constructed inside a running event loop when coalesce=True.
+        """
+        s = get_settings()
         dim: int = getattr(s, "embeddings_dim", 1536)
 
-        if backend == "auto":
-            backend = "openai" if getattr(s, "openai_api_key", None) else "mock"
+        backend, model = _build_backend()
+        self._backend: EmbeddingsBackend = backend
+        self._dim = dim
+        # ingestion and queries both embed through here, so stored and query vectors
+        # are unit-length whenever the inner-product operator searches them
+        self._normalize = s.vector_metric == "ip"
 
-        if backend == "openai":
-            api_key = getattr(s, "openai_api_key", None)
-            if not api_key:
-                raise RuntimeError("OPENAI_API_KEY is not set")
+        if coalesce and s.embeddings_coalesce_enabled:
+            self._backend = CoalescingEmbeddingsBackend(
+                inner=self._backend,
+                coalescer=get_query_coalescer(),
+            )
 
-            client = AsyncOpenAI(api_key=api_key, base_url=getattr(s, "openai_base_url", None))
-            model = getattr(s, "openai_embeddings_model", "text-embedding-3-small")
-            self._backend: EmbeddingsBackend = OpenAIEmbeddingsBackend(
-                client=client,
-                model=model,
-                _dim=dim,
+        if cached and s.embeddings_cache_enabled:
+            self._backend = CachedEmbeddingsBackend(
+                inner=self._backend,
+                cache=get_embedding_cache(),
+                namespace=f"emb:{model}:{dim}",
             )
-        else:
-            self._backend = MockEmbeddingsBackend(_dim=dim)
 
     @property
     def dim(self) -> int:
         return self._backend.dim
 
-    async def embed(self, texts: list[str]) -> list[list[float]]:
-        return await self._backend.embed(texts)
+    async def embed(self, texts: list[str]) -> list[EmbeddingArray]:
+        vectors = await self._backend.embed(texts)
+        # fail here rather than at INSERT time with a pgvector dimension error
+        for v in vectors:
+            if v.shape != (self._dim,):
+                raise ValueError(
+                    f"Embeddings backend returned {v.shape[0]}-dim vectors, chunks.embedding "
+                    f"expects {self._dim} (APP_EMBEDDINGS_DIM; see APP_EMBEDDINGS_TRUNCATE)"
+                )
+        if self._normalize:
+            # once per vector here, instead of a norm per comparison in the database
+            return normalize_embeddings(vectors)
+        return vectors
@@ -0,0 +1,24 @@
+from __future__ import annotations
+
+import codecs
+from collections.abc import Iterator
+from pathlib import Path
+
+
+def iter_text_file(path: Path, *, read_size: int = 64 * 1024) -> Iterator[str]:
+    """
+    Read a UTF-8 file incrementally. Multi-byte sequences split across reads are
+    handled by the incremental decoder; invalid bytes are replaced.
+    """
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    with path.open("rb") as f:
+        while True:
+            data = f.read(read_size)
+            if not data:
+                break
+            text = decoder.decode(data)
+            if text:
+                yield text
+    tail = decoder.decode(b"", final=True)
+    if tail:
+        yield tail
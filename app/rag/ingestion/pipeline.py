@@ -1,15 +1,28 @@
 from __future__ import annotations
 
+import asyncio
+import logging
+import time
 import uuid
+from collections.abc import Iterable, Iterator
+from itertools import islice
 
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.metrics import INGEST_CHUNKS, INGEST_CHUNKS_PER_SECOND
+from app.core.settings import get_settings
 from app.db.engine import get_session
-from app.rag.ingestion.chunking import chunk_text
+from app.db.types import EmbeddingArray
+from app.rag.doc_versions import bump_document_version
+from app.rag.ingestion.chunking import iter_chunks
 from app.rag.ingestion.embeddings import EmbeddingsClient
-from app.repos.chunks import ChunkRepository
+from app.rag.ingestion.types import IngestStats
+from app.rag.reranking import token_ids
+from app.repos.chunks import ChunkRepository, ChunkRow
 from app.repos.documents import DocumentRepository
 
+logger = logging.getLogger(__name__)
+
 
 async def ingest_text_document_bg(*, document_id: uuid.UUID, text: str) -> None:
     async for session in get_session():
@@ -22,43 +35,220 @@ async def ingest_text_document_bg(*, document_id: uuid.UUID, text: str) -> None:
         break
 
 
+def _batched(items: Iterable[str], size: int) -> Iterator[list[str]]:
+    it = iter(items)
+    while batch := list(islice(it, size)):
+        yield batch
+
+
 async def ingest_text_document(
     *,
     session: AsyncSession,
     document_id: uuid.UUID,
     text: str,
 ) -> None:
+    await ingest_text_stream(session=session, document_id=document_id, pieces=[text])
+
+
+async def ingest_text_stream(
+    *,
+    session: AsyncSession,
+    document_id: uuid.UUID,
+    pieces: Iterable[str],
+) -> None:
+    """
+    Bounded-memory ingestion: text pieces (e.g. incremental file reads) are chunked
+    lazily, and chunks are embedded and persisted in fixed-size batches
+    (APP_INGEST_BATCH_SIZE), each batch committed on its own.
+    Chunking, embedding and writing run as overlapping stages (see _run_stages).
+
+    Resumable: every committed batch advances documents.last_chunk_index, so a
+    retried/restarted job re-chunks the text but only embeds and writes the
+    chunks after the checkpoint.
+    """
+    s = get_settings()
     doc_repo = DocumentRepository(session)
     chunk_repo = ChunkRepository(session)
+
+    doc = await doc_repo.get(document_id=document_id)
+    last = doc.last_chunk_index if doc is not None else None
+    start_index = last + 1 if last is not None else 0
+    if start_index:
+        logger.info("ingest_resume doc=%s from_chunk=%s", document_id, start_index)
+
     await doc_repo.set_status(document_id=document_id, status="processing")
     await session.commit()
 
     emb = EmbeddingsClient()
+    # filled in by the stages as they run: on failure it holds how far each one got
+    stats = IngestStats()
 
     try:
-        chunks = chunk_text(text)
-        if not chunks:
+        await _run_stages(
+            session=session,
+            chunk_repo=chunk_repo,
+            doc_repo=doc_repo,
+            emb=emb,
+            document_id=document_id,
+            pieces=pieces,
+            start_index=start_index,
+            stats=stats,
+        )
+
+        if start_index + stats.writer.chunks == 0:
             await doc_repo.set_status(
                 document_id=document_id, status="failed", error="Empty document text"
             )
             await session.commit()
             return
 
-        vectors = await emb.embed(chunks)
-
-        for idx, (ch, vec) in enumerate(zip(chunks, vectors, strict=True)):
-            await chunk_repo.add_chunk(
-                document_id=document_id,
-                chunk_index=idx,
-                text=ch,
-                embedding=vec,
-                page=None,
-            )
-
         await doc_repo.set_status(document_id=document_id, status="ready")
+        await doc_repo.set_ingest_stats(document_id=document_id, stats=stats.as_dict())
         await session.commit()
+        # set_status bumped before the commit; bump again so results cached from
+        # the not-yet-committed state in between can't be served
+        await bump_document_version(document_id)
+
+        if stats.wall_s > 0 and stats.writer.chunks:
+            INGEST_CHUNKS_PER_SECOND.observe(stats.writer.chunks / stats.wall_s)
+
+        logger.info(
+            "ingest_done doc=%s chunks=%s wall_ms=%.2f chunks_per_s=%.1f embed_concurrency=%s",
+            document_id,
+            stats.writer.chunks,
+            stats.wall_s * 1000.0,
+            stats.writer.chunks / stats.wall_s if stats.wall_s > 0 else 0.0,
+            s.ingest_embed_concurrency,
+        )
 
     except Exception as e:
+        await session.rollback()
         await doc_repo.set_status(document_id=document_id, status="failed", error=str(e))
+        # partial per-stage throughput / queue depths: which stage stalled or failed
+        await doc_repo.set_ingest_stats(document_id=document_id, stats=stats.as_dict())
         await session.commit()
         raise
+
+
+# (seq, first chunk_index, texts)
+_EmbedItem = tuple[int, int, list[str]]
+# (seq, first chunk_index, texts, vectors)
+_WriteItem = tuple[int, int, list[str], list[EmbeddingArray]]
+
+
+async def _run_stages(
+    *,
+    session: AsyncSession,
+    chunk_repo: ChunkRepository,
+    doc_repo: DocumentRepository,
+    emb: EmbeddingsClient,
+    document_id: uuid.UUID,
+    pieces: Iterable[str],
+    start_index: int = 0,
+    stats: IngestStats | None = None,
+) -> IngestStats:
+    """
+    chunker -> [queue] -> N embedders -> [queue] -> writer
+
+    Queues are bounded (APP_INGEST_QUEUE_SIZE batches), up to APP_INGEST_EMBED_CONCURRENCY
+    embedding requests are in flight, and the writer commits batch k while later
+    batches are still being embedded. The writer commits in chunk_index order, so
+    the committed chunks always form a contiguous prefix of the document, and the
+    checkpoint is written in the same transaction as each batch.
+    Chunks before `start_index` are skipped (already committed by a previous run).
+    `stats` is updated in place, so a caller that passes it in still has the partial
+    numbers when a stage fails.
+    """
+    s = get_settings()
+    if stats is None:
+        stats = IngestStats()
+    concurrency = max(1, s.ingest_embed_concurrency)
+    to_embed: asyncio.Queue[_EmbedItem | None] = asyncio.Queue(maxsize=s.ingest_queue_size)
+    to_write: asyncio.Queue[_WriteItem | None] = asyncio.Queue(maxsize=s.ingest_queue_size)
+
+    async def chunker() -> None:
+        batches = _batched(islice(iter_chunks(pieces), start_index, None), s.ingest_batch_size)
+        seq = 0
+        next_index = start_index
+        while True:
+            t0 = time.perf_counter()
+            batch = next(batches, None)
+            stats.chunker.busy_s += time.perf_counter() - t0
+            if batch is None:
+                break
+
+            await to_embed.put((seq, next_index, batch))
+            stats.chunker.chunks += len(batch)
+            stats.chunker.batches += 1
+            stats.chunker.observe_queue(to_embed.qsize())
+            seq += 1
+            next_index += len(batch)
+
+        for _ in range(concurrency):
+            await to_embed.put(None)
+
+    async def embedder() -> None:
+        while (item := await to_embed.get()) is not None:
+            seq, start, texts = item
+            t0 = time.perf_counter()
+            vectors = await emb.embed(texts)
+            stats.embedder.busy_s += time.perf_counter() - t0
+
+            await to_write.put((seq, start, texts, vectors))
+            stats.embedder.chunks += len(texts)
+            stats.embedder.batches += 1
+            stats.embedder.observe_queue(to_write.qsize())
+
+    async def embedders() -> None:
+        async with asyncio.TaskGroup() as tg:
+            for _ in range(concurrency):
+                tg.create_task(embedder())
+        await to_write.put(None)
+
+    async def writer() -> None:
+        pending: dict[int, _WriteItem] = {}
+        next_seq = 0
+        while (item := await to_write.get()) is not None:
+            pending[item[0]] = item
+            while next_seq in pending:
+                _, start, texts, vectors = pending.pop(next_seq)
+                t0 = time.perf_counter()
+                await chunk_repo.add_chunks(
+                    document_id=document_id,
+                    rows=[
+                        ChunkRow(
+                            chunk_index=start + k,
+                            text=ch,
+                            embedding=vec,
+                            token_ids=token_ids(ch),
+                        )
+                        for k, (ch, vec) in enumerate(zip(texts, vectors, strict=True))
+                    ],
+                    page_size=s.ingest_insert_page_size,
+                )
+                await doc_repo.set_checkpoint(
+                    document_id=document_id, last_chunk_index=start + len(texts) - 1
+                )
+                await session.commit()
+                stats.writer.busy_s += time.perf_counter() - t0
+                stats.writer.chunks += len(texts)
+                stats.writer.batches += 1
+                INGEST_CHUNKS.inc(len(texts))
+                next_seq += 1
+
+    t_wall = time.perf_counter()
+    try:
+        async with asyncio.TaskGroup() as tg:
+            tg.create_task(chunker())
+            tg.create_task(embedders())
+            tg.create_task(writer())
+    except BaseExceptionGroup as eg:
+        # surface the first real failure (siblings were cancelled because of it)
+        first = eg.exceptions[0]
+        while isinstance(first, BaseExceptionGroup):
+            first = first.exceptions[0]
+        raise first from None
+    finally:
+        stats.wall_s = time.perf_counter() - t_wall
+
+    return stats
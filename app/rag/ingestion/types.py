@@ -0,0 +1,45 @@
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from typing import Any
+
+
+@dataclass(slots=True)
+class StageStats:
+    chunks: int = 0
+    batches: int = 0
+    busy_s: float = 0.0
+    # depth of the stage's output queue, sampled after every put
+    max_queue_depth: int = 0
+    _depth_sum: int = 0
+
+    def observe_queue(self, depth: int) -> None:
+        self.max_queue_depth = max(self.max_queue_depth, depth)
+        self._depth_sum += depth
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "chunks": self.chunks,
+            "batches": self.batches,
+            "busy_ms": round(self.busy_s * 1000.0, 3),
+            "chunks_per_s": round(self.chunks / self.busy_s, 1) if self.busy_s > 0 else None,
+            "max_queue_depth": self.max_queue_depth,
+            "avg_queue_depth": round(self._depth_sum / self.batches, 2) if self.batches else 0.0,
+        }
+
+
+@dataclass(slots=True)
+class IngestStats:
+    chunker: StageStats = field(default_factory=StageStats)
+    embedder: StageStats = field(default_factory=StageStats)
+    writer: StageStats = field(default_factory=StageStats)
+    wall_s: float = 0.0
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "wall_ms": round(self.wall_s * 1000.0, 3),
+            "chunks_per_s": round(self.writer.chunks / self.wall_s, 1) if self.wall_s > 0 else None,
+            "chunker": self.chunker.as_dict(),
+            "embedder": self.embedder.as_dict(),
+            "writer": self.writer.as_dict(),
+        }
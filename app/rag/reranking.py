@@ -1,11 +1,15 @@
 from __future__ import annotations
 
+import hashlib
 import math
 import re
-from collections.abc import Callable, Iterable
+from collections.abc import Callable, Iterable, Sequence
 from dataclasses import dataclass
 from typing import Generic, TypeVar
 
+import numpy as np
+import numpy.typing as npt
+
 T = TypeVar("T")
 
 _WORD_RE = re.compile(r"[a-z0-9]+")
@@ -16,6 +20,18 @@ def _tokens(text: str) -> set[str]:
     return set(_WORD_RE.findall(text.lower()))
 
 
+def _token_id(token: str) -> int:
+    # stable across processes (unlike hash()), fits a Postgres BIGINT
+    return int.from_bytes(
+        hashlib.blake2b(token.encode("utf-8"), digest_size=8).digest(), "little", signed=True
+    )
+
+
+def token_ids(text: str) -> list[int]:
+    """Sorted unique hashed token ids of `text` (same tokens as overlap_score uses)."""
+    return sorted({_token_id(t) for t in _tokens(text)})
+
+
 def overlap_score(question: str, chunk_text: str) -> float:
     q = _tokens(question)
     c = _tokens(chunk_text)
@@ -27,6 +43,31 @@ def overlap_score(question: str, chunk_text: str) -> float:
     return float(inter) / float(denom) if denom > 0 else 0.0
 
 
+def overlap_scores(
+    question_ids: Sequence[int],
+    chunk_ids: Sequence[Sequence[int]],
+) -> npt.NDArray[np.float64]:
+    """
+    overlap_score for many chunks in one vectorized pass.
+    Inputs are unique token ids (see token_ids); output[i] is |q ∩ c_i| / sqrt(|q| * |c_i|).
+    """
+    n = len(chunk_ids)
+    lens = np.fromiter((len(c) for c in chunk_ids), dtype=np.int64, count=n)
+    q = np.asarray(question_ids, dtype=np.int64)
+    if n == 0 or q.size == 0:
+        return np.zeros(n, dtype=np.float64)
+
+    flat = np.fromiter((t for c in chunk_ids for t in c), dtype=np.int64, count=int(lens.sum()))
+    hits = np.concatenate(([0], np.cumsum(np.isin(flat, q))))
+    ends = np.cumsum(lens)
+    inter = hits[ends] - hits[ends - lens]
+
+    denom = np.sqrt((q.size * lens).astype(np.float64))
+    out = np.zeros(n, dtype=np.float64)
+    np.divide(inter, denom, out=out, where=denom > 0)
+    return out
+
+
 @dataclass(frozen=True, slots=True)
 class RerankedItem(Generic[T]):
     item: T
@@ -39,18 +80,28 @@ def rerank_by_overlap(
     items: Iterable[RerankedItem[T]],
     get_text: Callable[[T], str],
     weight: float,
+    get_token_ids: Callable[[T], Sequence[int] | None] | None = None,
 ) -> list[RerankedItem[T]]:
     """
     Combine original score with token-overlap score.
     final = (1-weight)*orig + weight*overlap
+
+    The question is tokenized once; chunks use their precomputed token ids when
+    `get_token_ids` returns them (stored at ingestion), otherwise their text is tokenized.
     """
     w = max(0.0, min(1.0, weight))
+    its = list(items)
+
+    q_ids = token_ids(question)
+    c_ids: list[Sequence[int]] = []
+    for it in its:
+        ids = get_token_ids(it.item) if get_token_ids is not None else None
+        c_ids.append(ids if ids is not None else token_ids(get_text(it.item)))
 
-    out: list[RerankedItem[T]] = []
-    for it in items:
-        ov = overlap_score(question, get_text(it.item))
-        final = (1.0 - w) * it.score + w * ov
-        out.append(RerankedItem(item=it.item, score=final))
+    ov = overlap_scores(q_ids, c_ids)
+    orig = np.fromiter((it.score for it in its), dtype=np.float64, count=len(its))
+    final = ((1.0 - w) * orig + w * ov).tolist()
 
+    out = [RerankedItem(item=it.item, score=f) for it, f in zip(its, final, strict=True)]
     out.sort(key=lambda x: x.score, reverse=True)
     return out
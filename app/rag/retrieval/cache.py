@@ -0,0 +1,101 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import uuid
+from dataclasses import asdict, dataclass
+from typing import TYPE_CHECKING
+
+from app.core.cache import TTLCache
+from app.core.metrics import CACHE_LOOKUPS
+from app.core.settings import Settings, get_settings
+
+if TYPE_CHECKING:
+    from app.api.v1.schemas.query import SourceChunk
+    from app.rag.answering.types import SearchParams
+
+
+@dataclass(slots=True)
+class RetrievalCacheStats:
+    hits: int = 0
+    misses: int = 0
+
+    def as_dict(self) -> dict[str, int]:
+        return asdict(self)
+
+
+def retrieval_cache_key(
+    *,
+    s: Settings,
+    document_id: uuid.UUID,
+    version: int,
+    question: str,
+    top_k: int,
+    search_params: SearchParams,
+) -> str:
+    """
+    Everything that changes the final (reranked) sources is part of the key;
+    the document version makes entries from before a re-ingestion unreachable.
+    """
+    parts = [
+        question.strip(),
+        top_k,
+        s.embeddings_backend,
+        s.embeddings_dim,
+        s.retrieval_mode,
+        s.rrf_k,
+        s.lexical_ts_config,
+        s.rerank_backend,
+        s.rerank_weight,
+        s.rerank_candidates_multiplier,
+        search_params.index_mode,
+        search_params.ef_search,
+        search_params.probes,
+        search_params.vector_storage,
+        search_params.vector_metric,
+        search_params.iterative_scan,
+        s.vector_rerank_multiplier,
+    ]
+    digest = hashlib.sha256(json.dumps(parts).encode("utf-8")).hexdigest()
+    return f"ret:{document_id}:{version}:{digest}"
+
+
+class RetrievalCache:
+    """In-process LRU+TTL of final retrieval results (sources after rerank)."""
+
+    def __init__(self, *, maxsize: int, ttl_s: float) -> None:
+        self._local: TTLCache[str, list[SourceChunk]] = TTLCache(maxsize=maxsize, ttl_s=ttl_s)
+        self.stats = RetrievalCacheStats()
+
+    def get(self, key: str) -> list[SourceChunk] | None:
+        sources = self._local.get(key)
+        if sources is None:
+            self.stats.misses += 1
+            CACHE_LOOKUPS.labels(cache="retrieval", result="miss").inc()
+        else:
+            self.stats.hits += 1
+            CACHE_LOOKUPS.labels(cache="retrieval", result="hit").inc()
+        return sources
+
+    def set(self, key: str, sources: list[SourceChunk]) -> None:
+        self._local.set(key, sources)
+
+    def clear(self) -> None:
+        self._local.clear()
+
+
+_cache: RetrievalCache | None = None
+
+
+def get_retrieval_cache() -> RetrievalCache:
+    """Process-wide retrieval-result cache (lazy singleton)."""
+    global _cache
+    if _cache is None:
+        s = get_settings()
+        _cache = RetrievalCache(maxsize=s.retrieval_cache_size, ttl_s=s.retrieval_cache_ttl_s)
+    return _cache
+
+
+def peek_retrieval_cache() -> RetrievalCache | None:
+    """Current cache, if one was created (for stats; never creates one)."""
+    return _cache
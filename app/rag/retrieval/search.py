@@ -0,0 +1,47 @@
+from __future__ import annotations
+
+import re
+from collections.abc import Sequence
+from dataclasses import replace
+
+from app.repos.chunks import ChunkHit
+
+_LEXEME_RE = re.compile(r"\w+")
+
+
+def build_lexical_query(question: str) -> str | None:
+    """
+    OR-query for to_tsquery: any question term may match, ts_rank_cd rewards chunks
+    that cover more of them. Terms are \\w+ runs, so no tsquery syntax can leak in.
+    """
+    terms = dict.fromkeys(t.lower() for t in _LEXEME_RE.findall(question))
+    if not terms:
+        return None
+    return " | ".join(f"'{t}'" for t in terms)
+
+
+def reciprocal_rank_fusion(
+    result_lists: Sequence[Sequence[ChunkHit]],
+    *,
+    k: int = 60,
+    limit: int | None = None,
+) -> list[ChunkHit]:
+    """
+    RRF: score(d) = sum over lists of 1 / (k + rank(d)), rank starting at 1.
+    Scores are divided by the best possible value (len(lists) / (k + 1)), so they
+    stay in 0..1 like vector scores and can be blended by the overlap reranker.
+    """
+    fused: dict[int, float] = {}
+    first_seen: dict[int, ChunkHit] = {}
+
+    for hits in result_lists:
+        for rank, hit in enumerate(hits, start=1):
+            fused[hit.chunk_index] = fused.get(hit.chunk_index, 0.0) + 1.0 / (k + rank)
+            first_seen.setdefault(hit.chunk_index, hit)
+
+    best = len(result_lists) / (k + 1) if result_lists else 1.0
+    ranked = sorted(fused.items(), key=lambda kv: kv[1], reverse=True)
+    if limit is not None:
+        ranked = ranked[:limit]
+
+    return [replace(first_seen[idx], score=score / best) for idx, score in ranked]
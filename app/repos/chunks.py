@@ -1,12 +1,63 @@
 from __future__ import annotations
 
 import uuid
+from collections.abc import Sequence
+from dataclasses import dataclass
 from typing import cast
 
-from sqlalchemy import select
+from sqlalchemy import bindparam, func, select, text
+from sqlalchemy import cast as sa_cast
+from sqlalchemy.dialects.postgresql import REGCONFIG
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.db.models import Chunk
+from app.db.models import EMBEDDING_DIM, Chunk
+from app.db.types import (
+    QUANTIZED_STORAGE,
+    EmbeddingArray,
+    NumpyVector,
+    quantized_distance,
+    vector_distance,
+)
+
+_ITERATIVE_SCANS = ("strict_order", "relaxed_order")
+_MAX_BIND_PARAMS = 32767
+
+
+def distance_score(distance: float | None, metric: str = "cosine") -> float:
+    """
+    Similarity score in (0, 1] from a search distance: 1 / (1 + cosine distance).
+    For unit vectors `<#>` returns -dot = cosine distance - 1, so "ip" lands on the
+    same scale and score thresholds / rerank weights need no retuning. Clamped, since
+    non-unit rows under "ip" (see verify_vector_metric) can give any negative distance.
+    """
+    if distance is None:
+        return 0.0
+    if metric == "ip":
+        distance += 1.0
+    return 1.0 / (1.0 + max(distance, 0.0))
+
+
+@dataclass(frozen=True, slots=True)
+class ChunkHit:
+    """Lightweight retrieval result: only the columns the query path reads."""
+
+    chunk_index: int
+    text: str
+    score: float
+    # hashed token ids precomputed at ingestion (None for rows ingested before they existed)
+    token_ids: list[int] | None = None
+
+
+@dataclass(frozen=True, slots=True)
+class ChunkRow:
+    """One chunk to be written by ChunkRepository.add_chunks."""
+
+    chunk_index: int
+    text: str
+    embedding: EmbeddingArray | None
+    page: int | None = None
+    token_ids: list[int] | None = None
 
 
 class ChunkRepository:
@@ -19,7 +70,7 @@ class ChunkRepository:
         document_id: uuid.UUID,
         chunk_index: int,
         text: str,
-        embedding: list[float] | None,
+        embedding: EmbeddingArray | None,
         page: int | None = None,
     ) -> Chunk:
         chunk = Chunk(
@@ -32,19 +83,117 @@ class ChunkRepository:
         self._session.add(chunk)
         return chunk
 
+    async def add_chunks(
+        self,
+        *,
+        document_id: uuid.UUID,
+        rows: Sequence[ChunkRow],
+        page_size: int = 1000,
+    ) -> int:
+        """
+        Bulk insert: one multi-row INSERT ... VALUES statement per `page_size` rows
+        (asyncpg would otherwise run an executemany of single-row INSERTs, since
+        SQLAlchemy only batches it when a RETURNING clause is present). Bypasses the
+        ORM unit of work, so no Chunk objects are created or tracked. Returns the
+        number of rows sent.
+
+        Idempotent on (document_id, chunk_index): rows that already exist (e.g. a
+        retried ingestion batch) are skipped via ON CONFLICT DO NOTHING.
+        """
+        if not rows:
+            return 0
+
+        values = [
+            {
+                "id": uuid.uuid4(),
+                "document_id": document_id,
+                "chunk_index": r.chunk_index,
+                "page": r.page,
+                "text": r.text,
+                "embedding": r.embedding,
+                "token_ids": r.token_ids,
+            }
+            for r in rows
+        ]
+        # one bind parameter per column per row, within PostgreSQL's 32767 limit
+        page_size = max(1, min(page_size, _MAX_BIND_PARAMS // len(values[0])))
+        for start in range(0, len(values), page_size):
+            stmt = (
+                pg_insert(Chunk)
+                .values(values[start : start + page_size])
+                .on_conflict_do_nothing(index_elements=[Chunk.document_id, Chunk.chunk_index])
+            )
+            await self._session.execute(stmt)
+        return len(rows)
+
+    async def set_search_params(
+        self,
+        *,
+        ef_search: int | None = None,
+        probes: int | None = None,
+        iterative_scan: str | None = None,
+        index_mode: str = "hnsw",
+    ) -> None:
+        """
+        Per-query ANN knobs. SET LOCAL only lives until the end of the current
+        transaction, so this must run in the same transaction as the search.
+
+        `iterative_scan` (pgvector >= 0.8) makes the `index_mode` index keep scanning
+        until enough rows pass the document filter, which is otherwise applied only
+        to the ef_search / probes rows the index returns.
+        """
+        if ef_search is not None:
+            await self._session.execute(text(f"SET LOCAL hnsw.ef_search = {int(ef_search)}"))
+        if probes is not None:
+            await self._session.execute(text(f"SET LOCAL ivfflat.probes = {int(probes)}"))
+        if iterative_scan is not None:
+            if index_mode not in ("hnsw", "ivfflat") or iterative_scan not in _ITERATIVE_SCANS:
+                raise ValueError(f"Unsupported iterative scan: {index_mode}/{iterative_scan}")
+            await self._session.execute(
+                text(f"SET LOCAL {index_mode}.iterative_scan = {iterative_scan}")
+            )
+
+    async def has_chunks_table(self) -> bool:
+        """Whether the chunks table exists yet (False before the migrations ran)."""
+        res = await self._session.execute(text("SELECT to_regclass('chunks') IS NOT NULL"))
+        return bool(res.scalar_one())
+
+    async def ann_operator_classes(self) -> list[str]:
+        """Operator classes of the ANN indexes on chunks.embedding (empty without one)."""
+        res = await self._session.execute(
+            text(
+                "SELECT DISTINCT opc.opcname FROM pg_index i "
+                "JOIN pg_class c ON c.oid = i.indexrelid "
+                "JOIN pg_opclass opc ON opc.oid = ANY(i.indclass) "
+                "WHERE i.indrelid = 'chunks'::regclass "
+                "AND c.relname LIKE 'ix_chunks_embedding%' ORDER BY 1"
+            )
+        )
+        return list(res.scalars())
+
+    async def sample_embedding_norms(self, *, limit: int) -> list[float]:
+        """L2 norms of up to `limit` stored embeddings (any rows, no ordering)."""
+        res = await self._session.execute(
+            select(func.vector_norm(Chunk.embedding))
+            .where(Chunk.embedding.is_not(None))
+            .limit(limit)
+        )
+        return [float(n) for n in res.scalars()]
+
     async def search_by_embedding(
         self,
         *,
         document_id: uuid.UUID,
-        query_embedding: list[float],
+        query_embedding: EmbeddingArray,
         limit: int = 5,
+        metric: str = "cosine",
     ) -> list[Chunk]:
-        # cosine distance: smaller is closer
+        # cosine distance / negative inner product: smaller is closer
         stmt = (
             select(Chunk)
             .where(Chunk.document_id == document_id)
             .where(Chunk.embedding.is_not(None))
-            .order_by(Chunk.embedding.cosine_distance(query_embedding))
+            .order_by(vector_distance(Chunk.embedding, query_embedding, metric=metric))
             .limit(limit)
         )
         res = await self._session.execute(stmt)
@@ -55,13 +204,14 @@ class ChunkRepository:
         self,
         *,
         document_id: uuid.UUID,
-        query_embedding: list[float],
+        query_embedding: EmbeddingArray,
         limit: int,
+        metric: str = "cosine",
     ) -> list[tuple[Chunk, float]]:
         """
-        Returns (Chunk, score) where lower distance => higher score
+        Returns (Chunk, score) where lower distance => higher score (see distance_score)
         """
-        distance = Chunk.embedding.cosine_distance(query_embedding)
+        distance = vector_distance(Chunk.embedding, query_embedding, metric=metric)
 
         stmt = (
             select(Chunk, distance.label("distance"))
@@ -75,7 +225,107 @@ class ChunkRepository:
 
         rows: list[tuple[Chunk, float]] = []
         for chunk, dist in res.all():
-            score = 1.0 / (1.0 + dist) if dist is not None else 0.0
-            rows.append((chunk, score))
+            rows.append((chunk, distance_score(dist, metric)))
 
         return rows
+
+    async def search_hits(
+        self,
+        *,
+        document_id: uuid.UUID,
+        query_embedding: EmbeddingArray,
+        limit: int,
+        storage: str = "full",
+        candidates: int | None = None,
+        metric: str = "cosine",
+    ) -> list[ChunkHit]:
+        """
+        Projection-only variant of search_with_score.
+        Selects plain columns (no embedding, no ORM hydration) and maps rows to ChunkHit.
+
+        With a quantized `storage` ("halfvec"/"binary", see APP_VECTOR_STORAGE) the
+        quantized ANN index picks `candidates` rows first, and those are re-scored by
+        full-precision distance in the same statement.
+
+        `metric="ip"` (APP_VECTOR_METRIC) expects unit-length stored and query vectors
+        and orders by negative inner product instead of cosine distance.
+        """
+        if storage in QUANTIZED_STORAGE:
+            # typed explicitly: binary_quantize() is overloaded, an untyped $n is ambiguous
+            vector_type = NumpyVector(EMBEDDING_DIM)
+            query = sa_cast(
+                bindparam("query_embedding", query_embedding, type_=vector_type), vector_type
+            )
+            first_pass = (
+                select(Chunk.chunk_index, Chunk.text, Chunk.token_ids, Chunk.embedding)
+                .where(Chunk.document_id == document_id)
+                .where(Chunk.embedding.is_not(None))
+                .order_by(
+                    quantized_distance(
+                        Chunk.embedding, query, storage=storage, dim=EMBEDDING_DIM, metric=metric
+                    )
+                )
+                .limit(max(limit, candidates or limit))
+                .subquery("candidates")
+            )
+            rescored = vector_distance(first_pass.c.embedding, query, metric=metric)
+            stmt = (
+                select(
+                    first_pass.c.chunk_index,
+                    first_pass.c.text,
+                    first_pass.c.token_ids,
+                    rescored.label("distance"),
+                )
+                .order_by(rescored)
+                .limit(limit)
+            )
+        else:
+            distance = vector_distance(Chunk.embedding, query_embedding, metric=metric)
+            stmt = (
+                select(Chunk.chunk_index, Chunk.text, Chunk.token_ids, distance.label("distance"))
+                .where(Chunk.document_id == document_id)
+                .where(Chunk.embedding.is_not(None))
+                .order_by(distance)
+                .limit(limit)
+            )
+
+        res = await self._session.execute(stmt)
+
+        return [
+            ChunkHit(
+                chunk_index=chunk_index,
+                text=text,
+                score=distance_score(dist, metric),
+                token_ids=ids,
+            )
+            for chunk_index, text, ids, dist in res.tuples()
+        ]
+
+    async def search_lexical(
+        self,
+        *,
+        document_id: uuid.UUID,
+        ts_query: str,
+        ts_config: str,
+        limit: int,
+    ) -> list[ChunkHit]:
+        """
+        Full-text leg of hybrid retrieval: GIN-indexed chunks.text_tsv @@ to_tsquery,
+        ranked by ts_rank_cd. `ts_query` is a to_tsquery expression (see build_lexical_query).
+        """
+        tsq = func.to_tsquery(sa_cast(ts_config, REGCONFIG), ts_query)
+        rank = func.ts_rank_cd(Chunk.text_tsv, tsq)
+
+        stmt = (
+            select(Chunk.chunk_index, Chunk.text, Chunk.token_ids, rank.label("rank"))
+            .where(Chunk.document_id == document_id)
+            .where(Chunk.text_tsv.op("@@")(tsq))
+            .order_by(rank.desc())
+            .limit(limit)
+        )
+
+        res = await self._session.execute(stmt)
+        return [
+            ChunkHit(chunk_index=chunk_index, text=chunk_text, score=float(r), token_ids=ids)
+            for chunk_index, chunk_text, ids, r in res.tuples()
+        ]
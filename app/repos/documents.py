@@ -1,11 +1,13 @@
 from __future__ import annotations
 
 import uuid
+from typing import Any
 
-from sqlalchemy import select
+from sqlalchemy import select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.db.models import Document
+from app.rag.doc_versions import bump_document_version
 
 
 class DocumentRepository:
@@ -30,3 +32,20 @@ class DocumentRepository:
             return
         doc.status = status
         doc.error = error
+        # any status change means content is (being) replaced: invalidate version-keyed caches
+        await bump_document_version(document_id)
+
+    async def set_ingest_stats(self, *, document_id: uuid.UUID, stats: dict[str, Any]) -> None:
+        doc = await self.get(document_id=document_id)
+        if doc is None:
+            return
+        doc.ingest_stats = stats
+
+    async def set_checkpoint(self, *, document_id: uuid.UUID, last_chunk_index: int) -> None:
+        """Record ingestion progress; meant to run in the same transaction as the chunk write."""
+        await self._session.execute(
+            update(Document)
+            .where(Document.id == document_id)
+            .values(last_chunk_index=last_chunk_index)
+            .execution_options(synchronize_session=False)
+        )
@@ -1,40 +1,59 @@
 from __future__ import annotations
 
+import os
 import uuid
 from collections.abc import Awaitable, Callable
 from pathlib import Path
 from typing import Any, ClassVar
 
 from arq.connections import RedisSettings
+from arq.worker import Retry
+from prometheus_client import multiprocess
 
 from app.core.settings import get_settings
 from app.db.engine import close_engine, get_session, init_engine
-from app.rag.ingestion.pipeline import ingest_text_document
+from app.infra.clients import close_clients, init_clients
+from app.infra.redis import close_redis
+from app.rag.ingestion.parsers.text import iter_text_file
+from app.rag.ingestion.pipeline import ingest_text_stream
 from app.repos.documents import DocumentRepository
 
+RETRY_BACKOFF_S = 5
+
 
 async def startup(ctx: Any) -> None:
     init_engine()
+    init_clients()
 
 
 async def shutdown(ctx: Any) -> None:
+    await close_redis()
+    await close_clients()
     await close_engine()
+    if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        multiprocess.mark_process_dead(os.getpid())  # type: ignore[no-untyped-call]
 
 
 async def ingest_document(ctx: Any, *, document_id: str, file_path: str) -> None:
+    """
+    Failures are retried (arq only retries on Retry) with a growing delay; the
+    pipeline resumes from the document's last committed chunk.
+    """
     doc_id = uuid.UUID(document_id)
+    job_try = int(ctx.get("job_try", 1))
 
-    # читаем файл (пока только как текст)
-    path = Path(file_path)
-    with path.open("rb") as f:
-        data = f.read()
-    text = data.decode("utf-8", errors="replace")
+    # stream the file (text only for now): memory stays flat as the file grows
+    pieces = iter_text_file(Path(file_path), read_size=get_settings().ingest_read_size)
 
     async for session in get_session():
         repo = DocumentRepository(session)
         try:
-            await ingest_text_document(session=session, document_id=doc_id, text=text)
+            await ingest_text_stream(session=session, document_id=doc_id, pieces=pieces)
         except Exception as e:
+            if job_try < WorkerSettings.max_tries:
+                await repo.set_status(document_id=doc_id, status="retrying", error=str(e))
+                await session.commit()
+                raise Retry(defer=job_try * RETRY_BACKOFF_S) from e
             await repo.set_status(document_id=doc_id, status="failed", error=str(e))
             await session.commit()
             raise
@@ -0,0 +1,321 @@
+"""
+Async load generator: replays a JSONL query workload against a running API.
+
+Closed loop (fixed concurrency) or open loop (fixed arrival rate), then reports
+throughput and p50/p95/p99 of client latency and of every QueryTimings stage,
+and saves the run as JSON for `compare`.
+
+    # local stack: mock embeddings + local pgvector (docker compose up), API on :8000
+    python -m bench.loadgen run --upload bench/workloads/sample_doc.txt \\
+        --workload bench/workloads/sample.jsonl --concurrency 16 --requests 500 \\
+        --out bench/results/baseline.json
+    python -m bench.loadgen run ... --rate 50 --duration 30 --out bench/results/new.json
+    python -m bench.loadgen compare bench/results/baseline.json bench/results/new.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import subprocess
+import sys
+import time
+from collections import Counter
+from dataclasses import asdict, dataclass, field
+from datetime import UTC, datetime
+from pathlib import Path
+from typing import Any
+
+import httpx
+
+from bench.report import compare, format_table, summarize
+
+DOCUMENT_ID_PLACEHOLDER = "${DOCUMENT_ID}"
+STAGES = (
+    "embed_query_ms",
+    "vector_search_ms",
+    "lexical_search_ms",
+    "rerank_ms",
+    "llm_ms",
+    "llm_first_token_ms",
+    "total_ms",
+)
+
+
+@dataclass(frozen=True)
+class LoadConfig:
+    url: str = "http://127.0.0.1:8000"
+    endpoint: str = "/api/v1/query"
+    concurrency: int = 8  # closed loop: requests in flight
+    rate: float | None = None  # open loop: arrivals per second (overrides concurrency)
+    requests: int | None = 200
+    duration_s: float | None = None
+    warmup: int = 0  # requests sent first and left out of the results
+    timeout_s: float = 60.0
+
+
+@dataclass(slots=True)
+class Sample:
+    latency_ms: float
+    status: int
+    timings: dict[str, float] = field(default_factory=dict)
+    retrieval_cache_hit: bool = False
+    answer_cache_hit: bool = False
+
+
+def load_workload(path: Path, *, document_id: str | None = None) -> list[dict[str, Any]]:
+    """One query body per line; `${DOCUMENT_ID}` is replaced by `document_id`."""
+    items: list[dict[str, Any]] = []
+    for line in path.read_text(encoding="utf-8").splitlines():
+        if not line.strip():
+            continue
+        item = json.loads(line)
+        if item.get("document_id") == DOCUMENT_ID_PLACEHOLDER:
+            if document_id is None:
+                raise SystemExit(f"{path} uses {DOCUMENT_ID_PLACEHOLDER}: pass --document-id")
+            item["document_id"] = document_id
+        items.append(item)
+    if not items:
+        raise SystemExit(f"{path} has no queries")
+    return items
+
+
+async def _send(client: httpx.AsyncClient, cfg: LoadConfig, body: dict[str, Any]) -> Sample:
+    t0 = time.perf_counter()
+    try:
+        resp = await client.post(cfg.endpoint, json=body)
+    except httpx.HTTPError:
+        return Sample(latency_ms=(time.perf_counter() - t0) * 1000.0, status=0)
+    latency_ms = (time.perf_counter() - t0) * 1000.0
+
+    sample = Sample(latency_ms=latency_ms, status=resp.status_code)
+    if resp.status_code == 200:
+        data = resp.json()
+        sample.timings = {k: float(v) for k, v in data.get("timings", {}).items()}
+        meta = data.get("meta", {})
+        sample.retrieval_cache_hit = bool(meta.get("retrieval_cache_hit"))
+        sample.answer_cache_hit = bool(meta.get("answer_cache_hit"))
+    return sample
+
+
+async def _closed_loop(
+    client: httpx.AsyncClient, cfg: LoadConfig, workload: list[dict[str, Any]], n: int | None
+) -> list[Sample]:
+    samples: list[Sample] = []
+    deadline = time.perf_counter() + cfg.duration_s if cfg.duration_s else None
+    next_i = 0
+
+    async def worker() -> None:
+        nonlocal next_i
+        while (n is None or next_i < n) and (deadline is None or time.perf_counter() < deadline):
+            i, next_i = next_i, next_i + 1
+            samples.append(await _send(client, cfg, workload[i % len(workload)]))
+
+    await asyncio.gather(*(worker() for _ in range(max(1, cfg.concurrency))))
+    return samples
+
+
+async def _open_loop(
+    client: httpx.AsyncClient, cfg: LoadConfig, workload: list[dict[str, Any]], n: int
+) -> list[Sample]:
+    assert cfg.rate is not None
+    interval = 1.0 / cfg.rate
+    start = time.perf_counter()
+
+    async def scheduled(i: int) -> Sample:
+        # latency counts from the planned arrival, not from when the request got out:
+        # a stalled server must not hide its queueing delay (coordinated omission)
+        planned = start + i * interval
+        sample = await _send(client, cfg, workload[i % len(workload)])
+        sample.latency_ms = (time.perf_counter() - planned) * 1000.0
+        return sample
+
+    tasks: list[asyncio.Task[Sample]] = []
+    for i in range(n):
+        delay = start + i * interval - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        tasks.append(asyncio.create_task(scheduled(i)))
+    return list(await asyncio.gather(*tasks))
+
+
+async def run_load(
+    cfg: LoadConfig,
+    workload: list[dict[str, Any]],
+    *,
+    transport: httpx.AsyncBaseTransport | None = None,
+) -> dict[str, Any]:
+    n = cfg.requests
+    if cfg.rate is not None and cfg.duration_s:
+        n = int(cfg.rate * cfg.duration_s)
+    if n is None and not cfg.duration_s:
+        raise ValueError("set requests or duration_s")
+
+    pool = max(cfg.concurrency, 1) if cfg.rate is None else 1000
+    async with httpx.AsyncClient(
+        base_url=cfg.url,
+        timeout=cfg.timeout_s,
+        transport=transport,
+        limits=httpx.Limits(max_connections=pool, max_keepalive_connections=pool),
+    ) as client:
+        for i in range(cfg.warmup):
+            await _send(client, cfg, workload[i % len(workload)])
+
+        t0 = time.perf_counter()
+        if cfg.rate is not None:
+            samples = await _open_loop(client, cfg, workload, n or 0)
+        else:
+            samples = await _closed_loop(client, cfg, workload, n)
+        wall_s = time.perf_counter() - t0
+
+    return build_result(cfg, samples, wall_s)
+
+
+def build_result(cfg: LoadConfig, samples: list[Sample], wall_s: float) -> dict[str, Any]:
+    ok = [s for s in samples if s.status == 200]
+    latency: dict[str, dict[str, float]] = {"client_ms": summarize(s.latency_ms for s in ok)}
+    for stage in STAGES:
+        latency[stage] = summarize(s.timings.get(stage, 0.0) for s in ok)
+
+    return {
+        "started_at": datetime.now(UTC).isoformat(timespec="seconds"),
+        "git_commit": _git_commit(),
+        "config": asdict(cfg),
+        "summary": {
+            "requests": len(samples),
+            "ok": len(ok),
+            "errors": len(samples) - len(ok),
+            "status_codes": dict(Counter(str(s.status) for s in samples)),
+            "wall_s": round(wall_s, 3),
+            "throughput_rps": round(len(ok) / wall_s, 2) if wall_s > 0 else 0.0,
+            "retrieval_cache_hits": sum(s.retrieval_cache_hit for s in ok),
+            "answer_cache_hits": sum(s.answer_cache_hit for s in ok),
+        },
+        "latency_ms": latency,
+    }
+
+
+def compare_results(
+    baseline: dict[str, Any], current: dict[str, Any], *, threshold: float
+) -> list[dict[str, Any]]:
+    rows = compare(baseline["latency_ms"], current["latency_ms"], threshold=threshold)
+    rows += compare(
+        {"throughput_rps": {"value": baseline["summary"]["throughput_rps"]}},
+        {"throughput_rps": {"value": current["summary"]["throughput_rps"]}},
+        keys=("value",),
+        threshold=threshold,
+        higher_is_better=frozenset({"throughput_rps"}),
+    )
+    return rows
+
+
+def _git_commit() -> str | None:
+    try:
+        out = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return out.stdout.strip() or None
+
+
+async def upload_document(url: str, path: Path, *, timeout_s: float = 300.0) -> str:
+    """Upload a text file and wait until ingestion finished; returns the document id."""
+    async with httpx.AsyncClient(base_url=url, timeout=30.0) as client:
+        with path.open("rb") as f:
+            resp = await client.post(
+                "/api/v1/documents", files={"file": (path.name, f, "text/plain")}
+            )
+        resp.raise_for_status()
+        document_id: str = resp.json()["document_id"]
+
+        deadline = time.perf_counter() + timeout_s
+        while time.perf_counter() < deadline:
+            doc = (await client.get(f"/api/v1/documents/{document_id}")).json()
+            if doc["status"] == "ready":
+                return document_id
+            if doc["status"] == "failed":
+                raise SystemExit(f"ingestion failed: {doc.get('error')}")
+            await asyncio.sleep(0.5)
+    raise SystemExit(f"document {document_id} not ready after {timeout_s:.0f}s")
+
+
+def _print_summary(result: dict[str, Any]) -> None:
+    s = result["summary"]
+    print(
+        f"requests={s['requests']} ok={s['ok']} errors={s['errors']} "
+        f"wall_s={s['wall_s']} throughput_rps={s['throughput_rps']}"
+    )
+    print(f"{'stage':<22} {'p50':>10} {'p95':>10} {'p99':>10} {'max':>10}")
+    for stage, st in result["latency_ms"].items():
+        print(
+            f"{stage:<22} {st['p50']:>10.2f} {st['p95']:>10.2f} {st['p99']:>10.2f} {st['max']:>10.2f}"
+        )
+
+
+def main(argv: list[str] | None = None) -> int:
+    p = argparse.ArgumentParser(prog="python -m bench.loadgen")
+    sub = p.add_subparsers(dest="cmd", required=True)
+
+    run = sub.add_parser("run", help="replay a workload and save the results")
+    run.add_argument("--url", default=LoadConfig.url)
+    run.add_argument("--endpoint", default=LoadConfig.endpoint)
+    run.add_argument("--workload", type=Path, default=Path("bench/workloads/sample.jsonl"))
+    run.add_argument("--document-id", help=f"value for {DOCUMENT_ID_PLACEHOLDER}")
+    run.add_argument("--upload", type=Path, help="ingest this file first and query it")
+    run.add_argument("--concurrency", type=int, default=LoadConfig.concurrency)
+    run.add_argument("--rate", type=float, help="open loop: arrivals per second")
+    run.add_argument("--requests", type=int)
+    run.add_argument("--duration", type=float, help="seconds (instead of --requests)")
+    run.add_argument("--warmup", type=int, default=0)
+    run.add_argument("--timeout", type=float, default=LoadConfig.timeout_s)
+    run.add_argument("--out", type=Path, help="write the result JSON here")
+
+    cmp_ = sub.add_parser("compare", help="compare two saved runs, exit 1 on regression")
+    cmp_.add_argument("baseline", type=Path)
+    cmp_.add_argument("current", type=Path)
+    cmp_.add_argument("--threshold", type=float, default=0.10)
+
+    args = p.parse_args(argv)
+
+    if args.cmd == "compare":
+        rows = compare_results(
+            json.loads(args.baseline.read_text()),
+            json.loads(args.current.read_text()),
+            threshold=args.threshold,
+        )
+        print(format_table(rows))
+        return 1 if any(r["regression"] for r in rows) else 0
+
+    document_id = args.document_id
+    if args.upload is not None:
+        document_id = asyncio.run(upload_document(args.url, args.upload))
+        print(f"document_id={document_id}")
+
+    requests = args.requests
+    if requests is None and args.duration is None:
+        requests = LoadConfig.requests
+    cfg = LoadConfig(
+        url=args.url,
+        endpoint=args.endpoint,
+        concurrency=args.concurrency,
+        rate=args.rate,
+        requests=requests,
+        duration_s=args.duration,
+        warmup=args.warmup,
+        timeout_s=args.timeout,
+    )
+    result = asyncio.run(run_load(cfg, load_workload(args.workload, document_id=document_id)))
+    result["workload"] = str(args.workload)
+
+    _print_summary(result)
+    if args.out is not None:
+        args.out.parent.mkdir(parents=True, exist_ok=True)
+        args.out.write_text(json.dumps(result, indent=2) + "\n")
+        print(f"saved {args.out}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,346 @@
+"""
+Microbenchmarks for CPU hot paths, with fixed seeds and generated corpora.
+
+Reports ops/sec (median of several timed rounds) and, from a separate
+tracemalloc pass, the peak and retained traced memory of one call.
+
+    python -m bench.micro run --out bench/results/micro_baseline.json
+    python -m bench.micro run --filter rerank --baseline bench/results/micro_baseline.json
+    python -m bench.micro compare bench/results/micro_baseline.json bench/results/micro_new.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import gc
+import json
+import os
+import random
+import statistics
+import sys
+import time
+import tracemalloc
+from collections.abc import Callable
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+from bench.report import compare, format_table
+
+SEED = 1234
+_WORDS_SEED = 42
+
+
+@dataclass(frozen=True)
+class Case:
+    name: str
+    # builds the inputs (not timed) and returns the zero-arg callable to measure
+    setup: Callable[[], Callable[[], object]]
+
+
+def make_words(n: int, *, seed: int = _WORDS_SEED) -> list[str]:
+    rng = random.Random(seed)
+    alphabet = "abcdefghijklmnopqrstuvwxyz"
+    return ["".join(rng.choices(alphabet, k=rng.randint(2, 10))) for _ in range(n)]
+
+
+def make_corpus(size_bytes: int, *, seed: int = SEED) -> str:
+    """Deterministic prose-like text (words, punctuation, paragraph breaks) of ~size_bytes."""
+    rng = random.Random(seed)
+    vocab = make_words(5000)
+    parts: list[str] = []
+    size = 0
+    while size < size_bytes:
+        sentence = " ".join(rng.choices(vocab, k=rng.randint(6, 20))).capitalize() + "."
+        if rng.random() < 0.1:
+            sentence += "\n\n"
+        parts.append(sentence)
+        size += len(sentence) + 1
+    return " ".join(parts)[:size_bytes]
+
+
+def _chunk_text(size_mb: int) -> Case:
+    def setup() -> Callable[[], object]:
+        from app.rag.ingestion.chunking import chunk_text
+
+        text = make_corpus(size_mb * 1024 * 1024)
+        return lambda: chunk_text(text, chunk_size=800, overlap=120)
+
+    return Case(f"chunk_text_{size_mb}mb", setup)
+
+
+def _mock_embed(batch: int, dim: int = 1536) -> Case:
+    def setup() -> Callable[[], object]:
+        from app.rag.ingestion.embeddings import MockEmbeddingsBackend
+
+        backend = MockEmbeddingsBackend(_dim=dim)
+        texts = [make_corpus(800, seed=SEED + i) for i in range(batch)]
+        loop = asyncio.new_event_loop()
+        return lambda: loop.run_until_complete(backend.embed(texts))
+
+    return Case(f"mock_embed_{batch}x{dim}", setup)
+
+
+def _hashing_embed(batch: int, dim: int = 1536) -> Case:
+    def setup() -> Callable[[], object]:
+        from app.rag.ingestion.embeddings import HashingEmbeddingsBackend
+
+        backend = HashingEmbeddingsBackend(_dim=dim)
+        texts = [make_corpus(800, seed=SEED + i) for i in range(batch)]
+        return lambda: backend._embed_sync(texts)
+
+    return Case(f"hashing_embed_{batch}x{dim}", setup)
+
+
+def _vector_wire(batch: int, fmt: str, dim: int = 1536) -> Case:
+    """Encode one batch of vectors for the DB and decode it back, per wire format."""
+
+    def setup() -> Callable[[], object]:
+        import numpy as np
+        from pgvector import Vector
+
+        rng = np.random.default_rng(SEED)
+        arrays = list(rng.standard_normal((batch, dim), dtype=np.float32))
+        if fmt == "text":
+            # previous path: Python float lists, '[0.1,...]' literals, parsed back to lists
+            lists = [a.tolist() for a in arrays]
+            return lambda: [Vector._from_db(Vector._to_db(v)) for v in lists]
+        # asyncpg binary codec with numpy on both ends (app.db.types.NumpyVector)
+        return lambda: [Vector.from_binary(Vector(a).to_binary()).to_numpy() for a in arrays]
+
+    return Case(f"vector_wire_{fmt}_{batch}x{dim}", setup)
+
+
+def _vector_scan(rows: int, metric: str, dim: int = 1536) -> Case:
+    """One query against `rows` stored vectors, per-row work of pgvector's `<=>` vs `<#>`."""
+
+    def setup() -> Callable[[], object]:
+        import numpy as np
+
+        rng = np.random.default_rng(SEED)
+        stored = rng.standard_normal((rows, dim), dtype=np.float32)
+        stored /= np.linalg.norm(stored, axis=1, keepdims=True)
+        query = stored[0].copy()
+        if metric == "cosine":
+            # cosine_distance: both norms recomputed for every comparison
+            return lambda: (
+                1.0
+                - (stored @ query)
+                / np.sqrt(np.einsum("ij,ij->i", stored, stored) * float(query @ query))
+            )
+        # negative inner product on vectors normalized once (APP_VECTOR_METRIC=ip)
+        return lambda: -(stored @ query)
+
+    return Case(f"vector_scan_{metric}_{rows}x{dim}", setup)
+
+
+def _rerank(candidates: int, *, precomputed: bool) -> Case:
+    def setup() -> Callable[[], object]:
+        from app.rag.reranking import RerankedItem, rerank_by_overlap, token_ids
+
+        rng = random.Random(SEED)
+        texts = [make_corpus(800, seed=SEED + i) for i in range(candidates)]
+        items = [RerankedItem(item=i, score=rng.random()) for i in range(candidates)]
+        ids = [token_ids(t) for t in texts] if precomputed else None
+        question = " ".join(texts[0].split()[:12]) + "?"
+
+        return lambda: rerank_by_overlap(
+            question=question,
+            items=items,
+            get_text=lambda i: texts[i],
+            weight=0.3,
+            get_token_ids=(lambda i: ids[i]) if ids is not None else None,
+        )
+
+    suffix = "token_ids" if precomputed else "text"
+    return Case(f"rerank_overlap_{candidates}_{suffix}", setup)
+
+
+def _serialize(sources: int) -> Case:
+    def setup() -> Callable[[], object]:
+        from app.api.v1.schemas.query import QueryMeta, QueryResponse, QueryTimings, SourceChunk
+
+        rng = random.Random(SEED)
+        resp = QueryResponse(
+            request_id="00000000-0000-0000-0000-000000000000",
+            answer=make_corpus(1500),
+            sources=[
+                SourceChunk(chunk_index=i, text=make_corpus(800, seed=SEED + i), score=rng.random())
+                for i in range(sources)
+            ],
+            meta=QueryMeta(
+                top_k=sources,
+                candidates_limit=sources * 3,
+                rerank_backend="overlap",
+                reranker="none",
+                rerank_weight=0.3,
+                rerank_alpha=0.7,
+            ),
+            timings=QueryTimings(
+                embed_query_ms=1.0, vector_search_ms=2.0, rerank_ms=0.5, llm_ms=0.0, total_ms=4.0
+            ),
+        )
+        return resp.model_dump_json
+
+    return Case(f"query_response_json_{sources}", setup)
+
+
+CASES: list[Case] = [
+    _chunk_text(1),
+    _chunk_text(4),
+    _mock_embed(256),
+    _hashing_embed(256),
+    _vector_wire(256, "text"),
+    _vector_wire(256, "binary"),
+    _vector_scan(10_000, "cosine"),
+    _vector_scan(10_000, "ip"),
+    _rerank(100, precomputed=False),
+    _rerank(100, precomputed=True),
+    _rerank(500, precomputed=True),
+    _serialize(50),
+    _serialize(200),
+]
+
+
+def _calibrate(fn: Callable[[], object], min_time_s: float) -> int:
+    """Calls per round so that one round takes at least min_time_s."""
+    n = 1
+    while True:
+        t0 = time.perf_counter()
+        for _ in range(n):
+            fn()
+        dt = time.perf_counter() - t0
+        if dt >= min_time_s or n >= 1_000_000:
+            return n
+        n = max(n * 2, int(n * min_time_s / dt * 1.2) if dt > 0 else n * 10)
+
+
+def measure(fn: Callable[[], object], *, rounds: int, min_time_s: float) -> dict[str, float]:
+    fn()  # warm-up (imports, caches, lazy init)
+    n = _calibrate(fn, min_time_s)
+
+    per_call: list[float] = []
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        for _ in range(rounds):
+            t0 = time.perf_counter()
+            for _ in range(n):
+                fn()
+            per_call.append((time.perf_counter() - t0) / n)
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+
+    # memory: separate pass, tracemalloc slows the code down a lot.
+    # peak = transient high-water mark of one call, retained = still allocated after it
+    gc.collect()
+    tracemalloc.start()
+    base, _ = tracemalloc.get_traced_memory()
+    result = fn()
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+
+    median = statistics.median(per_call)
+    return {
+        "ops_per_s": round(1.0 / median, 3) if median > 0 else 0.0,
+        "mean_us": round(statistics.fmean(per_call) * 1e6, 3),
+        "stdev_pct": round(statistics.pstdev(per_call) / statistics.fmean(per_call) * 100, 2),
+        "calls_per_round": n,
+        "rounds": rounds,
+        "peak_kib": round((peak - base) / 1024, 1),
+        "retained_kib": round((current - base) / 1024, 1),
+    }
+
+
+def run(
+    cases: list[Case], *, rounds: int = 7, min_time_s: float = 0.2
+) -> dict[str, dict[str, float]]:
+    results: dict[str, dict[str, float]] = {}
+    for case in cases:
+        fn = case.setup()
+        results[case.name] = measure(fn, rounds=rounds, min_time_s=min_time_s)
+        r = results[case.name]
+        print(
+            f"{case.name:<34} {r['ops_per_s']:>12.1f} ops/s  "
+            f"±{r['stdev_pct']:>5.1f}%  peak {r['peak_kib']:>9.1f} KiB  "
+            f"retained {r['retained_kib']:>9.1f} KiB",
+            flush=True,
+        )
+    return results
+
+
+def compare_micro(
+    baseline: dict[str, Any], current: dict[str, Any], *, threshold: float
+) -> list[dict[str, Any]]:
+    """ops/sec must not drop and peak memory must not grow by more than `threshold`."""
+    rows = compare(
+        {name: {"ops_per_s": r["ops_per_s"]} for name, r in baseline["results"].items()},
+        {name: {"ops_per_s": r["ops_per_s"]} for name, r in current["results"].items()},
+        keys=("ops_per_s",),
+        threshold=threshold,
+        higher_is_better=frozenset(baseline["results"]),
+    )
+    rows += compare(
+        {name: {"peak_kib": r["peak_kib"]} for name, r in baseline["results"].items()},
+        {name: {"peak_kib": r["peak_kib"]} for name, r in current["results"].items()},
+        keys=("peak_kib",),
+        threshold=threshold,
+    )
+    return rows
+
+
+def main(argv: list[str] | None = None) -> int:
+    p = argparse.ArgumentParser(prog="python -m bench.micro")
+    sub = p.add_subparsers(dest="cmd", required=True)
+
+    r = sub.add_parser("run", help="run the microbenchmarks")
+    r.add_argument("--filter", default="", help="only cases whose name contains this")
+    r.add_argument("--rounds", type=int, default=7)
+    r.add_argument("--min-time", type=float, default=0.2, help="seconds per round")
+    r.add_argument("--out", type=Path)
+    r.add_argument("--baseline", type=Path, help="compare with a saved run afterwards")
+    r.add_argument("--threshold", type=float, default=0.10)
+
+    c = sub.add_parser("compare", help="compare two saved runs, exit 1 on regression")
+    c.add_argument("baseline", type=Path)
+    c.add_argument("current", type=Path)
+    c.add_argument("--threshold", type=float, default=0.10)
+
+    args = p.parse_args(argv)
+
+    if args.cmd == "compare":
+        rows = compare_micro(
+            json.loads(args.baseline.read_text()),
+            json.loads(args.current.read_text()),
+            threshold=args.threshold,
+        )
+        print(format_table(rows))
+        return 1 if any(row["regression"] for row in rows) else 0
+
+    # app settings refuse to load without a DSN; nothing here connects
+    os.environ.setdefault("APP_DATABASE_URL", "postgresql+asyncpg://bench@localhost/bench")
+
+    cases = [case for case in CASES if args.filter in case.name]
+    result = {
+        "python": sys.version.split()[0],
+        "seed": SEED,
+        "results": run(cases, rounds=args.rounds, min_time_s=args.min_time),
+    }
+    if args.out is not None:
+        args.out.parent.mkdir(parents=True, exist_ok=True)
+        args.out.write_text(json.dumps(result, indent=2) + "\n")
+        print(f"saved {args.out}")
+    if args.baseline is not None:
+        rows = compare_micro(
+            json.loads(args.baseline.read_text()), result, threshold=args.threshold
+        )
+        print(format_table(rows))
+        return 1 if any(row["regression"] for row in rows) else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
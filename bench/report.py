@@ -0,0 +1,75 @@
+"""Percentile summaries and run-to-run comparison shared by the bench tools."""
+
+from __future__ import annotations
+
+import math
+from collections.abc import Iterable, Mapping
+from typing import Any
+
+PERCENTILES = (50, 95, 99)
+
+
+def percentile(sorted_values: list[float], p: float) -> float:
+    """Linear-interpolated percentile of an already sorted list (numpy's default method)."""
+    if not sorted_values:
+        return 0.0
+    k = (len(sorted_values) - 1) * p / 100.0
+    lo, hi = math.floor(k), math.ceil(k)
+    if lo == hi:
+        return sorted_values[lo]
+    return sorted_values[lo] + (sorted_values[hi] - sorted_values[lo]) * (k - lo)
+
+
+def summarize(values: Iterable[float]) -> dict[str, float]:
+    data = sorted(values)
+    out: dict[str, float] = {"count": float(len(data))}
+    out["mean"] = round(sum(data) / len(data), 3) if data else 0.0
+    for p in PERCENTILES:
+        out[f"p{p}"] = round(percentile(data, p), 3)
+    out["max"] = round(data[-1], 3) if data else 0.0
+    return out
+
+
+def compare(
+    baseline: Mapping[str, Mapping[str, float]],
+    current: Mapping[str, Mapping[str, float]],
+    *,
+    keys: tuple[str, ...] = ("p50", "p95", "p99"),
+    threshold: float = 0.10,
+    higher_is_better: frozenset[str] = frozenset(),
+) -> list[dict[str, Any]]:
+    """
+    Per metric/key relative change of `current` vs `baseline`.
+    A row is a regression when it got worse by more than `threshold` (0.10 = 10%):
+    slower for latencies, lower for metrics listed in `higher_is_better`.
+    """
+    rows: list[dict[str, Any]] = []
+    for metric in sorted(baseline.keys() & current.keys()):
+        for key in keys:
+            base, cur = baseline[metric].get(key), current[metric].get(key)
+            if base is None or cur is None:
+                continue
+            change = (cur - base) / base if base else 0.0
+            worse = -change if metric in higher_is_better else change
+            rows.append(
+                {
+                    "metric": metric,
+                    "key": key,
+                    "baseline": base,
+                    "current": cur,
+                    "change": round(change, 4),
+                    "regression": worse > threshold,
+                }
+            )
+    return rows
+
+
+def format_table(rows: list[dict[str, Any]]) -> str:
+    lines = [f"{'metric':<28} {'key':<6} {'baseline':>12} {'current':>12} {'change':>9}"]
+    for r in rows:
+        flag = "  REGRESSION" if r["regression"] else ""
+        lines.append(
+            f"{r['metric']:<28} {r['key']:<6} {r['baseline']:>12.3f} {r['current']:>12.3f} "
+            f"{r['change'] * 100:>8.1f}%{flag}"
+        )
+    return "\n".join(lines)
@@ -0,0 +1,315 @@
+"""
+Memory, latency and recall of the vector storage modes (APP_VECTOR_STORAGE).
+
+`simulate` runs offline on a seeded, clustered corpus: bytes each representation
+needs, and recall@k against exact search after a first pass over the full / halfvec /
+binary representation and full-precision re-scoring of the candidates.
+
+`db` measures a live database with the configured mode: on-disk size of the chunks
+heap and of each index on it, search_hits latency, and recall@k against an exact
+full-precision scan of the same document (query vectors are sampled chunk vectors).
+
+    python -m bench.vector_storage simulate --rows 20000 --queries 200
+    APP_VECTOR_STORAGE=binary python -m bench.vector_storage db --document-id <uuid> \\
+        --out bench/results/storage_binary.json
+    python -m bench.vector_storage compare bench/results/storage_full.json \\
+        bench/results/storage_binary.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import time
+import uuid
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+import numpy.typing as npt
+
+from bench.report import compare, format_table, summarize
+
+SEED = 1234
+MODES = ("full", "halfvec", "binary")
+
+# set bits per byte value, for hamming distance over packed bits
+_POPCOUNT = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+
+def bytes_per_vector(mode: str, dim: int) -> int:
+    """Stored size of one vector's data (pgvector adds a 4-8 byte header)."""
+    if mode == "halfvec":
+        return 2 * dim
+    if mode == "binary":
+        return (dim + 7) // 8
+    return 4 * dim
+
+
+def make_corpus(rows: int, dim: int, *, seed: int = SEED) -> npt.NDArray[np.float32]:
+    """
+    L2-normalized vectors with two-level topical structure (64 topics, 1024 subtopics),
+    so nearest neighbours are meaningful rather than near-ties inside one blob.
+    """
+    rng = np.random.default_rng(seed)
+    topics = rng.standard_normal((64, dim), dtype=np.float32)
+    subtopics = topics[rng.integers(0, len(topics), 1024)]
+    subtopics += 0.7 * rng.standard_normal(subtopics.shape, dtype=np.float32)
+    data = subtopics[rng.integers(0, len(subtopics), rows)]
+    data += 0.25 * rng.standard_normal((rows, dim), dtype=np.float32)
+    data /= np.linalg.norm(data, axis=1, keepdims=True)
+    return data
+
+
+def _quantize(mode: str, vectors: npt.NDArray[np.float32]) -> npt.NDArray[Any]:
+    if mode == "binary":
+        # pgvector's binary_quantize: bit set where the component is > 0
+        return np.packbits(vectors > 0, axis=-1)
+    if mode == "halfvec":
+        return vectors.astype(np.float16)
+    return vectors
+
+
+def _nearest(
+    mode: str, stored: npt.NDArray[Any], query: npt.NDArray[Any], n: int
+) -> npt.NDArray[np.intp]:
+    """Indices of the `n` nearest stored rows by the first-pass distance of `mode`."""
+    if mode == "binary":
+        dist = _POPCOUNT[stored ^ query].sum(axis=1, dtype=np.int32)
+    else:
+        # cosine distance on unit vectors
+        dist = -(stored @ query.astype(np.float32))
+    n = min(n, len(dist))
+    top = np.argpartition(dist, n - 1)[:n]
+    return top[np.argsort(dist[top], kind="stable")]
+
+
+def simulate(
+    *,
+    rows: int,
+    dim: int,
+    queries: int,
+    k: int,
+    multipliers: tuple[int, ...] = (1, 4, 10),
+    seed: int = SEED,
+) -> dict[str, dict[str, float]]:
+    """
+    Per mode: bytes per stored vector, first-pass data size for `rows` vectors, and
+    recall@k after re-scoring k * multiplier first-pass candidates at full precision.
+    """
+    corpus = make_corpus(rows, dim, seed=seed)
+    rng = np.random.default_rng(seed + 1)
+    qs = corpus[rng.integers(0, rows, queries)]
+    qs = qs + 0.1 * rng.standard_normal(qs.shape, dtype=np.float32)
+    qs /= np.linalg.norm(qs, axis=1, keepdims=True)
+    exact = [set(_nearest("full", corpus, q, k).tolist()) for q in qs]
+
+    results: dict[str, dict[str, float]] = {}
+    for mode in MODES:
+        stored = _quantize(mode, corpus)
+        if mode == "halfvec":
+            # halfvec values are exact in float32: score them there (fast BLAS path)
+            stored = stored.astype(np.float32)
+        size = bytes_per_vector(mode, dim)
+        r: dict[str, float] = {
+            "bytes_per_vector": float(size),
+            "data_mib": round(size * rows / 2**20, 2),
+        }
+        recalls: dict[int, list[float]] = {m: [] for m in multipliers}
+        for q, truth in zip(qs, exact, strict=True):
+            # one ranked first pass per query; each multiplier takes a prefix of it
+            ranked = _nearest(mode, stored, _quantize(mode, q), k * max(multipliers))
+            for m in multipliers:
+                candidates = ranked[: k * m]
+                rescored = candidates[np.argsort(-(corpus[candidates] @ q), kind="stable")][:k]
+                recalls[m].append(len(truth.intersection(rescored.tolist())) / k)
+        for m in multipliers:
+            r[f"recall@{k}_x{m}"] = round(float(np.mean(recalls[m])), 4)
+        results[mode] = r
+    return results
+
+
+async def measure_db(*, document_id: uuid.UUID, queries: int, k: int) -> dict[str, Any]:
+    from sqlalchemy import String, func, select, text
+    from sqlalchemy import cast as sa_cast
+
+    from app.core.settings import get_settings
+    from app.db.engine import close_engine, init_engine, session_scope
+    from app.db.models import Chunk
+    from app.rag.answering.service import resolve_search_params, vector_search_knobs
+    from app.repos.chunks import ChunkRepository
+
+    init_engine()
+    try:
+        async with session_scope() as session:
+            sizes = {
+                "heap": (
+                    await session.execute(text("SELECT pg_relation_size('chunks'::regclass)"))
+                ).scalar_one(),
+                "total": (
+                    await session.execute(text("SELECT pg_total_relation_size('chunks'::regclass)"))
+                ).scalar_one(),
+            }
+            for name, size in await session.execute(
+                text(
+                    "SELECT c.relname, pg_relation_size(c.oid) FROM pg_index i "
+                    "JOIN pg_class c ON c.oid = i.indexrelid "
+                    "WHERE i.indrelid = 'chunks'::regclass"
+                )
+            ):
+                sizes[name] = size
+            # deterministic sample of the document's own chunk vectors
+            probe_vectors = list(
+                (
+                    await session.execute(
+                        select(Chunk.embedding)
+                        .where(Chunk.document_id == document_id)
+                        .where(Chunk.embedding.is_not(None))
+                        .order_by(func.md5(sa_cast(Chunk.id, String)))
+                        .limit(queries)
+                    )
+                ).scalars()
+            )
+
+        params = resolve_search_params()
+        ef_search, first_pass = vector_search_knobs(params, k)
+        latencies: list[float] = []
+        recalls: list[float] = []
+        for vec in probe_vectors:
+            if vec is None:
+                continue
+            async with session_scope() as session, session.begin():
+                repo = ChunkRepository(session)
+                await repo.set_search_params(
+                    ef_search=ef_search,
+                    probes=params.probes,
+                    iterative_scan=params.iterative_scan,
+                    index_mode=params.index_mode,
+                )
+                t0 = time.perf_counter()
+                hits = await repo.search_hits(
+                    document_id=document_id,
+                    query_embedding=vec,
+                    limit=k,
+                    storage=params.vector_storage,
+                    candidates=first_pass,
+                    metric=params.vector_metric,
+                )
+                latencies.append((time.perf_counter() - t0) * 1000.0)
+
+                # ground truth: exact full-precision scan, no index
+                await session.execute(text("SET LOCAL enable_indexscan = off"))
+                exact = await repo.search_hits(
+                    document_id=document_id,
+                    query_embedding=vec,
+                    limit=k,
+                    metric=params.vector_metric,
+                )
+            truth = {h.chunk_index for h in exact}
+            if truth:
+                recalls.append(len(truth.intersection(h.chunk_index for h in hits)) / len(truth))
+    finally:
+        await close_engine()
+
+    return {
+        "vector_storage": params.vector_storage,
+        "vector_metric": params.vector_metric,
+        "index_mode": params.index_mode,
+        "vector_rerank_multiplier": get_settings().vector_rerank_multiplier,
+        "k": k,
+        "sizes_mib": {name: round(size / 2**20, 2) for name, size in sizes.items()},
+        "search_ms": summarize(latencies),
+        f"recall_at_{k}": round(float(np.mean(recalls)), 4) if recalls else None,
+    }
+
+
+def compare_db(
+    baseline: dict[str, Any], current: dict[str, Any], *, threshold: float
+) -> list[dict[str, Any]]:
+    """Search latency percentiles plus recall (higher is better) of two `db` runs."""
+    k = current["k"]
+    recall = f"recall_at_{k}"
+    rows = compare({"search_ms": baseline["search_ms"]}, {"search_ms": current["search_ms"]})
+    rows += compare(
+        {recall: {"value": baseline.get(recall) or 0.0}},
+        {recall: {"value": current.get(recall) or 0.0}},
+        keys=("value",),
+        threshold=threshold,
+        higher_is_better=frozenset({recall}),
+    )
+    return rows
+
+
+def _print_table(results: dict[str, dict[str, float]]) -> None:
+    keys = list(next(iter(results.values())))
+    print(f"{'mode':<10}" + "".join(f"{key:>18}" for key in keys))
+    for mode, r in results.items():
+        print(f"{mode:<10}" + "".join(f"{r[key]:>18}" for key in keys))
+
+
+def main(argv: list[str] | None = None) -> int:
+    p = argparse.ArgumentParser(prog="python -m bench.vector_storage")
+    sub = p.add_subparsers(dest="cmd", required=True)
+
+    s = sub.add_parser("simulate", help="offline recall / memory of every mode")
+    s.add_argument("--rows", type=int, default=20_000)
+    s.add_argument("--dim", type=int, default=1536)
+    s.add_argument("--queries", type=int, default=100)
+    s.add_argument("--k", type=int, default=10)
+    s.add_argument(
+        "--multipliers",
+        type=int,
+        nargs="+",
+        default=[1, 4, 10],
+        help="first-pass oversampling to try (see APP_VECTOR_RERANK_MULTIPLIER)",
+    )
+    s.add_argument("--out", type=Path)
+
+    d = sub.add_parser("db", help="sizes, latency and recall of the configured mode")
+    d.add_argument("--document-id", type=uuid.UUID, required=True)
+    d.add_argument("--queries", type=int, default=100)
+    d.add_argument("--k", type=int, default=10)
+    d.add_argument("--out", type=Path)
+
+    c = sub.add_parser("compare", help="compare two `db` runs, exit 1 on regression")
+    c.add_argument("baseline", type=Path)
+    c.add_argument("current", type=Path)
+    c.add_argument("--threshold", type=float, default=0.10)
+
+    args = p.parse_args(argv)
+
+    if args.cmd == "compare":
+        rows = compare_db(
+            json.loads(args.baseline.read_text()),
+            json.loads(args.current.read_text()),
+            threshold=args.threshold,
+        )
+        print(format_table(rows))
+        return 1 if any(row["regression"] for row in rows) else 0
+
+    result: dict[str, Any]
+    if args.cmd == "simulate":
+        result = simulate(
+            rows=args.rows,
+            dim=args.dim,
+            queries=args.queries,
+            k=args.k,
+            multipliers=tuple(args.multipliers),
+        )
+        _print_table(result)
+    else:
+        result = asyncio.run(
+            measure_db(document_id=args.document_id, queries=args.queries, k=args.k)
+        )
+        print(json.dumps(result, indent=2))
+
+    if args.out is not None:
+        args.out.parent.mkdir(parents=True, exist_ok=True)
+        args.out.write_text(json.dumps(result, indent=2) + "\n")
+        print(f"saved {args.out}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,181 @@
+"""
+Local OpenAI-compatible stub server for load tests (no network, no key).
+
+Serves /v1/chat/completions (streaming and not) and /v1/embeddings with
+configurable latency and token rate:
+
+    python -m scripts.openai_stub --port 8089 --ttft-ms 300 --tokens-per-s 50
+
+then point the service at it:
+
+    OPENAI_BASE_URL=http://127.0.0.1:8089/v1 OPENAI_API_KEY=stub
+    APP_LLM_BACKEND=openai APP_EMBEDDINGS_BACKEND=openai
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import base64
+import hashlib
+import json
+import time
+import uuid
+from collections.abc import AsyncIterator
+from dataclasses import dataclass
+from typing import Any
+
+import numpy as np
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+
+_WORDS = [
+    "Based",
+    "on",
+    "the",
+    "provided",
+    "context",
+    "the",
+    "document",
+    "describes",
+    "how",
+    "the",
+    "system",
+    "stores",
+    "chunks",
+    "embeds",
+    "questions",
+    "and",
+    "retrieves",
+    "the",
+    "most",
+    "relevant",
+    "passages",
+    "[1].",
+]
+
+
+@dataclass(frozen=True)
+class StubConfig:
+    ttft_ms: float = 200.0  # chat: delay before the first token
+    tokens_per_s: float = 50.0  # chat: streaming rate after the first token
+    answer_tokens: int = 64  # chat: tokens per answer (capped by max_tokens)
+    embed_latency_ms: float = 20.0  # embeddings: fixed per-request latency
+    embed_dim: int = 1536  # embeddings: used when the request has no `dimensions`
+
+
+def _answer_tokens(n: int) -> list[str]:
+    return [(" " if i else "") + _WORDS[i % len(_WORDS)] for i in range(n)]
+
+
+def _embedding(text: str, dim: int) -> np.ndarray:
+    seed = int.from_bytes(hashlib.sha256(text.encode("utf-8")).digest()[:8], "little")
+    vec = np.random.default_rng(seed).standard_normal(dim).astype(np.float32)
+    return vec / np.linalg.norm(vec)
+
+
+def create_stub_app(cfg: StubConfig) -> FastAPI:
+    app = FastAPI(title="openai-stub")
+
+    @app.post("/v1/embeddings")
+    async def embeddings(request: Request) -> Response:
+        body = await request.json()
+        texts = body["input"] if isinstance(body["input"], list) else [body["input"]]
+        dim = int(body.get("dimensions") or cfg.embed_dim)
+        as_base64 = body.get("encoding_format") == "base64"
+
+        await asyncio.sleep(cfg.embed_latency_ms / 1000.0)
+
+        data = []
+        for i, t in enumerate(texts):
+            vec = _embedding(str(t), dim)
+            value: Any = base64.b64encode(vec.tobytes()).decode() if as_base64 else vec.tolist()
+            data.append({"object": "embedding", "index": i, "embedding": value})
+        return JSONResponse(
+            {
+                "object": "list",
+                "model": body.get("model", "stub"),
+                "data": data,
+                "usage": {"prompt_tokens": len(texts), "total_tokens": len(texts)},
+            }
+        )
+
+    @app.post("/v1/chat/completions")
+    async def chat_completions(request: Request) -> Response:
+        body = await request.json()
+        model = body.get("model", "stub")
+        n = min(cfg.answer_tokens, int(body.get("max_tokens") or cfg.answer_tokens))
+        tokens = _answer_tokens(n)
+        cid = f"chatcmpl-{uuid.uuid4().hex}"
+        created = int(time.time())
+        delay_s = 1.0 / cfg.tokens_per_s if cfg.tokens_per_s > 0 else 0.0
+
+        if not body.get("stream"):
+            await asyncio.sleep(cfg.ttft_ms / 1000.0 + delay_s * max(0, n - 1))
+            return JSONResponse(
+                {
+                    "id": cid,
+                    "object": "chat.completion",
+                    "created": created,
+                    "model": model,
+                    "choices": [
+                        {
+                            "index": 0,
+                            "message": {"role": "assistant", "content": "".join(tokens)},
+                            "finish_reason": "stop",
+                        }
+                    ],
+                    "usage": {"prompt_tokens": 0, "completion_tokens": n, "total_tokens": n},
+                }
+            )
+
+        def chunk(delta: dict[str, str], finish: str | None = None) -> str:
+            payload = {
+                "id": cid,
+                "object": "chat.completion.chunk",
+                "created": created,
+                "model": model,
+                "choices": [{"index": 0, "delta": delta, "finish_reason": finish}],
+            }
+            return f"data: {json.dumps(payload)}\n\n"
+
+        async def events() -> AsyncIterator[str]:
+            await asyncio.sleep(cfg.ttft_ms / 1000.0)
+            yield chunk({"role": "assistant", "content": ""})
+            for i, tok in enumerate(tokens):
+                if i:
+                    await asyncio.sleep(delay_s)
+                yield chunk({"content": tok})
+            yield chunk({}, finish="stop")
+            yield "data: [DONE]\n\n"
+
+        return StreamingResponse(events(), media_type="text/event-stream")
+
+    return app
+
+
+def main() -> None:
+    defaults = StubConfig()
+    p = argparse.ArgumentParser(description="OpenAI-compatible stub server")
+    p.add_argument("--host", default="127.0.0.1")
+    p.add_argument("--port", type=int, default=8089)
+    p.add_argument("--ttft-ms", type=float, default=defaults.ttft_ms)
+    p.add_argument("--tokens-per-s", type=float, default=defaults.tokens_per_s)
+    p.add_argument("--answer-tokens", type=int, default=defaults.answer_tokens)
+    p.add_argument("--embed-latency-ms", type=float, default=defaults.embed_latency_ms)
+    p.add_argument("--embed-dim", type=int, default=defaults.embed_dim)
+    args = p.parse_args()
+
+    cfg = StubConfig(
+        ttft_ms=args.ttft_ms,
+        tokens_per_s=args.tokens_per_s,
+        answer_tokens=args.answer_tokens,
+        embed_latency_ms=args.embed_latency_ms,
+        embed_dim=args.embed_dim,
+    )
+    uvicorn.run(create_stub_app(cfg), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -2,8 +2,10 @@ from __future__ import annotations
 
 import asyncio
 
+import numpy as np
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.settings import get_settings
 from app.db.engine import close_engine, get_session, init_engine
 from app.db.models import Document
 from app.repos.chunks import ChunkRepository
@@ -20,8 +22,9 @@ async def main() -> None:
         session.add(doc)
         await session.flush()
 
-        e1 = [0.0] * 1536
-        e2 = [0.0] * 1536
+        dim = get_settings().embeddings_dim
+        e1 = np.zeros(dim, dtype=np.float32)
+        e2 = np.zeros(dim, dtype=np.float32)
         e2[0] = 1.0
 
         repo = ChunkRepository(session)
@@ -34,7 +37,7 @@ async def main() -> None:
 
         await session.commit()
 
-        q = [0.0] * 1536
+        q = np.zeros(dim, dtype=np.float32)
         q[0] = 1.0
 
         hits = await repo.search_by_embedding(document_id=doc.id, query_embedding=q, limit=2)
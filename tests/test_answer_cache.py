@@ -0,0 +1,83 @@
+from __future__ import annotations
+
+import uuid
+
+import numpy as np
+
+from app.api.v1.schemas.query import SourceChunk
+from app.db.types import EmbeddingArray
+from app.rag.answering.answer_cache import CachedAnswer, SemanticAnswerCache
+
+
+class _Clock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def _v(*xs: float) -> EmbeddingArray:
+    return np.array(xs, dtype=np.float32)
+
+
+def _entry(answer: str) -> CachedAnswer:
+    return CachedAnswer(
+        question="q", answer=answer, sources=[SourceChunk(chunk_index=0, text="t", score=1.0)]
+    )
+
+
+def _cache(clock: _Clock, **kw: float) -> SemanticAnswerCache:
+    params: dict[str, float] = {
+        "threshold": 0.95,
+        "max_documents": 8,
+        "max_entries": 2,
+        "ttl_s": 60,
+    }
+    params.update(kw)
+    return SemanticAnswerCache(clock=clock, **params)  # type: ignore[arg-type]
+
+
+def test_near_duplicate_hits_and_distant_question_misses() -> None:
+    cache = _cache(_Clock())
+    doc = uuid.uuid4()
+    cache.store(document_id=doc, top_k=5, version=1, vector=_v(1.0, 0.0, 0.0), entry=_entry("a"))
+
+    hit = cache.lookup(document_id=doc, top_k=5, version=1, vector=_v(2.0, 0.1, 0.0))
+    assert hit is not None
+    assert hit[0].answer == "a"
+    assert hit[1] > 0.99
+
+    assert cache.lookup(document_id=doc, top_k=5, version=1, vector=_v(0.0, 1.0, 0.0)) is None
+    assert cache.lookup(document_id=doc, top_k=3, version=1, vector=_v(1.0, 0.0, 0.0)) is None
+    assert cache.lookup(document_id=uuid.uuid4(), top_k=5, version=1, vector=_v(1, 0, 0)) is None
+    assert (cache.stats.hits, cache.stats.misses) == (1, 3)
+
+
+def test_new_document_version_invalidates_bucket() -> None:
+    cache = _cache(_Clock())
+    doc = uuid.uuid4()
+    cache.store(document_id=doc, top_k=5, version=1, vector=_v(1.0, 0.0), entry=_entry("old"))
+
+    assert cache.lookup(document_id=doc, top_k=5, version=2, vector=_v(1.0, 0.0)) is None
+    assert cache.stats.stale_evictions == 1
+    # the stale bucket is gone even for a late reader of the old version
+    assert cache.lookup(document_id=doc, top_k=5, version=1, vector=_v(1.0, 0.0)) is None
+
+
+def test_entries_are_bounded_and_expire() -> None:
+    clock = _Clock()
+    cache = _cache(clock, ttl_s=10)
+    doc = uuid.uuid4()
+    for i, vec in enumerate((_v(1.0, 0.0, 0.0), _v(0.0, 1.0, 0.0), _v(0.0, 0.0, 1.0))):
+        clock.now = float(i)
+        cache.store(document_id=doc, top_k=5, version=0, vector=vec, entry=_entry(str(i)))
+
+    # max_entries=2: the first answer was dropped
+    assert cache.lookup(document_id=doc, top_k=5, version=0, vector=_v(1.0, 0.0, 0.0)) is None
+    hit = cache.lookup(document_id=doc, top_k=5, version=0, vector=_v(0.0, 1.0, 0.0))
+    assert hit is not None and hit[0].answer == "1"
+
+    clock.now = 11.5  # entry "1" (stored at t=1) expired, "2" (t=2) still valid
+    assert cache.lookup(document_id=doc, top_k=5, version=0, vector=_v(0.0, 1.0, 0.0)) is None
+    assert cache.lookup(document_id=doc, top_k=5, version=0, vector=_v(0.0, 0.0, 1.0)) is not None
@@ -0,0 +1,85 @@
+from __future__ import annotations
+
+import asyncio
+import json
+from pathlib import Path
+from typing import Any
+
+import httpx
+import pytest
+
+from bench.loadgen import LoadConfig, compare_results, load_workload, run_load
+from bench.report import percentile, summarize
+
+
+def test_percentile_interpolates_like_numpy() -> None:
+    data = [float(v) for v in range(1, 101)]
+    assert percentile(data, 50) == 50.5
+    assert percentile(data, 99) == pytest.approx(99.01)
+    assert summarize([]) == {
+        "count": 0.0,
+        "mean": 0.0,
+        "p50": 0.0,
+        "p95": 0.0,
+        "p99": 0.0,
+        "max": 0.0,
+    }
+
+
+def test_workload_placeholder(tmp_path: Path) -> None:
+    path = tmp_path / "w.jsonl"
+    path.write_text(json.dumps({"document_id": "${DOCUMENT_ID}", "question": "q"}) + "\n\n")
+
+    assert load_workload(path, document_id="abc") == [{"document_id": "abc", "question": "q"}]
+    with pytest.raises(SystemExit):
+        load_workload(path)
+
+
+def _fake_api() -> httpx.MockTransport:
+    def handler(request: httpx.Request) -> httpx.Response:
+        body = json.loads(request.content)
+        if body["question"] == "boom":
+            return httpx.Response(500, json={"code": "internal_error"})
+        timings = {"embed_query_ms": 1.0, "vector_search_ms": 2.0, "total_ms": 4.0}
+        meta = {"retrieval_cache_hit": body["question"] == "cached"}
+        return httpx.Response(200, json={"timings": timings, "meta": meta})
+
+    return httpx.MockTransport(handler)
+
+
+@pytest.mark.parametrize("rate", [None, 500.0])
+def test_run_load_reports_stages_and_errors(rate: float | None) -> None:
+    workload: list[dict[str, Any]] = [
+        {"document_id": "d", "question": "q"},
+        {"document_id": "d", "question": "cached"},
+        {"document_id": "d", "question": "boom"},
+    ]
+    cfg = LoadConfig(url="http://api", concurrency=3, rate=rate, requests=30)
+
+    result = asyncio.run(run_load(cfg, workload, transport=_fake_api()))
+
+    summary = result["summary"]
+    assert (summary["requests"], summary["ok"], summary["errors"]) == (30, 20, 10)
+    assert summary["status_codes"] == {"200": 20, "500": 10}
+    assert summary["retrieval_cache_hits"] == 10
+    assert result["latency_ms"]["vector_search_ms"]["p99"] == 2.0
+    assert result["latency_ms"]["rerank_ms"]["p50"] == 0.0
+    assert result["latency_ms"]["client_ms"]["count"] == 20
+
+
+def test_compare_flags_latency_and_throughput_regressions() -> None:
+    base = {
+        "summary": {"throughput_rps": 100.0},
+        "latency_ms": {"total_ms": {"p50": 10.0, "p95": 20.0, "p99": 30.0}},
+    }
+    cur = {
+        "summary": {"throughput_rps": 80.0},
+        "latency_ms": {"total_ms": {"p50": 10.5, "p95": 25.0, "p99": 30.0}},
+    }
+
+    flagged = {
+        (r["metric"], r["key"])
+        for r in compare_results(base, cur, threshold=0.1)
+        if r["regression"]
+    }
+    assert flagged == {("total_ms", "p95"), ("throughput_rps", "value")}
@@ -0,0 +1,32 @@
+from __future__ import annotations
+
+from bench.micro import CASES, compare_micro, make_corpus, measure
+
+
+def test_corpus_is_deterministic_and_sized() -> None:
+    a = make_corpus(10_000)
+    assert a == make_corpus(10_000)
+    assert a != make_corpus(10_000, seed=7)
+    assert len(a) == 10_000
+
+
+def test_measure_reports_rate_and_memory() -> None:
+    r = measure(lambda: [0] * 10_000, rounds=3, min_time_s=0.001)
+    assert r["ops_per_s"] > 0
+    assert r["calls_per_round"] >= 1
+    assert r["peak_kib"] >= 70  # 10k pointers
+
+
+def test_case_names_are_unique() -> None:
+    names = [c.name for c in CASES]
+    assert len(names) == len(set(names))
+
+
+def test_compare_flags_slower_and_bigger() -> None:
+    base = {"results": {"f": {"ops_per_s": 100.0, "peak_kib": 10.0}}}
+    cur = {"results": {"f": {"ops_per_s": 85.0, "peak_kib": 10.5}}}
+
+    rows = {
+        (r["metric"], r["key"]): r["regression"] for r in compare_micro(base, cur, threshold=0.1)
+    }
+    assert rows == {("f", "ops_per_s"): True, ("f", "peak_kib"): False}
@@ -0,0 +1,29 @@
+from __future__ import annotations
+
+from bench.vector_storage import bytes_per_vector, compare_db, simulate
+
+
+def test_quantized_modes_shrink_data_and_recover_recall_by_rescoring() -> None:
+    r = simulate(rows=2000, dim=256, queries=20, k=5, multipliers=(1, 10))
+
+    assert [r[m]["bytes_per_vector"] for m in ("full", "halfvec", "binary")] == [1024, 512, 32]
+    assert r["full"]["recall@5_x1"] == 1.0
+    assert r["halfvec"]["recall@5_x1"] >= 0.95
+    # sign bits alone lose neighbours; oversampling + exact re-score brings them back
+    assert r["binary"]["recall@5_x10"] > r["binary"]["recall@5_x1"]
+    assert r["binary"]["recall@5_x10"] >= 0.8
+
+
+def test_bytes_per_vector_rounds_bits_up() -> None:
+    assert bytes_per_vector("binary", 1537) == 193
+
+
+def test_compare_flags_recall_drop() -> None:
+    base = {"k": 10, "search_ms": {"p50": 10.0}, "recall_at_10": 0.99}
+    cur = {"k": 10, "search_ms": {"p50": 4.0}, "recall_at_10": 0.80}
+
+    rows = {
+        (row["metric"], row["key"]): row["regression"]
+        for row in compare_db(base, cur, threshold=0.1)
+    }
+    assert rows == {("search_ms", "p50"): False, ("recall_at_10", "value"): True}
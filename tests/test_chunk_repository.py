@@ -0,0 +1,249 @@
+from __future__ import annotations
+
+import asyncio
+import uuid
+from typing import Any
+
+import numpy as np
+import pytest
+from sqlalchemy.dialects.postgresql import asyncpg
+
+from app import main
+from app.core.settings import get_settings
+from app.rag.answering.service import verify_vector_metric
+from app.repos.chunks import ChunkHit, ChunkRepository, ChunkRow, distance_score
+
+
+class _FakeResult:
+    def __init__(self, rows: list[tuple[Any, ...]]) -> None:
+        self._rows = rows
+
+    def tuples(self) -> list[tuple[Any, ...]]:
+        return self._rows
+
+    def scalars(self) -> list[Any]:
+        return [row[0] for row in self._rows]
+
+    def scalar_one(self) -> Any:
+        return self._rows[0][0]
+
+
+class _FakeSession:
+    def __init__(self, rows: list[tuple[Any, ...]]) -> None:
+        self.rows = rows
+        self.statements: list[Any] = []
+        self.params: list[Any] = []
+
+    async def execute(self, stmt: Any, params: Any = None, **kwargs: Any) -> _FakeResult:
+        self.statements.append(stmt)
+        self.params.append(params)
+        return _FakeResult(self.rows)
+
+
+def test_search_hits_selects_projection_only() -> None:
+    session = _FakeSession(rows=[(3, "pgvector text", [11, 42], 0.25), (7, "other", None, None)])
+    repo = ChunkRepository(session)  # type: ignore[arg-type]
+
+    hits = asyncio.run(
+        repo.search_hits(
+            document_id=uuid.uuid4(), query_embedding=np.zeros(1536, dtype=np.float32), limit=2
+        )
+    )
+
+    stmt = session.statements[0]
+    assert [c.name for c in stmt.selected_columns] == [
+        "chunk_index",
+        "text",
+        "token_ids",
+        "distance",
+    ]
+    assert hits == [ChunkHit(3, "pgvector text", 0.8, [11, 42]), ChunkHit(7, "other", 0.0)]
+
+
+def test_set_search_params_uses_set_local() -> None:
+    session = _FakeSession(rows=[])
+    repo = ChunkRepository(session)  # type: ignore[arg-type]
+
+    asyncio.run(repo.set_search_params(ef_search=80, probes=None))
+    asyncio.run(repo.set_search_params(ef_search=None, probes=10))
+
+    assert [str(s) for s in session.statements] == [
+        "SET LOCAL hnsw.ef_search = 80",
+        "SET LOCAL ivfflat.probes = 10",
+    ]
+
+
+def test_set_search_params_sets_iterative_scan() -> None:
+    session = _FakeSession(rows=[])
+    repo = ChunkRepository(session)  # type: ignore[arg-type]
+
+    asyncio.run(repo.set_search_params(iterative_scan="relaxed_order", index_mode="ivfflat"))
+    with pytest.raises(ValueError, match=r"Unsupported iterative scan"):
+        asyncio.run(repo.set_search_params(iterative_scan="on; RESET ALL", index_mode="hnsw"))
+
+    assert [str(s) for s in session.statements] == [
+        "SET LOCAL ivfflat.iterative_scan = relaxed_order"
+    ]
+
+
+def test_add_chunks_sends_multi_row_pages() -> None:
+    session = _FakeSession(rows=[])
+    repo = ChunkRepository(session)  # type: ignore[arg-type]
+    doc_id = uuid.uuid4()
+    rows = [
+        ChunkRow(chunk_index=i, text=f"chunk {i}", embedding=np.zeros(3, dtype=np.float32))
+        for i in range(5)
+    ]
+
+    written = asyncio.run(repo.add_chunks(document_id=doc_id, rows=rows, page_size=2))
+
+    assert written == 5
+    assert len(session.statements) == 3
+    assert session.params == [None, None, None]
+    dialect = asyncpg.dialect()  # type: ignore[no-untyped-call]
+    compiled = [stmt.compile(dialect=dialect) for stmt in session.statements]
+    assert all("ON CONFLICT (document_id, chunk_index) DO NOTHING" in str(c) for c in compiled)
+    assert [c.params["chunk_index_m0"] for c in compiled] == [0, 2, 4]
+    assert [len([k for k in c.params if k.startswith("chunk_index")]) for c in compiled] == [
+        2,
+        2,
+        1,
+    ]
+    assert {c.params["document_id_m0"] for c in compiled} == {doc_id}
+
+
+def test_quantized_search_rescores_candidates_at_full_precision() -> None:
+    session = _FakeSession(rows=[(3, "pgvector text", None, 0.25)])
+    repo = ChunkRepository(session)  # type: ignore[arg-type]
+
+    hits = asyncio.run(
+        repo.search_hits(
+            document_id=uuid.uuid4(),
+            query_embedding=np.zeros(1536, dtype=np.float32),
+            limit=5,
+            storage="binary",
+            candidates=40,
+        )
+    )
+
+    sql = str(session.statements[0].compile(dialect=asyncpg.dialect()))  # type: ignore[no-untyped-call]
+    # first pass: hamming distance over the expression index, 40 candidates
+    assert "CAST(binary_quantize(chunks.embedding) AS BIT(1536)) <~> " in sql
+    assert "CAST(binary_quantize(CAST($1 AS VECTOR(1536))) AS BIT(1536))" in sql
+    # then exact cosine distance on the full-precision column of the candidates only
+    assert "ORDER BY candidates.embedding <=> CAST($1 AS VECTOR(1536))" in sql
+    assert session.statements[0].compile().params["param_1"] == 40
+    assert hits == [ChunkHit(3, "pgvector text", 0.8)]
+
+
+def test_inner_product_search_keeps_cosine_score_scale() -> None:
+    # unit vectors: <#> = -dot = cosine distance - 1
+    session = _FakeSession(rows=[(3, "pgvector text", None, -0.75)])
+    repo = ChunkRepository(session)  # type: ignore[arg-type]
+
+    hits = asyncio.run(
+        repo.search_hits(
+            document_id=uuid.uuid4(),
+            query_embedding=np.zeros(1536, dtype=np.float32),
+            limit=5,
+            metric="ip",
+        )
+    )
+
+    sql = str(session.statements[0].compile(dialect=asyncpg.dialect()))  # type: ignore[no-untyped-call]
+    assert "ORDER BY chunks.embedding <#> $1" in sql
+    assert "<=>" not in sql
+    assert hits == [ChunkHit(3, "pgvector text", 0.8)]
+    assert distance_score(-0.75, "ip") == distance_score(0.25, "cosine")
+    assert distance_score(None, "ip") == 0.0
+    # non-unit rows (metric flipped without the migration): dot far above 1
+    assert distance_score(-350.0, "ip") == 1.0
+
+
+def test_quantized_halfvec_inner_product_uses_ip_operator_in_both_passes() -> None:
+    session = _FakeSession(rows=[])
+    repo = ChunkRepository(session)  # type: ignore[arg-type]
+
+    asyncio.run(
+        repo.search_hits(
+            document_id=uuid.uuid4(),
+            query_embedding=np.zeros(1536, dtype=np.float32),
+            limit=5,
+            storage="halfvec",
+            candidates=20,
+            metric="ip",
+        )
+    )
+
+    sql = str(session.statements[0].compile(dialect=asyncpg.dialect()))  # type: ignore[no-untyped-call]
+    assert "CAST(chunks.embedding AS HALFVEC(1536)) <#> " in sql
+    assert "ORDER BY candidates.embedding <#> CAST($1 AS VECTOR(1536))" in sql
+
+
+class _ScriptedSession:
+    """One canned result per execute() call, in order."""
+
+    def __init__(self, *results: list[tuple[Any, ...]]) -> None:
+        self.results = list(results)
+
+    async def execute(self, stmt: Any, params: Any = None, **kwargs: Any) -> _FakeResult:
+        return _FakeResult(self.results.pop(0))
+
+
+def _verify(monkeypatch: pytest.MonkeyPatch, metric: str, *results: list[tuple[Any, ...]]) -> None:
+    monkeypatch.setenv("APP_VECTOR_METRIC", metric)
+    get_settings.cache_clear()
+    try:
+        asyncio.run(verify_vector_metric(_ScriptedSession(*results)))  # type: ignore[arg-type]
+    finally:
+        get_settings.cache_clear()
+
+
+def test_verify_vector_metric_accepts_matching_database(monkeypatch: pytest.MonkeyPatch) -> None:
+    _verify(monkeypatch, "cosine", [(True,)], [("vector_cosine_ops",)])
+    _verify(monkeypatch, "ip", [(True,)], [("halfvec_ip_ops",)], [(1.0,), (0.99995,)])
+    _verify(monkeypatch, "ip", [(True,)], [("bit_hamming_ops",)], [])
+    # not migrated yet: nothing to compare against
+    _verify(monkeypatch, "ip", [(False,)])
+
+
+def test_verify_vector_metric_rejects_stale_index_or_rows(monkeypatch: pytest.MonkeyPatch) -> None:
+    with pytest.raises(RuntimeError, match="ANN index uses vector_cosine_ops"):
+        _verify(monkeypatch, "ip", [(True,)], [("vector_cosine_ops",)])
+    with pytest.raises(RuntimeError, match="ANN index uses vector_ip_ops"):
+        _verify(monkeypatch, "cosine", [(True,)], [("vector_ip_ops",)])
+    with pytest.raises(RuntimeError, match="not unit-length"):
+        _verify(monkeypatch, "ip", [(True,)], [("vector_ip_ops",)], [(1.0,), (22.6,)])
+
+
+def test_startup_skips_metric_check_without_database(monkeypatch: pytest.MonkeyPatch) -> None:
+    class _Unreachable:
+        async def __aenter__(self) -> Any:
+            raise ConnectionRefusedError("connection refused")
+
+        async def __aexit__(self, *exc: object) -> None:
+            return None
+
+    monkeypatch.setattr(main, "session_scope", _Unreachable)
+    asyncio.run(main._check_vector_metric())
+
+
+def test_startup_closes_engine_on_metric_mismatch(monkeypatch: pytest.MonkeyPatch) -> None:
+    closed: list[bool] = []
+
+    async def mismatch() -> None:
+        raise RuntimeError("APP_VECTOR_METRIC=ip but the chunks.embedding ANN index uses ...")
+
+    async def close_engine() -> None:
+        closed.append(True)
+
+    async def start() -> None:
+        async with main.lifespan(main.app):
+            pass
+
+    monkeypatch.setattr(main, "init_engine", lambda: None)
+    monkeypatch.setattr(main, "close_engine", close_engine)
+    monkeypatch.setattr(main, "_check_vector_metric", mismatch)
+    with pytest.raises(RuntimeError, match="ANN index uses"):
+        asyncio.run(start())
+    assert closed == [True]
@@ -0,0 +1,168 @@
+from __future__ import annotations
+
+import asyncio
+import base64
+import json
+import threading
+from collections.abc import Iterator
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any
+
+import numpy as np
+import pytest
+
+from app.core.settings import get_settings
+from app.db.types import EmbeddingArray
+from app.infra.clients import close_clients, get_clients, init_clients
+from app.rag.ingestion.embeddings import EmbeddingsClient
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive
+    peers: list[int] = []  # noqa: RUF012
+    formats: list[str | None] = []  # noqa: RUF012
+    dimensions: list[int | None] = []  # noqa: RUF012
+
+    def do_POST(self) -> None:
+        self.peers.append(self.client_address[1])
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        self.formats.append(body.get("encoding_format"))
+        self.dimensions.append(body.get("dimensions"))
+        # 3-dim model that honours `dimensions` (shortened, not re-normalized here)
+        vectors = [
+            np.array([len(t), 0.0, 1.0], dtype="<f4")[: body.get("dimensions") or 3]
+            for t in body["input"]
+        ]
+        payload = {
+            "object": "list",
+            "model": body["model"],
+            "data": [
+                {
+                    "object": "embedding",
+                    "index": i,
+                    "embedding": base64.b64encode(v.tobytes()).decode()
+                    if body.get("encoding_format") == "base64"
+                    else v.tolist(),
+                }
+                for i, v in enumerate(vectors)
+            ],
+            "usage": {"prompt_tokens": 1, "total_tokens": 1},
+        }
+        data = json.dumps(payload).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args: Any) -> None:
+        pass
+
+
+@pytest.fixture
+def stub_openai(monkeypatch: pytest.MonkeyPatch) -> Iterator[list[int]]:
+    _StubHandler.peers = []
+    _StubHandler.formats = []
+    _StubHandler.dimensions = []
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _StubHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+
+    monkeypatch.setenv("OPENAI_API_KEY", "test")
+    monkeypatch.setenv("OPENAI_BASE_URL", f"http://127.0.0.1:{server.server_port}/v1")
+    monkeypatch.setenv("APP_EMBEDDINGS_BACKEND", "openai")
+    monkeypatch.setenv("APP_EMBEDDINGS_DIM", "3")
+    get_settings.cache_clear()
+    try:
+        yield _StubHandler.peers
+    finally:
+        server.shutdown()
+        server.server_close()
+        get_settings.cache_clear()
+
+
+def test_embeddings_reuse_pooled_connection(stub_openai: list[int]) -> None:
+    async def main() -> list[EmbeddingArray]:
+        init_clients()
+        try:
+            out: list[EmbeddingArray] = []
+            for q in ["a", "bb", "ccc"]:
+                out += await EmbeddingsClient().embed([q])
+            return out
+        finally:
+            await close_clients()
+
+    out = asyncio.run(main())
+
+    assert [v.tolist() for v in out] == [[1.0, 0.0, 1.0], [2.0, 0.0, 1.0], [3.0, 0.0, 1.0]]
+    assert all(v.dtype == np.float32 for v in out)
+    # float32 on the wire, decoded into arrays without Python float lists
+    assert _StubHandler.formats == ["base64"] * 3
+    # three requests, one TCP connection (same client port)
+    assert len(stub_openai) == 3
+    assert len(set(stub_openai)) == 1
+
+
+def _embed_once(texts: list[str]) -> list[EmbeddingArray]:
+    async def main() -> list[EmbeddingArray]:
+        init_clients()
+        try:
+            return await EmbeddingsClient().embed(texts)
+        finally:
+            await close_clients()
+
+    return asyncio.run(main())
+
+
+def test_api_truncation_sends_dimensions(
+    stub_openai: list[int], monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setenv("APP_EMBEDDINGS_DIM", "2")
+    monkeypatch.setenv("APP_EMBEDDINGS_TRUNCATE", "api")
+    get_settings.cache_clear()
+
+    out = _embed_once(["abcd"])
+
+    assert _StubHandler.dimensions == [2]
+    assert [v.tolist() for v in out] == [[4.0, 0.0]]
+
+
+def test_client_truncation_keeps_prefix_and_renormalizes(
+    stub_openai: list[int], monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setenv("APP_EMBEDDINGS_DIM", "2")
+    monkeypatch.setenv("APP_EMBEDDINGS_TRUNCATE", "client")
+    get_settings.cache_clear()
+
+    out = _embed_once(["abcd"])
+
+    assert _StubHandler.dimensions == [None]
+    assert [v.tolist() for v in out] == [[1.0, 0.0]]
+
+
+def test_dimension_mismatch_fails_before_insert(
+    stub_openai: list[int], monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setenv("APP_EMBEDDINGS_DIM", "2")
+    get_settings.cache_clear()
+
+    with pytest.raises(ValueError, match=r"3-dim vectors, chunks\.embedding expects 2"):
+        _embed_once(["abcd"])
+
+
+def test_inner_product_metric_normalizes_embeddings(
+    stub_openai: list[int], monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setenv("APP_VECTOR_METRIC", "ip")
+    get_settings.cache_clear()
+
+    out = _embed_once(["abc", "abcd"])
+
+    assert [float(np.linalg.norm(v)) for v in out] == pytest.approx([1.0, 1.0])
+    assert out[0].dtype == np.float32
+    assert out[0].tolist() == pytest.approx([3 / 10**0.5, 0.0, 1 / 10**0.5])
+
+
+def test_get_clients_requires_init() -> None:
+    with pytest.raises(RuntimeError, match="init_clients"):
+        get_clients()
@@ -0,0 +1,86 @@
+from __future__ import annotations
+
+import asyncio
+
+import numpy as np
+import pytest
+
+from app.db.types import EmbeddingArray
+from app.rag.ingestion.coalescer import EmbeddingsCoalescer
+
+
+def test_concurrent_calls_share_one_provider_call() -> None:
+    calls: list[list[str]] = []
+
+    async def embed(texts: list[str]) -> list[EmbeddingArray]:
+        calls.append(list(texts))
+        return [np.array([len(t)], dtype=np.float32) for t in texts]
+
+    async def main() -> list[EmbeddingArray]:
+        co = EmbeddingsCoalescer(embed=embed, max_batch=64, window_ms=5)
+        return list(await asyncio.gather(*(co.embed_one(q) for q in ["a", "bb", "ccc", "bb"])))
+
+    out = asyncio.run(main())
+
+    assert [v.tolist() for v in out] == [[1.0], [2.0], [3.0], [2.0]]
+    assert calls == [["a", "bb", "ccc"]]
+
+
+def test_full_batch_flushes_without_waiting_for_window() -> None:
+    calls: list[list[str]] = []
+
+    async def embed(texts: list[str]) -> list[EmbeddingArray]:
+        calls.append(list(texts))
+        return [np.zeros(1, dtype=np.float32) for _ in texts]
+
+    async def main() -> EmbeddingsCoalescer:
+        co = EmbeddingsCoalescer(embed=embed, max_batch=2, window_ms=10_000)
+        await asyncio.wait_for(asyncio.gather(co.embed_one("x"), co.embed_one("y")), timeout=1)
+        return co
+
+    co = asyncio.run(main())
+
+    assert calls == [["x", "y"]]
+    assert co.stats()["batch_size"]["count"] == 1
+
+
+def test_provider_error_reaches_every_caller() -> None:
+    async def embed(texts: list[str]) -> list[EmbeddingArray]:
+        raise RuntimeError("rate limited")
+
+    async def main() -> None:
+        co = EmbeddingsCoalescer(embed=embed, max_batch=8, window_ms=1)
+        await asyncio.gather(co.embed_one("a"), co.embed_one("b"))
+
+    with pytest.raises(RuntimeError, match="rate limited"):
+        asyncio.run(main())
+
+
+def test_short_provider_response_fails_every_caller() -> None:
+    async def embed(texts: list[str]) -> list[EmbeddingArray]:
+        return [np.zeros(1, dtype=np.float32)]
+
+    async def main() -> list[object]:
+        co = EmbeddingsCoalescer(embed=embed, max_batch=8, window_ms=1)
+        calls = (co.embed_one(q) for q in ["a", "b", "c"])
+        return await asyncio.wait_for(asyncio.gather(*calls, return_exceptions=True), timeout=1)
+
+    out = asyncio.run(main())
+
+    assert len(out) == 3
+    assert all(isinstance(e, ValueError) and "1 vectors for 3 texts" in str(e) for e in out)
+
+
+def test_cancelled_batch_cancels_waiting_callers() -> None:
+    async def embed(texts: list[str]) -> list[EmbeddingArray]:
+        raise asyncio.CancelledError  # batch task cancelled, e.g. at shutdown
+
+    async def main() -> list[object]:
+        co = EmbeddingsCoalescer(embed=embed, max_batch=2, window_ms=1)
+        calls = (co.embed_one(q) for q in ["a", "b"])
+        return await asyncio.wait_for(asyncio.gather(*calls, return_exceptions=True), timeout=1)
+
+    out = asyncio.run(main())
+
+    assert len(out) == 2
+    assert all(isinstance(e, asyncio.CancelledError) for e in out)
@@ -0,0 +1,62 @@
+from __future__ import annotations
+
+import asyncio
+from dataclasses import dataclass, field
+
+import numpy as np
+
+from app.core.cache import TTLCache
+from app.db.types import EmbeddingArray
+from app.rag.ingestion.embedding_cache import (
+    CachedEmbeddingsBackend,
+    EmbeddingCache,
+    decode_vector,
+    encode_vector,
+)
+
+
+@dataclass
+class CountingBackend:
+    calls: list[list[str]] = field(default_factory=list)
+
+    @property
+    def dim(self) -> int:
+        return 4
+
+    async def embed(self, texts: list[str]) -> list[EmbeddingArray]:
+        self.calls.append(list(texts))
+        return [np.array([len(t), 0.5, -0.25, 1.0], dtype=np.float32) for t in texts]
+
+
+def test_vector_roundtrip_is_float32() -> None:
+    data = encode_vector(np.array([0.5, -0.25, 1.0], dtype=np.float32))
+    assert len(data) == 12
+    decoded = decode_vector(data)
+    assert decoded.dtype == np.float32
+    assert decoded.tolist() == [0.5, -0.25, 1.0]
+
+
+def test_ttl_cache_evicts_lru_and_expired() -> None:
+    now = [0.0]
+    cache: TTLCache[str, int] = TTLCache(maxsize=2, ttl_s=10, clock=lambda: now[0])
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1
+    cache.set("c", 3)  # evicts "b", the least recently used
+    assert cache.get("b") is None
+    now[0] = 11.0
+    assert cache.get("a") is None
+
+
+def test_cache_hit_skips_backend() -> None:
+    inner = CountingBackend()
+    cache = EmbeddingCache(maxsize=16, ttl_s=60, use_redis=False)
+    backend = CachedEmbeddingsBackend(inner=inner, cache=cache, namespace="emb:test:4")
+
+    first = asyncio.run(backend.embed(["what is this doc about"]))
+    second = asyncio.run(backend.embed(["what is this doc about", "new question"]))
+
+    assert second[0] is first[0]
+    assert inner.calls == [["what is this doc about"], ["new question"]]
+    assert cache.stats.local_hits == 1
+    assert cache.stats.misses == 2
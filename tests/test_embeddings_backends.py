@@ -0,0 +1,86 @@
+from __future__ import annotations
+
+import asyncio
+import hashlib
+
+import numpy as np
+import pytest
+
+from app.rag.ingestion.embeddings import (
+    HashingEmbeddingsBackend,
+    MockEmbeddingsBackend,
+    normalize_embeddings,
+    truncate_embedding,
+)
+
+
+def _reference_mock(text: str, dim: int) -> list[float]:
+    h = hashlib.sha256(text.encode("utf-8")).digest()
+    raw = (h * ((dim // len(h)) + 1))[:dim]
+    return [(b - 128) / 128.0 for b in raw]
+
+
+def test_vectorized_mock_matches_reference() -> None:
+    texts = ["a", "héllo wörld", "", "x" * 5000]
+    for dim in (1536, 50, 32):
+        out = asyncio.run(MockEmbeddingsBackend(_dim=dim).embed(texts))
+        assert all(v.dtype == np.float32 for v in out)
+        assert [v.tolist() for v in out] == [_reference_mock(t, dim) for t in texts]
+    assert asyncio.run(MockEmbeddingsBackend().embed([])) == []
+
+
+def test_hashing_backend_is_deterministic_and_normalized() -> None:
+    backend = HashingEmbeddingsBackend(_dim=64, n_features=512, seed=3)
+    a = asyncio.run(backend.embed(["Vector search with pgvector", "", "?!"]))
+    b = asyncio.run(backend.embed(["Vector search with pgvector"]))
+
+    assert np.array_equal(a[0], b[0])
+    assert a[0].shape == (64,) and a[0].dtype == np.float32
+    assert abs(float(np.linalg.norm(a[0])) - 1.0) < 1e-5
+    assert a[1].tolist() == [0.0] * 64  # no tokens -> zero vector, not NaN
+    other = HashingEmbeddingsBackend(_dim=64, n_features=512, seed=4)
+    assert not np.array_equal(
+        asyncio.run(other.embed(["x"]))[0], asyncio.run(backend.embed(["x"]))[0]
+    )
+
+
+def test_hashing_backend_ranks_lexically_related_text_first() -> None:
+    backend = HashingEmbeddingsBackend(_dim=256, n_features=2048)
+    docs = [
+        "The worker retries failed ingestion jobs with a growing delay.",
+        "Vector search uses cosine distance over an HNSW index in pgvector.",
+        "Answers are streamed token by token from the chat completions API.",
+    ]
+    vecs = np.asarray(asyncio.run(backend.embed(docs)))
+    for i, question in enumerate(
+        [
+            "how does the worker retry failed jobs?",
+            "which index does vector search use?",
+            "are answers streamed token by token?",
+        ]
+    ):
+        q = np.asarray(asyncio.run(backend.embed([question]))[0])
+        assert int(np.argmax(vecs @ q)) == i
+
+
+def test_truncate_embedding_renormalizes_prefix() -> None:
+    v = np.array([3.0, 4.0, 12.0], dtype=np.float32)
+
+    out = truncate_embedding(v, 2)
+
+    assert out.dtype == np.float32
+    assert np.allclose(out, [0.6, 0.8])
+    assert truncate_embedding(np.zeros(3, dtype=np.float32), 2).tolist() == [0.0, 0.0]
+    with pytest.raises(ValueError, match=r"Cannot truncate a 3-dim embedding to 4"):
+        truncate_embedding(v, 4)
+
+
+def test_normalize_embeddings_unit_length_and_zero_safe() -> None:
+    vectors = asyncio.run(MockEmbeddingsBackend(_dim=32).embed(["a", "b"]))
+    out = normalize_embeddings([*vectors, np.zeros(32, dtype=np.float32)])
+
+    assert all(v.dtype == np.float32 for v in out)
+    assert np.linalg.norm(out[:2], axis=1) == pytest.approx([1.0, 1.0])
+    assert np.allclose(out[0] * np.linalg.norm(vectors[0]), vectors[0], atol=1e-6)
+    assert not out[2].any()
+    assert normalize_embeddings([]) == []
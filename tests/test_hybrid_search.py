@@ -0,0 +1,134 @@
+from __future__ import annotations
+
+import asyncio
+import uuid
+from collections.abc import Iterator
+from typing import Any
+
+import numpy as np
+import pytest
+
+from app.api.v1.schemas.query import SourceChunk
+from app.core.settings import get_settings
+from app.db.types import EmbeddingArray
+from app.rag.answering import service
+from app.rag.answering.answer_cache import CachedAnswer
+from app.rag.answering.types import AnswerEvent, SourcesEvent
+from app.rag.retrieval.search import build_lexical_query, reciprocal_rank_fusion
+from app.repos.chunks import ChunkHit
+
+
+def test_lexical_query_is_or_of_unique_terms() -> None:
+    assert (
+        build_lexical_query("Error E1234 in pg_dump? error!")
+        == "'error' | 'e1234' | 'in' | 'pg_dump'"
+    )
+    assert build_lexical_query("?!") is None
+
+
+def test_rrf_promotes_chunks_found_by_both_legs() -> None:
+    vector = [ChunkHit(1, "a", 0.9), ChunkHit(2, "b", 0.8), ChunkHit(3, "c", 0.7)]
+    lexical = [ChunkHit(3, "c", 4.0), ChunkHit(4, "d", 2.0)]
+
+    fused = reciprocal_rank_fusion([vector, lexical], k=60)
+
+    assert [h.chunk_index for h in fused] == [3, 1, 2, 4]
+    assert fused[0].score == (1 / 63 + 1 / 61) / (2 / 61)
+    assert all(0.0 < h.score <= 1.0 for h in fused)
+
+
+def test_rrf_limit() -> None:
+    hits = [ChunkHit(i, str(i), 1.0) for i in range(10)]
+    assert len(reciprocal_rank_fusion([hits], limit=3)) == 3
+
+
+@pytest.fixture
+def hybrid(monkeypatch: pytest.MonkeyPatch) -> Iterator[list[str]]:
+    """Hybrid mode with a fake lexical leg; yields its lifecycle log."""
+    monkeypatch.setenv("APP_RETRIEVAL_MODE", "hybrid")
+    monkeypatch.setenv("APP_RETRIEVAL_CACHE_ENABLED", "false")
+    get_settings.cache_clear()
+    log: list[str] = []
+
+    async def fake_lexical(**kw: Any) -> tuple[list[ChunkHit], float]:
+        log.append("started")
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            log.append("cancelled")
+            raise
+        return [], 0.0
+
+    async def fake_embed(questions: list[str]) -> tuple[list[EmbeddingArray], float]:
+        return [np.array([1.0, 0.0], dtype=np.float32)], 0.1
+
+    async def fake_version(document_id: uuid.UUID) -> int:
+        return 1
+
+    monkeypatch.setattr(service, "_lexical_search", fake_lexical)
+    monkeypatch.setattr(service, "embed_questions", fake_embed)
+    monkeypatch.setattr(service, "get_document_version", fake_version)
+    yield log
+    get_settings.cache_clear()
+
+
+def _drain(log: list[str]) -> tuple[list[AnswerEvent], Exception | None, list[str]]:
+    """Run one question; also returns the lexical log as seen before the loop shuts down."""
+
+    async def run() -> tuple[list[AnswerEvent], Exception | None, list[str]]:
+        events: list[AnswerEvent] = []
+        error: Exception | None = None
+        try:
+            async for e in service.answer_question_stream(
+                session=object(),  # type: ignore[arg-type]
+                document_id=uuid.UUID(int=1),
+                question="q",
+                top_k=3,
+            ):
+                events.append(e)
+        except Exception as e:
+            error = e
+        await asyncio.sleep(0)  # let a cancelled lexical leg run its handler
+        return events, error, list(log)
+
+    return asyncio.run(run())
+
+
+def test_answer_cache_hit_skips_lexical_leg(
+    monkeypatch: pytest.MonkeyPatch, hybrid: list[str]
+) -> None:
+    monkeypatch.setenv("APP_ANSWER_CACHE_ENABLED", "true")
+    get_settings.cache_clear()
+    entry = CachedAnswer(
+        question="q", answer="a", sources=[SourceChunk(chunk_index=0, text="t", score=1.0)]
+    )
+
+    class _HitCache:
+        def lookup(self, **kw: Any) -> tuple[CachedAnswer, float]:
+            return entry, 0.99
+
+    monkeypatch.setattr(service, "get_answer_cache", _HitCache)
+
+    events, error, log = _drain(hybrid)
+
+    assert error is None
+    assert isinstance(events[0], SourcesEvent) and events[0].answer_cache_hit
+    assert log == []
+
+
+def test_failed_retrieval_cancels_lexical_leg(
+    monkeypatch: pytest.MonkeyPatch, hybrid: list[str]
+) -> None:
+    monkeypatch.setenv("APP_ANSWER_CACHE_ENABLED", "false")
+    get_settings.cache_clear()
+
+    async def failing_retrieve(**kw: Any) -> Any:
+        await asyncio.sleep(0)  # lexical leg is running by now
+        raise RuntimeError("db down")
+
+    monkeypatch.setattr(service, "_retrieve", failing_retrieve)
+
+    _, error, log = _drain(hybrid)
+
+    assert isinstance(error, RuntimeError)
+    assert log == ["started", "cancelled"]
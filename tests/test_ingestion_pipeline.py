@@ -0,0 +1,193 @@
+from __future__ import annotations
+
+import asyncio
+import uuid
+from collections.abc import Iterator
+from typing import Any
+
+import numpy as np
+import pytest
+
+from app.core.settings import get_settings
+from app.db.types import EmbeddingArray
+from app.rag.ingestion import pipeline
+from app.rag.ingestion.pipeline import _run_stages
+from app.repos.chunks import ChunkRow
+
+
+class _FakeSession:
+    def __init__(self) -> None:
+        self.commits = 0
+
+    async def commit(self) -> None:
+        self.commits += 1
+
+
+class _FakeChunkRepo:
+    def __init__(self) -> None:
+        self.batches: list[list[ChunkRow]] = []
+
+    async def add_chunks(self, *, document_id: uuid.UUID, rows: list[ChunkRow], **_: Any) -> int:
+        self.batches.append(list(rows))
+        return len(rows)
+
+
+class _FakeDocRepo:
+    def __init__(self) -> None:
+        self.checkpoints: list[int] = []
+
+    async def set_checkpoint(self, *, document_id: uuid.UUID, last_chunk_index: int) -> None:
+        self.checkpoints.append(last_chunk_index)
+
+
+class _SlowFirstEmbeddings:
+    """First batch is the slowest, so later batches finish embedding before it."""
+
+    def __init__(self) -> None:
+        self.calls = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def embed(self, texts: list[str]) -> list[EmbeddingArray]:
+        delay = 0.05 if self.calls == 0 else 0.001
+        self.calls += 1
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        await asyncio.sleep(delay)
+        self.in_flight -= 1
+        return [np.array([len(t)], dtype=np.float32) for t in texts]
+
+
+@pytest.fixture
+def small_batches(monkeypatch: pytest.MonkeyPatch) -> Iterator[None]:
+    monkeypatch.setenv("APP_INGEST_BATCH_SIZE", "2")
+    monkeypatch.setenv("APP_INGEST_EMBED_CONCURRENCY", "3")
+    monkeypatch.setenv("APP_INGEST_QUEUE_SIZE", "2")
+    get_settings.cache_clear()
+    yield
+    get_settings.cache_clear()
+
+
+def test_stages_overlap_and_commit_in_order(small_batches: None) -> None:
+    session = _FakeSession()
+    repo = _FakeChunkRepo()
+    emb = _SlowFirstEmbeddings()
+    text = " ".join(f"word{i}" for i in range(2000))
+
+    stats = asyncio.run(
+        _run_stages(
+            session=session,  # type: ignore[arg-type]
+            chunk_repo=repo,  # type: ignore[arg-type]
+            doc_repo=_FakeDocRepo(),  # type: ignore[arg-type]
+            emb=emb,  # type: ignore[arg-type]
+            document_id=uuid.uuid4(),
+            pieces=[text[:5000], text[5000:]],
+        )
+    )
+
+    indices = [r.chunk_index for batch in repo.batches for r in batch]
+    assert indices == list(range(len(indices)))
+    assert session.commits == len(repo.batches) == stats.writer.batches
+    assert emb.max_in_flight > 1
+    assert stats.chunker.chunks == stats.embedder.chunks == stats.writer.chunks == len(indices)
+    assert stats.as_dict()["embedder"]["max_queue_depth"] <= 2
+
+
+def test_stage_failure_is_raised_unwrapped(small_batches: None) -> None:
+    class _Failing:
+        async def embed(self, texts: list[str]) -> list[EmbeddingArray]:
+            raise RuntimeError("provider down")
+
+    with pytest.raises(RuntimeError, match="provider down"):
+        asyncio.run(
+            _run_stages(
+                session=_FakeSession(),  # type: ignore[arg-type]
+                chunk_repo=_FakeChunkRepo(),  # type: ignore[arg-type]
+                doc_repo=_FakeDocRepo(),  # type: ignore[arg-type]
+                emb=_Failing(),  # type: ignore[arg-type]
+                document_id=uuid.uuid4(),
+                pieces=["x " * 5000],
+            )
+        )
+
+
+def test_resume_skips_committed_chunks(small_batches: None) -> None:
+    text = " ".join(f"word{i}" for i in range(500))
+
+    async def run(start_index: int) -> tuple[_FakeChunkRepo, _FakeDocRepo, _SlowFirstEmbeddings]:
+        repo, docs, emb = _FakeChunkRepo(), _FakeDocRepo(), _SlowFirstEmbeddings()
+        await _run_stages(
+            session=_FakeSession(),  # type: ignore[arg-type]
+            chunk_repo=repo,  # type: ignore[arg-type]
+            doc_repo=docs,  # type: ignore[arg-type]
+            emb=emb,  # type: ignore[arg-type]
+            document_id=uuid.uuid4(),
+            pieces=[text],
+            start_index=start_index,
+        )
+        return repo, docs, emb
+
+    full_repo, full_docs, _ = asyncio.run(run(0))
+    resumed_repo, resumed_docs, resumed_emb = asyncio.run(run(3))
+
+    full = [(r.chunk_index, r.text) for b in full_repo.batches for r in b]
+    resumed = [(r.chunk_index, r.text) for b in resumed_repo.batches for r in b]
+    assert resumed == full[3:]
+    assert resumed_docs.checkpoints[-1] == full_docs.checkpoints[-1] == len(full) - 1
+    assert resumed_emb.calls == len(resumed_repo.batches)
+
+
+def test_failed_ingestion_keeps_partial_stage_stats(
+    small_batches: None, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    class _Session(_FakeSession):
+        async def rollback(self) -> None:
+            pass
+
+    class _Docs(_FakeDocRepo):
+        statuses: list[str] = []  # noqa: RUF012
+        stats: list[dict[str, Any]] = []  # noqa: RUF012
+
+        def __init__(self, session: Any) -> None:
+            super().__init__()
+
+        async def get(self, *, document_id: uuid.UUID) -> None:
+            return None
+
+        async def set_status(self, *, document_id: uuid.UUID, status: str, **_: Any) -> None:
+            self.statuses.append(status)
+
+        async def set_ingest_stats(self, *, document_id: uuid.UUID, stats: dict[str, Any]) -> None:
+            self.stats.append(stats)
+
+    class _FailsThirdBatch:
+        def __init__(self) -> None:
+            self.calls = 0
+
+        async def embed(self, texts: list[str]) -> list[EmbeddingArray]:
+            self.calls += 1
+            if self.calls == 3:
+                await asyncio.sleep(0.05)  # batches 1-2 are embedded by then
+                raise RuntimeError("provider down")
+            return [np.zeros(1, dtype=np.float32) for _ in texts]
+
+    monkeypatch.setattr(pipeline, "DocumentRepository", _Docs)
+    monkeypatch.setattr(pipeline, "ChunkRepository", lambda session: _FakeChunkRepo())
+    monkeypatch.setattr(pipeline, "EmbeddingsClient", _FailsThirdBatch)
+
+    with pytest.raises(RuntimeError, match="provider down"):
+        asyncio.run(
+            pipeline.ingest_text_stream(
+                session=_Session(),  # type: ignore[arg-type]
+                document_id=uuid.uuid4(),
+                pieces=[" ".join(f"word{i}" for i in range(2000))],
+            )
+        )
+
+    assert _Docs.statuses == ["processing", "failed"]
+    [stats] = _Docs.stats
+    assert stats["wall_ms"] > 0
+    assert stats["chunker"]["batches"] >= 3
+    assert stats["embedder"]["batches"] >= 2
+    # the writer stops at the gap left by the failed batch
+    assert stats["writer"]["batches"] == 2
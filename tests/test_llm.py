@@ -0,0 +1,130 @@
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Iterator
+from typing import Any
+
+import httpx
+import pytest
+from openai import AsyncOpenAI
+
+from app.core.settings import get_settings
+from app.rag.answering import llm
+from app.rag.answering.prompt import build_context, build_messages
+from scripts.openai_stub import StubConfig, create_stub_app
+
+
+@pytest.fixture
+def llm_env(monkeypatch: pytest.MonkeyPatch) -> Iterator[pytest.MonkeyPatch]:
+    monkeypatch.setenv("OPENAI_API_KEY", "test")
+    monkeypatch.setenv("APP_LLM_BACKEND", "openai")
+    get_settings.cache_clear()
+    try:
+        yield monkeypatch
+    finally:
+        get_settings.cache_clear()
+
+
+class _InFlight:
+    """ASGI wrapper around the stub provider: peak number of concurrent requests."""
+
+    def __init__(self, app: Any) -> None:
+        self.app = app
+        self.active = 0
+        self.peak = 0
+        self.calls = 0
+
+    async def __call__(self, scope: Any, receive: Any, send: Any) -> None:
+        self.calls += 1
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.active -= 1
+
+
+def _use_stub(monkeypatch: pytest.MonkeyPatch, cfg: StubConfig) -> _InFlight:
+    provider = _InFlight(create_stub_app(cfg))
+
+    def client() -> AsyncOpenAI:
+        transport = httpx.ASGITransport(app=provider)
+        return AsyncOpenAI(
+            api_key="test",
+            base_url="http://stub/v1",
+            http_client=httpx.AsyncClient(transport=transport),
+        )
+
+    monkeypatch.setattr(llm, "get_openai_client", client)
+    return provider
+
+
+def test_streams_tokens_from_stub_server(llm_env: pytest.MonkeyPatch) -> None:
+    _use_stub(llm_env, StubConfig(ttft_ms=0, tokens_per_s=0, answer_tokens=5))
+
+    async def run() -> list[str]:
+        return [t async for t in llm.stream_answer_llm(question="q", context="[1] ctx")]
+
+    tokens = asyncio.run(run())
+    assert len(tokens) == 5
+    assert "".join(tokens).startswith("Based on the provided")
+
+
+def test_timeout_applies_per_call(llm_env: pytest.MonkeyPatch) -> None:
+    llm_env.setenv("APP_LLM_TIMEOUT_S", "0.05")
+    get_settings.cache_clear()
+    _use_stub(llm_env, StubConfig(ttft_ms=500, tokens_per_s=0, answer_tokens=3))
+
+    with pytest.raises(TimeoutError):
+        asyncio.run(llm.generate_answer_llm(question="q", context="c"))
+
+
+def test_semaphore_caps_in_flight_calls(llm_env: pytest.MonkeyPatch) -> None:
+    llm_env.setenv("APP_LLM_MAX_CONCURRENCY", "2")
+    get_settings.cache_clear()
+    provider = _use_stub(llm_env, StubConfig(ttft_ms=20, tokens_per_s=0, answer_tokens=1))
+
+    async def run() -> None:
+        await asyncio.gather(
+            *(llm.generate_answer_llm(question="q", context="c") for _ in range(6))
+        )
+
+    asyncio.run(run())
+    assert provider.calls == 6
+    assert provider.peak == 2
+
+
+def test_slow_reader_does_not_hold_llm_slot(llm_env: pytest.MonkeyPatch) -> None:
+    llm_env.setenv("APP_LLM_MAX_CONCURRENCY", "1")
+    get_settings.cache_clear()
+    _use_stub(llm_env, StubConfig(ttft_ms=0, tokens_per_s=0, answer_tokens=5))
+
+    async def run() -> str:
+        stalled = llm.stream_answer_llm(question="q", context="c")
+        await anext(stalled)  # reader takes one token, then stops reading
+        try:
+            async with asyncio.timeout(2.0):
+                return await llm.generate_answer_llm(question="q", context="c")
+        finally:
+            await stalled.aclose()
+
+    assert asyncio.run(run()).startswith("Based on the provided")
+
+
+def test_disabled_backend_fails_fast(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setenv("APP_LLM_BACKEND", "disabled")
+    get_settings.cache_clear()
+    try:
+        with pytest.raises(RuntimeError, match="disabled"):
+            asyncio.run(llm.generate_answer_llm(question="q", context="c"))
+    finally:
+        get_settings.cache_clear()
+
+
+def test_prompt_numbers_passages_within_budget() -> None:
+    ctx = build_context(["alpha", "beta", "gamma" * 10], max_chars=20)
+    assert ctx == "[1] alpha\n\n[2] beta"
+
+    messages = build_messages(question=" why? ", context=ctx)
+    assert [m["role"] for m in messages] == ["system", "user"]
+    assert messages[1]["content"].endswith("Question: why?")
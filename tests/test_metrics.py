@@ -0,0 +1,56 @@
+from __future__ import annotations
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from prometheus_client import REGISTRY
+from sqlalchemy import create_engine, text
+
+from app.api.metrics import router
+from app.core.metrics import observe_query_stages
+from app.db.engine import _Session
+from app.rag.retrieval.cache import RetrievalCache
+
+
+def _sample(name: str, labels: dict[str, str]) -> float:
+    return REGISTRY.get_sample_value(name, labels) or 0.0
+
+
+def test_stage_histograms_skip_zero_stages() -> None:
+    before_embed = _sample("rag_query_stage_seconds_count", {"stage": "embed"})
+    before_llm = _sample("rag_query_stage_seconds_count", {"stage": "llm"})
+
+    observe_query_stages({"embed": 12.0, "llm": 0.0})
+
+    assert _sample("rag_query_stage_seconds_count", {"stage": "embed"}) == before_embed + 1
+    assert _sample("rag_query_stage_seconds_count", {"stage": "llm"}) == before_llm
+    assert _sample("rag_query_stage_seconds_bucket", {"stage": "embed", "le": "0.025"}) >= 1
+
+
+def test_cache_counters_and_metrics_endpoint() -> None:
+    labels = {"cache": "retrieval", "result": "miss"}
+    before = _sample("rag_cache_lookups_total", labels)
+    RetrievalCache(maxsize=4, ttl_s=60).get("missing")
+    assert _sample("rag_cache_lookups_total", labels) == before + 1
+
+    app = FastAPI()
+    app.include_router(router)
+    resp = TestClient(app).get("/metrics")
+
+    assert resp.status_code == 200
+    assert resp.headers["content-type"].startswith("text/plain")
+    assert "rag_query_stage_seconds_bucket" in resp.text
+    assert "rag_db_pool_wait_seconds" in resp.text
+
+
+def test_pool_wait_is_observed_once_per_transaction() -> None:
+    before = _sample("rag_db_pool_wait_seconds_count", {})
+    engine = create_engine("sqlite://")
+
+    with _Session(engine) as session:
+        session.execute(text("SELECT 1"))
+        session.execute(text("SELECT 2"))  # same transaction, same connection
+        session.commit()
+        with session.begin():
+            session.execute(text("SELECT 3"))
+
+    assert _sample("rag_db_pool_wait_seconds_count", {}) == before + 2
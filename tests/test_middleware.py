@@ -0,0 +1,50 @@
+from __future__ import annotations
+
+import logging
+
+import pytest
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+
+from app.core.middleware import RequestIdLoggingMiddleware
+from app.core.request_context import add_server_timing, get_request_id
+
+
+def _app() -> FastAPI:
+    app = FastAPI()
+    app.add_middleware(RequestIdLoggingMiddleware)
+
+    @app.get("/work")
+    async def work(request: Request) -> dict[str, str | None]:
+        add_server_timing("embed", 1.25)
+        add_server_timing("db", 2.0)
+        add_server_timing("db", 1.0)
+        add_server_timing("llm", 0.0)  # zero stages are left out
+        return {"state": request.state.request_id, "ctx": get_request_id()}
+
+    return app
+
+
+def test_request_id_and_server_timing(caplog: pytest.LogCaptureFixture) -> None:
+    client = TestClient(_app())
+
+    with caplog.at_level(logging.INFO, logger="app.access"):
+        resp = client.get("/work", headers={"X-Request-Id": "rid-1"})
+
+    assert resp.json() == {"state": "rid-1", "ctx": "rid-1"}
+    assert resp.headers["X-Request-Id"] == "rid-1"
+
+    entries = [p.strip() for p in resp.headers["Server-Timing"].split(",")]
+    assert entries[:2] == ["embed;dur=1.2", "db;dur=3.0"]
+    assert entries[2].startswith("app;dur=")
+    assert len(entries) == 3
+
+    access = [r for r in caplog.records if r.name == "app.access"]
+    assert len(access) == 1
+    assert access[0].__dict__["status"] == 200
+
+
+def test_generates_request_id_when_missing() -> None:
+    resp = TestClient(_app()).get("/work")
+    assert resp.headers["X-Request-Id"] == resp.json()["state"]
+    assert len(resp.headers["X-Request-Id"]) == 36
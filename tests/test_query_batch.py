@@ -0,0 +1,84 @@
+from __future__ import annotations
+
+import asyncio
+import uuid
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from typing import Any
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.api.v1 import query as query_api
+from app.core.middleware import RequestIdLoggingMiddleware
+from app.rag.answering import service
+from app.rag.answering.types import AnswerResult, AnswerTimings, BatchQuestion
+
+
+def test_batch_embeds_once_and_bounds_concurrency(monkeypatch: pytest.MonkeyPatch) -> None:
+    embed_calls: list[list[str]] = []
+    active = 0
+    peak = 0
+
+    async def fake_embed_questions(questions: list[str]) -> tuple[list[list[float]], float]:
+        embed_calls.append(questions)
+        return [[float(i)] for i in range(len(questions))], 1.0
+
+    @asynccontextmanager
+    async def fake_session_scope() -> AsyncIterator[object]:
+        yield object()
+
+    async def fake_answer_question(**kw: Any) -> AnswerResult:
+        nonlocal active, peak
+        active += 1
+        peak = max(peak, active)
+        await asyncio.sleep(0.01)
+        active -= 1
+        answer = f"{kw['question']}:{kw['embedded'].vector[0]:g}"
+        return AnswerResult(answer=answer, sources=[], timings=AnswerTimings())
+
+    monkeypatch.setattr(service, "embed_questions", fake_embed_questions)
+    monkeypatch.setattr(service, "session_scope", fake_session_scope)
+    monkeypatch.setattr(service, "answer_question", fake_answer_question)
+
+    doc = uuid.uuid4()
+    items = [BatchQuestion(document_id=doc, question=f"q{i}", top_k=3) for i in range(6)]
+    results, embed_ms = asyncio.run(service.answer_questions_batch(items=items, concurrency=2))
+
+    assert embed_calls == [[f"q{i}" for i in range(6)]]
+    assert embed_ms == 1.0
+    assert [r.answer for r in results] == [f"q{i}:{i}" for i in range(6)]
+    assert peak == 2
+
+
+def test_batch_server_timing_reports_slowest_item_not_sum(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    async def fake_batch(
+        *, items: list[BatchQuestion], concurrency: int
+    ) -> tuple[list[AnswerResult], float]:
+        results = [
+            AnswerResult(
+                answer=None,
+                sources=[],
+                timings=AnswerTimings(vector_search_ms=10.0 * (i + 1), rerank_ms=2.0),
+            )
+            for i in range(len(items))
+        ]
+        return results, 5.0
+
+    monkeypatch.setattr(query_api, "answer_questions_batch", fake_batch)
+    app = FastAPI()
+    app.add_middleware(RequestIdLoggingMiddleware)
+    app.include_router(query_api.router)
+
+    doc = str(uuid.uuid4())
+    resp = TestClient(app).post(
+        "/query/batch",
+        json={"queries": [{"document_id": doc, "question": f"q{i}"} for i in range(3)]},
+    )
+
+    assert resp.status_code == 200
+    entries = [p.strip() for p in resp.headers["Server-Timing"].split(",")]
+    assert entries[:3] == ["embed;dur=5.0", "db;dur=30.0", "rerank;dur=2.0"]
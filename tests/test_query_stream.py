@@ -0,0 +1,136 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import uuid
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from typing import Any
+
+import numpy as np
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.api.v1 import query as query_api
+from app.api.v1.schemas.query import SourceChunk
+from app.core.settings import get_settings
+from app.db.types import EmbeddingArray
+from app.rag.answering import service
+from app.rag.answering.types import AnswerEvent, AnswerTimings, DoneEvent, SourcesEvent, TokenEvent
+
+
+def _parse_sse(body: str) -> list[tuple[str, Any]]:
+    out: list[tuple[str, Any]] = []
+    for block in body.strip().split("\n\n"):
+        lines = dict(line.split(": ", 1) for line in block.splitlines())
+        out.append((lines["event"], json.loads(lines["data"])))
+    return out
+
+
+def _client(monkeypatch: pytest.MonkeyPatch, stream: Any) -> TestClient:
+    monkeypatch.setattr(query_api, "answer_question_stream", stream)
+    app = FastAPI()
+    app.include_router(query_api.router)
+    return TestClient(app)
+
+
+def test_stream_sends_sources_then_tokens_then_timings(monkeypatch: pytest.MonkeyPatch) -> None:
+    async def fake_stream(**kw: Any) -> AsyncIterator[AnswerEvent]:
+        yield SourcesEvent(sources=[SourceChunk(chunk_index=0, text="ctx", score=0.9)])
+        yield TokenEvent(text="Hello")
+        yield TokenEvent(text=" world")
+        yield DoneEvent(answer="Hello world", timings=AnswerTimings(llm_first_token_ms=1.5))
+
+    client = _client(monkeypatch, fake_stream)
+    resp = client.post("/query/stream", json={"document_id": str(uuid.uuid4()), "question": "q"})
+
+    assert resp.status_code == 200
+    assert resp.headers["content-type"].startswith("text/event-stream")
+
+    events = _parse_sse(resp.text)
+    assert [name for name, _ in events] == ["sources", "token", "token", "timings"]
+    assert events[0][1]["sources"][0]["text"] == "ctx"
+    assert "meta" in events[0][1]
+    assert "".join(data["text"] for name, data in events if name == "token") == "Hello world"
+    assert events[-1][1]["llm_first_token_ms"] == 1.5
+
+
+def test_stream_reports_failure_as_error_event(monkeypatch: pytest.MonkeyPatch) -> None:
+    async def failing_stream(**kw: Any) -> AsyncIterator[AnswerEvent]:
+        yield SourcesEvent(sources=[])
+        raise RuntimeError("db down")
+
+    client = _client(monkeypatch, failing_stream)
+    resp = client.post("/query/stream", json={"document_id": str(uuid.uuid4()), "question": "q"})
+
+    events = _parse_sse(resp.text)
+    assert [name for name, _ in events] == ["sources", "error"]
+    assert events[-1][1]["code"] == "internal_error"
+
+
+def test_answer_question_drains_stream(monkeypatch: pytest.MonkeyPatch) -> None:
+    async def fake_stream(**kw: Any) -> AsyncIterator[AnswerEvent]:
+        yield SourcesEvent(sources=[SourceChunk(chunk_index=3, text="t", score=1.0)])
+        yield TokenEvent(text="a")
+        yield DoneEvent(answer="a", timings=AnswerTimings(total_ms=2.0))
+
+    monkeypatch.setattr(service, "answer_question_stream", fake_stream)
+
+    result = asyncio.run(
+        service.answer_question(session=None, document_id=uuid.uuid4(), question="q", top_k=1)  # type: ignore[arg-type]
+    )
+    assert result.answer == "a"
+    assert [s.chunk_index for s in result.sources] == [3]
+    assert result.timings.total_ms == 2.0
+    assert result.answer_cache_hit is False
+
+
+def test_stream_returns_connection_before_streaming_answer(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    monkeypatch.setenv("APP_ANSWER_CACHE_ENABLED", "false")
+    monkeypatch.setenv("APP_RETRIEVAL_CACHE_ENABLED", "false")
+    get_settings.cache_clear()
+    open_sessions: list[object] = []
+
+    @asynccontextmanager
+    async def fake_session_scope() -> AsyncIterator[object]:
+        session = object()
+        open_sessions.append(session)
+        try:
+            yield session
+        finally:
+            open_sessions.remove(session)
+
+    async def fake_embed(questions: list[str]) -> tuple[list[EmbeddingArray], float]:
+        return [np.array([1.0, 0.0], dtype=np.float32)], 0.1
+
+    async def fake_retrieve(**kw: Any) -> tuple[list[SourceChunk], float, float, float]:
+        assert kw["session"] in open_sessions
+        return [SourceChunk(chunk_index=0, text="t", score=1.0)], 1.0, 0.0, 0.0
+
+    async def fake_llm(**kw: Any) -> AsyncIterator[str]:
+        yield "open sessions while streaming:"
+        yield str(len(open_sessions))
+
+    monkeypatch.setattr(service, "session_scope", fake_session_scope)
+    monkeypatch.setattr(service, "embed_questions", fake_embed)
+    monkeypatch.setattr(service, "_retrieve", fake_retrieve)
+    monkeypatch.setattr(service, "stream_answer_llm", fake_llm)
+
+    async def run() -> list[AnswerEvent]:
+        return [
+            e
+            async for e in service.answer_question_stream(
+                session=None, document_id=uuid.uuid4(), question="q", top_k=1
+            )
+        ]
+
+    try:
+        events = asyncio.run(run())
+    finally:
+        get_settings.cache_clear()
+    assert [e.text for e in events if isinstance(e, TokenEvent)][-1] == "0"
+    assert isinstance(events[-1], DoneEvent)
+    assert events[-1].answer == "open sessions while streaming:0"
@@ -1,4 +1,4 @@
-from app.rag.reranking import RerankedItem, rerank_by_overlap
+from app.rag.reranking import RerankedItem, overlap_score, rerank_by_overlap, token_ids
 
 
 def test_rerank_overlap_promotes_more_relevant_text() -> None:
@@ -19,3 +19,38 @@ def test_rerank_overlap_promotes_more_relevant_text() -> None:
     )
 
     assert out[0].item == "pgvector ivfflat index in postgres"
+
+
+def test_vectorized_rerank_matches_per_item_formula() -> None:
+    q = "postgres pgvector ivfflat index"
+    texts = [
+        "hello world",
+        "pgvector ivfflat index in postgres",
+        "",
+        "Postgres: index, index, INDEX",
+        "postgres pgvector ivfflat index",
+    ]
+    items = [
+        RerankedItem(item=t, score=s) for t, s in zip(texts, [0.9, 0.6, 0.8, 0.6, 0.1], strict=True)
+    ]
+    w = 0.35
+
+    expected = sorted(
+        (
+            RerankedItem(item=t, score=(1.0 - w) * it.score + w * overlap_score(q, t))
+            for t, it in zip(texts, items, strict=True)
+        ),
+        key=lambda x: x.score,
+        reverse=True,
+    )
+    out = rerank_by_overlap(question=q, items=items, get_text=lambda s: s, weight=w)
+    precomputed = rerank_by_overlap(
+        question=q,
+        items=items,
+        get_text=lambda s: "",
+        weight=w,
+        get_token_ids=token_ids,
+    )
+
+    assert out == expected
+    assert precomputed == expected
@@ -0,0 +1,121 @@
+from __future__ import annotations
+
+import asyncio
+import uuid
+from collections.abc import AsyncIterator, Iterator
+from typing import Any
+
+import numpy as np
+import pytest
+
+from app.api.v1.schemas.query import SourceChunk
+from app.core.settings import get_settings
+from app.db.types import EmbeddingArray
+from app.rag.answering import service
+from app.rag.answering.types import SearchParams
+from app.rag.retrieval.cache import RetrievalCache, retrieval_cache_key
+
+
+@pytest.fixture
+def fresh_cache(monkeypatch: pytest.MonkeyPatch) -> Iterator[RetrievalCache]:
+    cache = RetrievalCache(maxsize=16, ttl_s=60)
+    monkeypatch.setattr(service, "get_retrieval_cache", lambda: cache)
+    get_settings.cache_clear()
+    yield cache
+    get_settings.cache_clear()
+
+
+def test_key_depends_on_version_and_query_shape() -> None:
+    s = get_settings()
+    doc = uuid.uuid4()
+    base: dict[str, Any] = {
+        "s": s,
+        "document_id": doc,
+        "version": 1,
+        "question": "what is it?",
+        "top_k": 5,
+        "search_params": SearchParams(index_mode="hnsw", ef_search=40),
+    }
+    key = retrieval_cache_key(**base)
+
+    assert retrieval_cache_key(**{**base, "question": " what is it? "}) == key
+    assert retrieval_cache_key(**{**base, "version": 2}) != key
+    assert retrieval_cache_key(**{**base, "top_k": 3}) != key
+    assert (
+        retrieval_cache_key(**{**base, "search_params": SearchParams("hnsw", ef_search=80)}) != key
+    )
+    assert retrieval_cache_key(**{**base, "s": s.model_copy(update={"rrf_k": 10})}) != key
+
+
+def test_identical_query_skips_search_until_version_bump(
+    monkeypatch: pytest.MonkeyPatch, fresh_cache: RetrievalCache
+) -> None:
+    version = 1
+    retrieve_calls = 0
+
+    async def fake_version(document_id: uuid.UUID) -> int:
+        return version
+
+    async def fake_embed(questions: list[str]) -> tuple[list[EmbeddingArray], float]:
+        return [np.array([1.0, 0.0], dtype=np.float32)], 0.1
+
+    async def fake_retrieve(**kw: Any) -> tuple[list[SourceChunk], float, float, float]:
+        nonlocal retrieve_calls
+        retrieve_calls += 1
+        return [SourceChunk(chunk_index=retrieve_calls, text="t", score=1.0)], 1.0, 0.0, 0.0
+
+    async def no_llm(**kw: Any) -> AsyncIterator[str]:
+        for token in list[str]():
+            yield token
+        raise RuntimeError("disabled")
+
+    monkeypatch.setattr(service, "get_document_version", fake_version)
+    monkeypatch.setattr(service, "embed_questions", fake_embed)
+    monkeypatch.setattr(service, "_retrieve", fake_retrieve)
+    monkeypatch.setattr(service, "stream_answer_llm", no_llm)
+
+    def ask() -> Any:
+        return asyncio.run(
+            service.answer_question(
+                session=object(),  # type: ignore[arg-type]
+                document_id=uuid.UUID(int=1),
+                question="q",
+                top_k=5,
+                search_params=SearchParams(),
+            )
+        )
+
+    first, second = ask(), ask()
+    assert (first.retrieval_cache_hit, second.retrieval_cache_hit) == (False, True)
+    assert second.sources == first.sources
+    assert second.timings.vector_search_ms == 0.0
+    assert retrieve_calls == 1
+
+    version = 2  # document re-ingested
+    third = ask()
+    assert third.retrieval_cache_hit is False
+    assert third.sources[0].chunk_index == 2
+    assert fresh_cache.stats.as_dict() == {"hits": 1, "misses": 2}
+
+
+def test_quantized_storage_widens_first_pass_and_ef_search(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    monkeypatch.setenv("APP_VECTOR_RERANK_MULTIPLIER", "4")
+    get_settings.cache_clear()
+    try:
+        full = SearchParams("hnsw", ef_search=100)
+        assert service.vector_search_knobs(full, 15) == (100, None)
+        # the document filter runs after the index scan: ef_search covers the limit
+        assert service.vector_search_knobs(SearchParams("hnsw"), 15) == (None, None)
+        assert service.vector_search_knobs(SearchParams("hnsw"), 64) == (64, None)
+        binary = SearchParams("hnsw", vector_storage="binary")
+        assert service.vector_search_knobs(binary, 15) == (60, 60)
+        assert service.vector_search_knobs(
+            SearchParams("ivfflat", vector_storage="halfvec"), 5
+        ) == (
+            None,
+            20,
+        )
+    finally:
+        get_settings.cache_clear()
@@ -0,0 +1,39 @@
+from __future__ import annotations
+
+import random
+from itertools import pairwise
+from pathlib import Path
+
+import pytest
+
+from app.rag.ingestion.chunking import chunk_text, iter_chunks
+from app.rag.ingestion.parsers.text import iter_text_file
+
+
+def _split_randomly(text: str, rng: random.Random) -> list[str]:
+    cuts = sorted(rng.sample(range(len(text) + 1), k=min(len(text), rng.randint(0, 40))))
+    bounds = [0, *cuts, len(text)]
+    return [text[a:b] for a, b in pairwise(bounds)]
+
+
+@pytest.mark.parametrize("seed", range(25))
+def test_iter_chunks_matches_chunk_text(seed: int) -> None:
+    rng = random.Random(seed)
+    alphabet = ["pg", "vector", "a", "\u00e9", "  ", "\n", "\t", "\u00a0 ", "x" * 30]
+    text = "".join(rng.choice(alphabet) for _ in range(rng.randint(0, 800)))
+    chunk_size, overlap = rng.choice([(800, 120), (50, 7), (10, 9), (5, 0)])
+
+    expected = chunk_text(text, chunk_size=chunk_size, overlap=overlap)
+    got = list(iter_chunks(_split_randomly(text, rng), chunk_size=chunk_size, overlap=overlap))
+
+    assert got == expected
+
+
+def test_iter_text_file_handles_multibyte_across_reads(tmp_path: Path) -> None:
+    text = "привет, pgvector — ✓ done\n" * 3
+    path = tmp_path / "doc.txt"
+    path.write_bytes(text.encode("utf-8") + b"\xff")
+
+    pieces = list(iter_text_file(path, read_size=1))
+
+    assert "".join(pieces) == text + "�"
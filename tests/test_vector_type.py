@@ -0,0 +1,41 @@
+from __future__ import annotations
+
+import numpy as np
+from pgvector import Vector
+from sqlalchemy.dialects.postgresql import asyncpg, psycopg
+
+from app.db.types import NumpyVector
+
+
+def test_asyncpg_passes_arrays_to_binary_codec() -> None:
+    col = NumpyVector(3)
+    dialect = asyncpg.dialect()  # type: ignore[no-untyped-call]
+    vec = np.array([0.5, -0.25, 1.0], dtype=np.float32)
+
+    # no text formatting: the registered codec packs the array itself
+    assert col.bind_processor(dialect) is None
+    wire = Vector(vec).to_binary()
+    assert len(wire) == 4 + 3 * 4
+
+    out = col.result_processor(dialect, None)(Vector.from_binary(wire))
+    assert out.dtype == np.float32
+    assert np.array_equal(out, vec)
+
+
+def test_other_drivers_keep_text_format_but_return_arrays() -> None:
+    col = NumpyVector(3)
+    dialect = psycopg.dialect()  # type: ignore[no-untyped-call]
+
+    assert (
+        col.bind_processor(dialect)(np.array([1.0, 2.0, 3.0], dtype=np.float32)) == "[1.0,2.0,3.0]"
+    )
+    out = col.result_processor(dialect, None)("[1,2,3]")
+    assert out.dtype == np.float32 and out.tolist() == [1.0, 2.0, 3.0]
+
+
+def test_compare_values_is_elementwise_safe() -> None:
+    col = NumpyVector(2)
+    a = np.array([1.0, 2.0], dtype=np.float32)
+    assert col.compare_values(a, a.copy())
+    assert not col.compare_values(a, np.array([1.0, 0.0], dtype=np.float32))
+    assert not col.compare_values(a, None)